@@ -5,7 +5,9 @@ import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
 from qubo_formulation import build_qubo
+from src.decoding import best_decoded, parse_var_label
 from src.quantum_solvers import solve_sa, solve_qaoa
+from src.visualize import LABEL_THRESHOLD, graph_layout
 
 # ---------------------------
 # Logging Setup
@@ -43,24 +45,27 @@ def run_experiment():
         # Classical SA
         # ---------------------------
         t0 = time.time()
-        sa_sol, sa_val = solve_sa(bqm)
+        sa_sol, sa_val, sa_set = solve_sa(bqm, return_sampleset=True)
         sa_times.append(time.time() - t0)
         sa_costs.append(sa_val)
         sa_solutions.append(sa_sol)
         logger.info(f"SA: value={sa_val:.2f}, time={sa_times[-1]:.2f}s")
         log_solution_summary(sa_sol, "SA")
+        log_decoded(G, candidate_lists, sa_set, "SA")
 
         # ---------------------------
         # Quantum QAOA
         # ---------------------------
         try:
             t0 = time.time()
-            q_sol, q_val = solve_qaoa(bqm, reps=1, maxiter=20, optimizer_name="COBYLA")
+            q_sol, q_val, q_set = solve_qaoa(bqm, reps=1, maxiter=20, optimizer_name="COBYLA",
+                                             return_sampleset=True)
             qaoa_times.append(time.time() - t0)
             qaoa_costs.append(q_val)
             qaoa_solutions.append(q_sol)
             logger.info(f"QAOA: value={q_val:.2f}, time={qaoa_times[-1]:.2f}s")
             log_solution_summary(q_sol, "QAOA")
+            log_decoded(G, candidate_lists, q_set, "QAOA")
         except Exception as e:
             logger.error(f"QAOA failed: {e}")
             qaoa_times.append(None)
@@ -94,33 +99,33 @@ def log_solution_summary(solution, tag="Solver"):
     chosen = [var for var, val in solution.items() if val == 1]
     logger.info(f"[{tag}] Selected {len(chosen)} variables → {chosen[:10]}{'...' if len(chosen) > 10 else ''}")
 
-    # Optionally count per-demand selections if variables are x_i_j
+    # Count per-demand selections for variables named x_i_j
     demand_counts = {}
     for var, val in solution.items():
-        if val == 1 and var.startswith("x_"):
-            try:
-                _, i, j = var.split("_")
-                demand_counts[int(i)] = demand_counts.get(int(i), 0) + 1
-            except ValueError:
-                continue
+        parsed = parse_var_label(var)
+        if val == 1 and parsed is not None:
+            demand_counts[parsed[0]] = demand_counts.get(parsed[0], 0) + 1
     logger.info(f"[{tag}] Demand path counts: {demand_counts}")
 
 
+def log_decoded(G, candidate_lists, sampleset, tag="Solver"):
+    """Decode every read into a feasible routing and report the best one under objective_cost."""
+    state, cost, _ = best_decoded(sampleset, G, candidate_lists)
+    logger.info(f"[{tag}] Best decoded routing over {len(sampleset)} reads: cost={cost:.2f}, state={state}")
+
+
 # ---------------------------
 # Plotting Helpers
 # ---------------------------
 def plot_solution(G, solution, title="Solution"):
     """Highlight nodes that are used in selected paths."""
-    pos = nx.spring_layout(G, seed=42)
+    pos = dict(zip(G.nodes, graph_layout(G)))
 
     chosen_nodes = set()
     for var, val in solution.items():
-        if val == 1 and var.startswith("x_"):
-            try:
-                _, i, j = var.split("_")
-                chosen_nodes.add(int(i))  # mark demand source
-            except ValueError:
-                pass  # ignore variables not following x_i_j format
+        parsed = parse_var_label(var)  # None for variables not following x_i_j format
+        if val == 1 and parsed is not None:
+            chosen_nodes.add(parsed[0])  # mark demand source
 
     color_map = ["lightgreen" if node in chosen_nodes else "lightgrey" for node in G.nodes()]
 
@@ -129,8 +134,9 @@ def plot_solution(G, solution, title="Solution"):
     nx.draw_networkx_edges(G, pos, width=1.5, alpha=0.7)
     nx.draw_networkx_labels(G, pos, font_size=12, font_weight="bold")
 
-    edge_labels = nx.get_edge_attributes(G, "weight")
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_size=10)
+    if G.number_of_edges() <= LABEL_THRESHOLD:
+        edge_labels = nx.get_edge_attributes(G, "weight")
+        nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_size=10)
 
     plt.title(title)
     plt.axis("off")
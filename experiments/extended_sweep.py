@@ -7,6 +7,32 @@ from src.annealing import compute_capacity_violation, simulated_annealing
 from src.baselines import random_routing_baseline, shortest_path_baseline
 from src.graph_setup import (build_toy_graph, enumerate_candidate_paths,
                              generate_demands)
+from src.sweep import run_sweep
+
+
+def build_instance(params):
+    """Graph, demands and candidates for one demand size (shared by every penalty)."""
+    G = build_toy_graph()
+    demands = generate_demands(G, num_demands=params["demand_size"], seed=42)
+    candidate_lists = enumerate_candidate_paths(G, demands, k=3)
+    return G, candidate_lists, demands
+
+
+def run_cell(instance, params):
+    G, candidate_lists, _ = instance
+    dsize, pen = params["demand_size"], params["penalty"]
+    best_state, best_cost, final_loads = simulated_annealing(
+        G,
+        candidate_lists,
+        episodes=params["episodes"],
+        congestion_penalty_coef=pen,
+        log_csv=f"results/logs/grid_dsize{dsize}_pen{pen}.csv",
+        seed=42,
+    )
+
+    chosen_paths = [candidate_lists[i][best_state[i]] for i in range(len(best_state))]
+    violations = compute_capacity_violation(G, chosen_paths)
+    return {"best_cost": best_cost, "violations": violations}
 
 
 def run_extended_sweep(
@@ -14,40 +40,19 @@ def run_extended_sweep(
     penalties=[1.0, 5.0, 10.0, 25.0, 50.0],
     episodes=100,
     output_csv="extended_sweep_results.csv",
+    workers=None,
 ):
-    results = []
-
-    for dsize, pen in itertools.product(demand_sizes, penalties):
-        print(f"=== Running SA with demand_size={dsize}, penalty={pen} ===")
-        G = build_toy_graph()
-        demands = generate_demands(G, num_demands=dsize, seed=42)
-        candidate_lists = enumerate_candidate_paths(G, demands, k=3)
-
-        best_state, best_cost, final_loads = simulated_annealing(
-            G,
-            candidate_lists,
-            episodes=episodes,
-            congestion_penalty_coef=pen,
-            log_csv=f"results/logs/grid_dsize{dsize}_pen{pen}.csv",
-            seed=42,
-        )
-
-        chosen_paths = [candidate_lists[i][best_state[i]] for i in range(len(best_state))]
-        violations = compute_capacity_violation(G, chosen_paths)
-
-        results.append({
-            "method": "simulated_annealing",
-            "demand_size": dsize,
-            "penalty": pen,
-            "best_cost": best_cost,
-            "violations": violations,
-        })
+    cells = [
+        {"method": "simulated_annealing", "demand_size": dsize, "penalty": pen, "episodes": episodes}
+        for dsize, pen in itertools.product(demand_sizes, penalties)
+    ]
+    sa_df = run_sweep(cells, build_instance, run_cell, instance_params=("demand_size",),
+                      out_dir="results/sweeps/extended_sweep", workers=workers)
+    results = sa_df.drop(columns=["episodes"]).to_dict("records")
 
     # === Baselines for each demand size ===
     for dsize in demand_sizes:
-        G = build_toy_graph()
-        demands = generate_demands(G, num_demands=dsize, seed=42)
-        candidate_lists = enumerate_candidate_paths(G, demands, k=3)
+        G, candidate_lists, demands = build_instance({"demand_size": dsize})
 
         # Shortest path
         sp_state, sp_cost, _, sp_viol = shortest_path_baseline(G, demands, candidate_lists)
@@ -1,16 +1,18 @@
 import argparse
 
 import matplotlib.pyplot as plt
-import networkx as nx
 import pandas as pd
 
-from src.annealing import compute_capacity_violation, simulated_annealing
+from src.annealing import compute_capacity_violation, optimality_gap, simulated_annealing
 from src.baselines import shortest_path_baseline
 from src.graph_setup import (build_large_graph, enumerate_candidate_paths,
                              generate_demands)
+from src.lower_bound import lp_lower_bound
+from src.polish import polish
+from src.visualize import draw_loads
 
 
-def run_demo(grid_size=6, num_demands=50, episodes=150, penalty=10.0, k_paths=3, seed=42):
+def run_demo(grid_size=6, num_demands=50, episodes=150, penalty=10.0, k_paths=3, seed=42, target_gap=None):
     # 1. Build network
     G = build_large_graph(grid_size=grid_size, seed=seed)
     print(f"Built {grid_size}x{grid_size} grid with {len(G.nodes)} nodes and {len(G.edges)} edges")
@@ -26,6 +28,10 @@ def run_demo(grid_size=6, num_demands=50, episodes=150, penalty=10.0, k_paths=3,
     sp_state, sp_cost, _, sp_viol = shortest_path_baseline(G, demands, candidate_lists)
     print(f"[Baseline] Cost={sp_cost:.2f}, Violations={sp_viol}")
 
+    # LP relaxation bound: how far from optimal each answer can be
+    lower_bound, _ = lp_lower_bound(G, candidate_lists, congestion_penalty_coef=penalty)
+    print(f"[Lower bound] {lower_bound:.2f} (baseline gap={optimality_gap(sp_cost, lower_bound):.2%})")
+
     # 5. Simulated Annealing run
     log_file = f"results/logs/demo_sa_grid{grid_size}_d{num_demands}.csv"
     best_state, best_cost, final_loads = simulated_annealing(
@@ -35,20 +41,26 @@ def run_demo(grid_size=6, num_demands=50, episodes=150, penalty=10.0, k_paths=3,
         congestion_penalty_coef=penalty,
         log_csv=log_file,
         seed=seed,
+        lower_bound=lower_bound,
+        target_gap=target_gap,
     )
     chosen_paths = [candidate_lists[i][best_state[i]] for i in range(len(best_state))]
     violations = compute_capacity_violation(G, chosen_paths)
-    print(f"[Simulated Annealing] Cost={best_cost:.2f}, Violations={violations}")
+    sa_gap = optimality_gap(best_cost, lower_bound)
+    print(f"[Simulated Annealing] Cost={best_cost:.2f}, Violations={violations}, Gap={sa_gap:.2%}")
+
+    # Steepest-descent cleanup: guarantees no single-demand path change improves the SA answer
+    best_state, best_cost, final_loads = polish(G, candidate_lists, best_state, congestion_penalty_coef=penalty)
+    chosen_paths = [candidate_lists[i][best_state[i]] for i in range(len(best_state))]
+    violations = compute_capacity_violation(G, chosen_paths)
+    sa_gap = optimality_gap(best_cost, lower_bound)
+    print(f"[Polished SA] Cost={best_cost:.2f}, Violations={violations}, Gap={sa_gap:.2%}")
 
     # 6. Visualization
     fig, ax = plt.subplots(1, 2, figsize=(12, 5))
 
     # Load distribution
-    loads = nx.get_edge_attributes(G, "load")
-    pos = nx.spring_layout(G, seed=seed)
-    nx.draw(G, pos, ax=ax[0], with_labels=True, node_size=300)
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=loads, ax=ax[0])
-    ax[0].set_title("Final Edge Loads (SA Allocation)")
+    draw_loads(G, final_loads, ax=ax[0], title="Final Edge Loads (SA Allocation)")
 
     # Cost/Violation over time
     df = pd.read_csv(log_file)
@@ -68,6 +80,9 @@ def run_demo(grid_size=6, num_demands=50, episodes=150, penalty=10.0, k_paths=3,
         "baseline_viol": sp_viol,
         "sa_cost": best_cost,
         "sa_viol": violations,
+        "lower_bound": lower_bound,
+        "baseline_gap": optimality_gap(sp_cost, lower_bound),
+        "sa_gap": sa_gap,
         "log_file": log_file,
         "plot_file": out_img,
     }
@@ -81,6 +96,7 @@ if __name__ == "__main__":
     parser.add_argument("--penalty", type=float, default=10.0, help="Congestion penalty coefficient")
     parser.add_argument("--k_paths", type=int, default=3, help="Number of candidate paths per demand")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--target_gap", type=float, default=None, help="Stop SA once within this relative gap of the LP bound")
 
     args = parser.parse_args()
 
@@ -91,6 +107,7 @@ if __name__ == "__main__":
         penalty=args.penalty,
         k_paths=args.k_paths,
         seed=args.seed,
+        target_gap=args.target_gap,
     )
 
     print("\n=== Final Results ===")
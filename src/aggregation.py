@@ -0,0 +1,184 @@
+"""
+Demand aggregation: identical OD pairs become one weighted commodity.
+
+objective_cost counts one vehicle per demand, so n trips between the same (s, t) share one
+candidate list and only the number of vehicles on each candidate matters. Solvers here optimise
+those split counts (one small integer vector per distinct OD pair) instead of one path variable per
+trip, and expand_state turns the counts back into a per-trip state for the original demand list.
+"""
+import math
+import random
+
+import numpy as np
+
+from src import instrumentation
+from src.path_index import LoadState, build_path_index
+
+
+def aggregate_demands(demands):
+    """
+    Group demands ((s, t) or (s, t, size) tuples) by OD pair, in order of first appearance.
+    Returns: (commodities, members) with commodities[c] = (s, t, multiplicity) and members[c] the
+    indices of the original demands in commodity c.
+    """
+    position = {}
+    commodities, members = [], []
+    for i, demand in enumerate(demands):
+        od = (demand[0], demand[1])
+        if od not in position:
+            position[od] = len(commodities)
+            commodities.append(od)
+            members.append([])
+        members[position[od]].append(i)
+    return [(s, t, len(m)) for (s, t), m in zip(commodities, members)], members
+
+
+def expand_candidates(candidate_lists, members, num_demands):
+    """Per-trip candidate lists (shared list objects) from per-commodity ones."""
+    expanded = [None] * num_demands
+    for P, trips in zip(candidate_lists, members):
+        for i in trips:
+            expanded[i] = P
+    return expanded
+
+
+def expand_state(counts, members, num_demands):
+    """Per-trip state from split counts: the first counts[c][0] trips of commodity c take path 0, ..."""
+    state = [0] * num_demands
+    for split, trips in zip(counts, members):
+        choices = [p for p, n in enumerate(split) for _ in range(n)]
+        for i, p in zip(trips, choices):
+            state[i] = p
+    return state
+
+
+def aggregate_state(state, members, candidate_lists):
+    """Split counts of a per-trip state (inverse of expand_state up to the order of trips)."""
+    counts = [[0] * len(P) for P in candidate_lists]
+    for c, trips in enumerate(members):
+        for i in trips:
+            counts[c][state[i]] += 1
+    return counts
+
+
+class SplitLoadState(LoadState):
+    """
+    LoadState over split counts: counts[q] vehicles on global path q of a PathIndex over commodity
+    candidate lists. Moves shift one vehicle between global paths.
+    """
+
+    def __init__(self, index, counts, power=2):
+        self.counts = [int(n) for n in counts]
+        entry_path = np.repeat(np.arange(index.num_paths), index.path_len)
+        loads = np.bincount(index.path_edges, weights=np.asarray(self.counts, dtype=float)[entry_path],
+                            minlength=index.num_edges)
+        self._setup(index, loads, float(np.dot(self.counts, index.path_time)), power)
+
+    def move_delta(self, old, new):
+        """(d_travel, d_excess, d_overload) of moving one vehicle from global path old to global path new."""
+        return self.path_delta(old, new)
+
+    def apply(self, old, new, delta=None):
+        """Move one vehicle from old to new (old=None adds a vehicle to new)."""
+        if delta is None:
+            delta = self.move_delta(old, new)
+        self._shift(old, new, delta)
+        if old is not None:
+            self.counts[old] -= 1
+        self.counts[new] += 1
+
+
+def greedy_split(index, multiplicities, congestion_penalty_coef=10.0, power=2):
+    """
+    Add vehicles one at a time (commodities in turn) to the path with the cheapest marginal cost.
+    Raises ValueError if a commodity carrying vehicles has no candidate path.
+    """
+    stranded = [c for c, m in enumerate(multiplicities) if m > 0 and index.num_choices[c] == 0]
+    if stranded:
+        raise ValueError(f"commodities {stranded} carry vehicles but have no candidate paths")
+    split = SplitLoadState(index, np.zeros(index.num_paths, dtype=np.int64), power)
+    dptr = index.demand_ptr.tolist()
+    remaining = list(multiplicities)
+    while any(remaining):
+        for c, left in enumerate(remaining):
+            if not left:
+                continue
+            costs = [(split.move_delta(None, q), q) for q in range(dptr[c], dptr[c + 1])]
+            d, q = min(costs, key=lambda item: item[0][0] + congestion_penalty_coef * item[0][1])
+            split.apply(None, q, d)
+            remaining[c] -= 1
+    return split
+
+
+@instrumentation.timed("solve")
+def split_annealing(
+    G,
+    candidate_lists,
+    multiplicities,
+    episodes=80,
+    temp_start=50.0,
+    temp_end=0.5,
+    moves_per_episode=None,
+    congestion_penalty_coef=10.0,
+    power=2,
+    seed=123,
+):
+    """
+    SA over split counts: candidate_lists[c] are the paths of commodity c, which carries
+    multiplicities[c] vehicles. A move shifts one random vehicle of a random commodity to another of
+    its candidates; it starts from greedy_split.
+    Returns: (best_counts, best_cost, final_edge_loads) with best_counts[c][p] vehicles on path p.
+    """
+    rnd = random.Random(seed)
+    index = build_path_index(G, candidate_lists)
+    split = greedy_split(index, multiplicities, congestion_penalty_coef, power)
+    dptr = index.demand_ptr.tolist()
+    movable = [c for c, m in enumerate(multiplicities) if m > 0 and dptr[c + 1] - dptr[c] > 1]
+
+    current_cost = split.cost(congestion_penalty_coef)
+    best_counts, best_cost = split.counts[:], current_cost
+    if moves_per_episode is None:
+        moves_per_episode = max(1, sum(multiplicities) // 2)
+    cooling = (temp_end / temp_start) ** (1.0 / max(1, episodes))
+    temp = temp_start
+
+    for _ in range(episodes if movable else 0):
+        for _ in range(moves_per_episode):
+            c = rnd.choice(movable)
+            # a uniformly random vehicle of c, then a different candidate for it
+            r = rnd.randrange(multiplicities[c])
+            old = dptr[c]
+            while r >= split.counts[old]:
+                r -= split.counts[old]
+                old += 1
+            new = rnd.randrange(dptr[c], dptr[c + 1] - 1)
+            if new >= old:
+                new += 1
+            d = split.move_delta(old, new)
+            delta = d[0] + congestion_penalty_coef * d[1]
+            if delta <= 0 or rnd.random() < math.exp(-delta / max(1e-9, temp)):
+                split.apply(old, new, d)
+                current_cost += delta
+                if current_cost < best_cost:
+                    best_counts, best_cost = split.counts[:], current_cost
+        temp *= cooling
+
+    final = SplitLoadState(index, best_counts, power)
+    counts = [best_counts[dptr[c]:dptr[c + 1]] for c in range(index.num_demands)]
+    return counts, final.cost(congestion_penalty_coef), index.loads_dict(final.loads)
+
+
+def solve_aggregated(G, demands, candidate_lists_fn, congestion_penalty_coef=10.0, **sa_kwargs):
+    """
+    Aggregate demands, generate candidates once per OD pair with candidate_lists_fn(G, commodities),
+    solve the split counts with split_annealing and expand back to one path index per trip.
+    Returns: (state, cost, final_edge_loads, candidate_lists) where candidate_lists are per trip,
+    so objective_cost(G, candidate_lists, state) == cost.
+    """
+    commodities, members = aggregate_demands(demands)
+    commodity_cands = candidate_lists_fn(G, commodities)
+    counts, cost, loads = split_annealing(G, commodity_cands, [m for _, _, m in commodities],
+                                          congestion_penalty_coef=congestion_penalty_coef, **sa_kwargs)
+    instrumentation.gauge("aggregated_commodities", len(commodities))
+    return (expand_state(counts, members, len(demands)), cost, loads,
+            expand_candidates(commodity_cands, members, len(demands)))
@@ -1,11 +1,16 @@
 import csv
 import math
 import random
+import time
 
+from src import instrumentation
 from src.formulation import (compute_edge_loads_from_state, objective_cost,
-                             random_initial_state, sa_neighbor)
+                             random_initial_state)
+from src.lower_bound import lp_lower_bound
+from src.path_index import LoadState, build_path_index
 
 
+@instrumentation.timed("solve")
 def simulated_annealing(
     G,
     candidate_lists,
@@ -16,10 +21,29 @@ def simulated_annealing(
     congestion_penalty_coef=10.0,
     log_csv="sa_log.csv",
     seed=123,
+    lower_bound=None,
+    target_gap=None,
+    initial_state=None,
+    kernel=None,
+    verbose=True,
+    index=None,
+    on_improve=None,
 ):
     """
     SA over a discrete 'state' where state[i] is the chosen path index for demand i.
-    Logs per-episode metrics to CSV and prints progress.
+    Moves are priced incrementally from the loads on the old and new path (same proposals and
+    costs as sa_neighbor + objective_cost).
+    With target_gap set, stops after the first episode whose best cost is within target_gap
+    (relative) of lower_bound; the bound is computed with lower_bound.lp_lower_bound if not given.
+    initial_state warm-starts the search (default: a random state).
+    kernel='auto' / 'numba' / 'python' runs the move loop in sa_kernel.AnnealKernel (JIT-compiled
+    when numba is installed; 'auto' honours the SA_KERNEL environment variable). Its proposals come
+    from a NumPy Generator, so trajectories differ from the default kernel=None loop.
+    index: prebuilt PathIndex of (G, candidate_lists), e.g. SharedArrays.index in a pool worker;
+    with it G and candidate_lists may be None (costs, violations and loads then come from the index).
+    on_improve(best_state) is called after every episode that improved the best state (e.g. to
+    publish incumbents from a worker process).
+    Logs per-episode metrics to CSV and prints progress (verbose=False keeps it quiet).
     Returns: (best_state, best_cost, final_edge_loads)
     """
     # Reproducibility
@@ -27,17 +51,37 @@ def simulated_annealing(
     random.seed(seed)
 
     # Initial state
-    state = random_initial_state(candidate_lists)
-    current_cost = objective_cost(G, candidate_lists, state, congestion_penalty_coef)
+    if index is None:
+        index = build_path_index(G, candidate_lists)
+    if initial_state is not None:
+        state = list(initial_state)
+    elif candidate_lists is not None:
+        state = random_initial_state(candidate_lists)
+    else:
+        state = [random.randrange(int(c)) for c in index.num_choices]
+    if G is not None:
+        current_cost = objective_cost(G, candidate_lists, state, congestion_penalty_coef)
+    else:
+        current_cost = index.cost(state, congestion_penalty_coef)
     best_state = state[:]
     best_cost = current_cost
-    best_paths = candidate_lists
+    if kernel is not None:
+        from src.sa_kernel import AnnealKernel
+        fast = AnnealKernel(index, state, congestion_penalty_coef, seed=seed,
+                            backend=None if kernel == "auto" else kernel)
+    loads = LoadState(index, state)
+    num_choices = index.num_choices.tolist()
+    if target_gap is not None and lower_bound is None:
+        lower_bound, _ = lp_lower_bound(G, candidate_lists, congestion_penalty_coef, index=index)
 
     # SA schedule
     if moves_per_episode is None:
-        moves_per_episode = max(1, len(candidate_lists) // 2)
+        moves_per_episode = max(1, index.num_demands // 2)
     cooling = (temp_end / temp_start) ** (1.0 / max(1, episodes))
     temp = temp_start
+    total_trials = 0
+    total_accepts = 0
+    t_start = time.perf_counter()
 
     # CSV header
     with open(log_csv, "w", newline="") as f:
@@ -48,40 +92,200 @@ def simulated_annealing(
         ])
 
     # Main loop
+    reported_cost = best_cost
     for ep in range(episodes):
         accepts = 0
         trials = 0
         accepted = 0
 
-        for _ in range(moves_per_episode):
-            trials += 1
-            cand = sa_neighbor(state, candidate_lists)
-            cand_cost = objective_cost(G, candidate_lists, cand, congestion_penalty_coef)
-            delta = cand_cost - current_cost
+        if kernel is not None:
+            trials = moves_per_episode
+            accepts = fast.episode(temp, moves_per_episode)
+            current_cost, best_cost, best_state = fast.current_cost, fast.best_cost, fast.best_state
+        else:
+            for _ in range(moves_per_episode):
+                trials += 1
+                i, choice = propose_move(loads.state, num_choices)
+                d = loads.move_delta(i, choice)
+                delta = d[0] + congestion_penalty_coef * d[1]
+                cand_cost = current_cost + delta
 
-            if delta <= 0 or rnd.random() < math.exp(-delta / max(1e-9, temp)):
-                state = cand
-                current_cost = cand_cost
-                accepts += 1
-                if cand_cost < best_cost:
-                    best_cost = cand_cost
-                    best_state = state[:]
+                if delta <= 0 or rnd.random() < math.exp(-delta / max(1e-9, temp)):
+                    loads.apply(i, choice, d)
+                    current_cost = cand_cost
+                    accepts += 1
+                    if cand_cost < best_cost:
+                        best_cost = cand_cost
+                        best_state = loads.state[:]
 
+        state = loads.state if kernel is None else fast.state
         acc_rate = accepts / trials if trials else 0.0
-        violations = compute_capacity_violation(G, [candidate_lists[i][state[i]] for i in range(len(state))])
+        total_trials += trials
+        total_accepts += accepts
+        if kernel is not None:
+            violations = round(fast.overload, 6)
+        elif G is not None:
+            violations = compute_capacity_violation(G, [candidate_lists[i][state[i]] for i in range(len(state))])
+        else:
+            violations = round(loads.overload, 6)
         # Log
         with open(log_csv, "a", newline="") as f:
             w = csv.writer(f)
-            w.writerow([ep, f"{temp:.6f}", f"{current_cost:.6f}", f"{best_cost:.6f}", f"{acc_rate:.4f}"])
+            w.writerow([ep, f"{temp:.6f}", f"{current_cost:.6f}", f"{best_cost:.6f}", f"{acc_rate:.4f}", violations])
 
-        if ep % max(1, episodes // 10) == 0 or ep == episodes - 1:
+        if verbose and (ep % max(1, episodes // 10) == 0 or ep == episodes - 1):
             print(f"Episode {ep}: temp={temp:.3f}, current={current_cost:.2f}, best={best_cost:.2f}, accept_rate={acc_rate:.2f}, Violations={violations}")
 
         temp *= cooling
+        if on_improve is not None and best_cost < reported_cost:
+            reported_cost = best_cost
+            on_improve(list(best_state))
 
-    final_loads = compute_edge_loads_from_state(G, candidate_lists, best_state)
+        if target_gap is not None and optimality_gap(best_cost, lower_bound) <= target_gap:
+            if verbose:
+                print(f"Episode {ep}: gap={optimality_gap(best_cost, lower_bound):.4f} <= {target_gap} "
+                      f"(bound={lower_bound:.2f}), stopping early")
+            break
+
+    instrumentation.count("sa_moves_evaluated", total_trials)
+    instrumentation.count("sa_moves_accepted", total_accepts)
+    instrumentation.gauge("sa_moves_per_second", total_trials / max(1e-9, time.perf_counter() - t_start))
+
+    # best_cost was accumulated from move deltas; re-score it so float weights cannot drift
+    if G is not None:
+        best_cost = objective_cost(G, candidate_lists, best_state, congestion_penalty_coef)
+        final_loads = compute_edge_loads_from_state(G, candidate_lists, best_state)
+    else:
+        best_cost = index.cost(best_state, congestion_penalty_coef)
+        final_loads = index.loads_dict(index.edge_loads(best_state))
     return best_state, best_cost, final_loads
 
+def optimality_gap(cost, bound):
+    """Relative gap (cost - bound) / |cost|; 0 when cost is 0 and the bound matches."""
+    if cost == bound:
+        return 0.0
+    return (cost - bound) / max(abs(cost), 1e-9)
+
+
+def propose_move(state, num_choices):
+    """
+    Draw the move sa_neighbor would make, without copying the state.
+    Returns (i, new_choice); new_choice == state[i] when demand i has a single candidate.
+    """
+    i = random.randrange(len(state))
+    if num_choices[i] <= 1:
+        return i, state[i]
+    choices = list(range(num_choices[i]))
+    choices.remove(state[i])
+    return i, random.choice(choices)
+
+
+@instrumentation.timed("solve")
+def penalty_continuation_annealing(
+    G,
+    candidate_lists,
+    episodes=80,
+    temp_start=50.0,
+    temp_end=0.5,
+    moves_per_episode=None,
+    penalty_start=1.0,
+    penalty_min=0.5,
+    penalty_max=1000.0,
+    penalty_growth=2.0,
+    penalty_decay=0.8,
+    patience=1,
+    log_csv="sa_log.csv",
+    seed=123,
+    verbose=True,
+    on_improve=None,
+):
+    """
+    SA that adapts the congestion penalty during the run instead of sweeping it.
+    After each episode the coefficient is multiplied by penalty_growth if capacity violations
+    persisted for `patience` episodes, or by penalty_decay once they vanish (clamped to
+    [penalty_min, penalty_max]). The current cost is re-scored in O(1) from the tracked travel time
+    and congestion excess when the coefficient changes.
+    The best state is the one with fewest violations, then lowest travel time.
+    verbose=False suppresses the progress prints; on_improve(best_state) is called after every
+    episode that improved the best state.
+    Returns: (best_state, best_cost, final_edge_loads, info) where best_cost is objective_cost at the
+    final penalty and info holds final_penalty, penalty_trajectory and violation_trajectory.
+    """
+    rnd = random.Random(seed)
+    random.seed(seed)
+
+    loads = LoadState(build_path_index(G, candidate_lists), random_initial_state(candidate_lists))
+    num_choices = [len(P) for P in candidate_lists]
+    coef = penalty_start
+    current_cost = loads.cost(coef)
+    best_key = (loads.overload, loads.travel)
+    best_state, best_excess = loads.state[:], loads.excess
+
+    if moves_per_episode is None:
+        moves_per_episode = max(1, len(candidate_lists) // 2)
+    cooling = (temp_end / temp_start) ** (1.0 / max(1, episodes))
+    temp = temp_start
+    violated_for = 0
+    penalty_trajectory, violation_trajectory = [], []
+
+    with open(log_csv, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow([
+            "episode", "temp", "current_cost", "best_cost",
+            "acceptance_rate", "violations", "penalty"
+        ])
+
+    for ep in range(episodes):
+        accepts = 0
+        improved = False
+        for _ in range(moves_per_episode):
+            i, choice = propose_move(loads.state, num_choices)
+            d = loads.move_delta(i, choice)
+            delta = d[0] + coef * d[1]
+            if delta <= 0 or rnd.random() < math.exp(-delta / max(1e-9, temp)):
+                loads.apply(i, choice, d)
+                current_cost += delta
+                accepts += 1
+                if (loads.overload, loads.travel) < best_key:
+                    best_key = (loads.overload, loads.travel)
+                    best_state, best_excess = loads.state[:], loads.excess
+                    improved = True
+        if on_improve is not None and improved:
+            on_improve(best_state[:])
+
+        violations = loads.overload
+        penalty_trajectory.append(coef)
+        violation_trajectory.append(violations)
+        acc_rate = accepts / moves_per_episode
+        with open(log_csv, "a", newline="") as f:
+            w = csv.writer(f)
+            w.writerow([ep, f"{temp:.6f}", f"{current_cost:.6f}", f"{best_key[1] + coef * best_excess:.6f}",
+                        f"{acc_rate:.4f}", violations, f"{coef:.6f}"])
+
+        if verbose and (ep % max(1, episodes // 10) == 0 or ep == episodes - 1):
+            print(f"Episode {ep}: temp={temp:.3f}, penalty={coef:.2f}, current={current_cost:.2f}, "
+                  f"accept_rate={acc_rate:.2f}, Violations={violations}")
+
+        # adapt the penalty, then re-score the current state under it
+        violated_for = violated_for + 1 if violations > 0 else 0
+        if violated_for >= patience:
+            coef = min(penalty_max, coef * penalty_growth)
+        elif violations == 0:
+            coef = max(penalty_min, coef * penalty_decay)
+        current_cost = loads.cost(coef)
+        temp *= cooling
+
+    final_coef = penalty_trajectory[-1] if penalty_trajectory else coef
+    best_cost = objective_cost(G, candidate_lists, best_state, final_coef)
+    final_loads = compute_edge_loads_from_state(G, candidate_lists, best_state)
+    info = {
+        "final_penalty": final_coef,
+        "penalty_trajectory": penalty_trajectory,
+        "violation_trajectory": violation_trajectory,
+    }
+    return best_state, best_cost, final_loads, info
+
+
 def compute_capacity_violation(G, paths):
     """
     Returns total violation amount (sum of overloads across all edges).
@@ -0,0 +1,198 @@
+"""
+Pipeline benchmarks with regression tracking.
+
+    python -m src.benchmarks run --ladder small --out results/benchmarks/before.json
+    python -m src.benchmarks compare results/benchmarks/before.json results/benchmarks/after.json
+
+Every stage is timed on fixed-seed instances from build_large_graph/generate_demands across a
+size ladder; `compare` flags stages whose median time grew by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from src.annealing import simulated_annealing
+from src.formulation import build_qubo as build_state_qubo
+from src.formulation import k_shortest_candidates, objective_cost, random_initial_state
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.qubo_formulation import build_qubo
+
+# (grid_size, num_demands) per rung
+LADDERS = {
+    "tiny": [(3, 4), (4, 8)],
+    "small": [(4, 10), (6, 25), (8, 50)],
+    "medium": [(8, 50), (12, 150), (16, 400)],
+}
+
+# QAOA simulation is exponential in the number of variables, so it only runs on rungs this small
+QAOA_MAX_VARS = 12
+
+
+def make_instance(grid_size, num_demands, k=3, seed=0):
+    """Fixed-seed benchmark instance: grid graph, demands and k candidate paths per demand."""
+    G = build_large_graph(grid_size=grid_size, seed=seed)
+    demands = generate_demands(G, num_demands=num_demands, seed=seed)
+    candidate_lists = enumerate_candidate_paths(G, demands, k=k)
+    state = [random.Random(seed).randrange(len(P)) for P in candidate_lists]
+    return {
+        "G": G,
+        "demands": demands,
+        "od": [(s, t) for s, t, _ in demands],
+        "candidate_lists": candidate_lists,
+        "state": state,
+        "k": k,
+        "seed": seed,
+    }
+
+
+def _solve_sa(inst):
+    from src.quantum_solvers import solve_sa
+    bqm = build_qubo(inst["G"], inst["demands"], inst["candidate_lists"], verbose=False)
+    return lambda: solve_sa(bqm, num_reads=10)
+
+
+def _solve_qaoa(inst):
+    from src.quantum_solvers import solve_qaoa
+    bqm = build_qubo(inst["G"], inst["demands"], inst["candidate_lists"], verbose=False)
+    if len(bqm.variables) > QAOA_MAX_VARS:
+        return None
+    return lambda: solve_qaoa(bqm, reps=1, maxiter=10, optimizer_name="COBYLA")
+
+
+def _simulated_annealing(inst):
+    log_csv = os.path.join(tempfile.gettempdir(), "bench_sa_log.csv")
+    return lambda: simulated_annealing(inst["G"], inst["candidate_lists"], episodes=20,
+                                       log_csv=log_csv, seed=inst["seed"], verbose=False)
+
+
+# stage name -> factory(instance) returning a zero-argument callable (or None to skip the rung)
+STAGES = {
+    "k_shortest_candidates": lambda inst: lambda: k_shortest_candidates(inst["G"], inst["od"], k=inst["k"], weight="weight"),
+    "enumerate_candidate_paths": lambda inst: lambda: enumerate_candidate_paths(inst["G"], inst["demands"], k=inst["k"]),
+    "objective_cost": lambda inst: lambda: objective_cost(inst["G"], inst["candidate_lists"], inst["state"]),
+    "formulation.build_qubo": lambda inst: lambda: build_state_qubo(inst["G"], inst["candidate_lists"]),
+    "qubo_formulation.build_qubo": lambda inst: lambda: build_qubo(inst["G"], inst["demands"], inst["candidate_lists"], verbose=False),
+    "simulated_annealing": _simulated_annealing,
+    "solve_sa": _solve_sa,
+    "solve_qaoa": _solve_qaoa,
+}
+
+
+def time_call(fn, repeat=3):
+    """Wall-clock seconds of `repeat` calls to fn (after one untimed warm-up call)."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def run_benchmarks(ladder="small", stages=None, repeat=3, k=3, seed=0):
+    """
+    Time every stage on every rung of the ladder.
+    A stage that fails (e.g. an optional solver backend is missing) is recorded with its error.
+    Returns: dict with 'meta' and 'results' (one entry per stage x rung).
+    """
+    rungs = LADDERS[ladder] if isinstance(ladder, str) else ladder
+    stages = list(STAGES) if stages is None else stages
+    results = []
+    for grid_size, num_demands in rungs:
+        inst = make_instance(grid_size, num_demands, k=k, seed=seed)
+        for name in stages:
+            row = {"stage": name, "grid_size": grid_size, "num_demands": num_demands, "k": k, "repeat": repeat}
+            try:
+                fn = STAGES[name](inst)
+                if fn is None:
+                    continue
+                times = time_call(fn, repeat=repeat)
+                row.update(min_s=min(times), median_s=statistics.median(times), mean_s=statistics.fmean(times))
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+            results.append(row)
+            print(f"[bench] {name} grid={grid_size} demands={num_demands} "
+                  f"{row.get('median_s', float('nan')):.6f}s {row.get('error', '')}", file=sys.stderr)
+
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ladder": ladder if isinstance(ladder, str) else "custom",
+        "seed": seed,
+    }
+    return {"meta": meta, "results": results}
+
+
+def _key(row):
+    return (row["stage"], row["grid_size"], row["num_demands"], row["k"])
+
+
+def compare_results(baseline, current, threshold=0.10, metric="median_s"):
+    """
+    Match rows by (stage, grid_size, num_demands, k) and compute current/baseline time ratios.
+    Returns: list of dicts sorted by ratio (worst first); 'regression' is True when the
+    ratio exceeds 1 + threshold.
+    """
+    base = {_key(r): r for r in baseline["results"] if metric in r}
+    rows = []
+    for r in current["results"]:
+        b = base.get(_key(r))
+        if b is None or metric not in r:
+            continue
+        ratio = r[metric] / b[metric] if b[metric] > 0 else float("inf")
+        rows.append({
+            "stage": r["stage"], "grid_size": r["grid_size"], "num_demands": r["num_demands"],
+            "baseline": b[metric], "current": r[metric], "ratio": ratio,
+            "regression": ratio > 1.0 + threshold,
+        })
+    return sorted(rows, key=lambda row: -row["ratio"])
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the traffic assignment pipeline")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run_p = sub.add_parser("run", help="Time all stages and write JSON results")
+    run_p.add_argument("--ladder", default="small", choices=sorted(LADDERS))
+    run_p.add_argument("--stages", nargs="*", default=None, choices=sorted(STAGES))
+    run_p.add_argument("--repeat", type=int, default=3)
+    run_p.add_argument("--k", type=int, default=3)
+    run_p.add_argument("--seed", type=int, default=0)
+    run_p.add_argument("--out", default="results/benchmarks/bench.json")
+
+    cmp_p = sub.add_parser("compare", help="Compare two result files and flag regressions")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown fraction")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "run":
+        out = run_benchmarks(args.ladder, args.stages, args.repeat, args.k, args.seed)
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(out, f, indent=2)
+        print(f"[bench] Results saved to {args.out}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare_results(baseline, current, threshold=args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['stage']:<28} grid={row['grid_size']:<3} demands={row['num_demands']:<5} "
+              f"{row['baseline']:.6f}s -> {row['current']:.6f}s  x{row['ratio']:.2f} {flag}")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
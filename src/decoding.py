@@ -0,0 +1,163 @@
+import numpy as np
+
+from src import instrumentation
+from src.path_index import PathIndex, build_path_index, gather_ranges
+from src.polish import steepest_descent
+
+
+def parse_var_label(label):
+    """
+    Parse a qubo_formulation variable label 'x_<demand>_<path>'.
+    Returns (demand, path) or None for labels in another format.
+    """
+    parts = str(label).split("_")
+    if len(parts) != 3 or parts[0] != "x":
+        return None
+    try:
+        return int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+def variable_columns(variables, candidate_lists, var_idx=None):
+    """
+    Column of every (demand, path) variable in a sample matrix whose columns are `variables`.
+    Labels are 'x_<d>_<p>' (qubo_formulation.build_qubo) unless var_idx maps (d, p) -> label
+    (formulation.build_qubo). Variables missing from the sample get column -1.
+    Returns: int array of length sum(len(P) for P in candidate_lists), in global path order.
+    """
+    col_of = {v: c for c, v in enumerate(variables)}
+    cols = []
+    for d, P in enumerate(candidate_lists):
+        for p in range(len(P)):
+            label = var_idx[(d, p)] if var_idx is not None else f"x_{d}_{p}"
+            cols.append(col_of.get(label, -1))
+    return np.asarray(cols, dtype=np.int64)
+
+
+def decode_samples(samples, columns, index):
+    """
+    Vectorized decode of a (reads x variables) 0/1 matrix.
+    Returns: (states, counts, selected)
+     - states: (reads x demands) chosen path index, -1 where no path is selected
+       (lowest selected index when several are) and for demands without candidates
+     - counts: (reads x demands) number of selected paths per demand (0 without candidates)
+     - selected: (reads x paths) boolean selection in global path order
+    """
+    samples = np.atleast_2d(np.asarray(samples))
+    selected = np.zeros((samples.shape[0], len(columns)), dtype=bool)
+    present = columns >= 0
+    selected[:, present] = samples[:, columns[present]] > 0
+
+    starts = index.demand_ptr[:-1]
+    local = np.arange(index.num_paths) - np.repeat(starts, index.num_choices)
+    kmax = int(index.num_choices.max()) if index.num_demands else 0
+    # largest key in a segment belongs to the first selected path; 0 means none
+    key = selected * (kmax - local)
+    counts = np.zeros((samples.shape[0], index.num_demands), dtype=np.int64)
+    top = np.zeros_like(counts)
+    # reduceat returns the element at a repeated offset, so empty segments are left out
+    nonempty = index.num_choices > 0
+    if nonempty.any():
+        counts[:, nonempty] = np.add.reduceat(selected.astype(np.int64), starts[nonempty], axis=1)
+        top[:, nonempty] = np.maximum.reduceat(key, starts[nonempty], axis=1)
+    states = np.where(top > 0, kmax - top, -1)
+    return states, counts, selected
+
+
+def repair_state(index, state, count, selected, congestion_penalty_coef, power=2):
+    """
+    Greedy one-hot repair of one decoded read.
+    Demands with exactly one selected path are kept; the rest are assigned, one at a time,
+    to the cheapest path given the loads so far (choosing among the selected paths when
+    there are several, among all candidates when there are none). Demands without candidates
+    keep state -1.
+    """
+    state = np.array(state, dtype=np.int64)
+    ok = count == 1
+    entries = gather_ranges(index.path_ptr, index.global_paths(state)[ok])
+    loads = np.bincount(index.path_edges[entries], minlength=index.num_edges).astype(float)
+
+    for i in np.flatnonzero(~ok & (index.num_choices > 0)):
+        lo, hi = index.demand_ptr[i], index.demand_ptr[i + 1]
+        options = np.arange(lo, hi)
+        if count[i] > 1:
+            options = options[selected[lo:hi]]
+        best_q, best_cost = options[0], np.inf
+        for q in options:
+            e = index.path_edge_ids(q)
+            before = np.maximum(0.0, loads[e] - index.capacity[e]) ** power
+            after = np.maximum(0.0, loads[e] + 1 - index.capacity[e]) ** power
+            c = index.path_time[q] + congestion_penalty_coef * float(np.sum(after - before))
+            if c < best_cost:
+                best_q, best_cost = q, c
+        loads[index.path_edge_ids(best_q)] += 1
+        state[i] = best_q - lo
+    return state
+
+
+def _routable(index):
+    """(PathIndex of the demands with candidates, boolean mask of those demands)."""
+    routable = index.num_choices > 0
+    if routable.all():
+        return index, routable
+    # empty demands own no paths, so dropping their repeated offsets leaves the path arrays as is
+    return PathIndex(index.edges, index.capacity, index.time, np.unique(index.demand_ptr), index.path_ptr,
+                     index.path_edges), routable
+
+
+@instrumentation.timed("decode")
+def decode_sampleset(sampleset, G, candidate_lists, congestion_penalty_coef, var_idx=None,
+                     polish_rounds=3, power=2, index=None):
+    """
+    Turn every read of a dimod SampleSet into a feasible path-choice state.
+    Reads are decoded together, one-hot violations are repaired greedily and each state is
+    polished with up to `polish_rounds` rounds of polish.steepest_descent under objective_cost.
+    congestion_penalty_coef has no default: pass the penalty the reads are compared at (the
+    solvers' 10.0, or whatever the QUBO was built with), so repair, polish and cost agree with it.
+    Demands without candidate paths get state -1 and are left out of repair, polish and cost.
+    Returns: (states, costs) with states a (reads x demands) int array sorted by ascending cost.
+    """
+    if index is None:
+        index = build_path_index(G, candidate_lists)
+    columns = variable_columns(sampleset.variables, candidate_lists, var_idx=var_idx)
+    raw, counts, selected = decode_samples(sampleset.record.sample, columns, index)
+    sub, routable = _routable(index)
+    raw, counts = raw[:, routable], counts[:, routable]
+
+    states = np.full((len(raw), index.num_demands), -1, dtype=np.int64)
+    costs = np.empty(len(raw))
+    done = {}  # identical reads decode identically
+    for r in range(len(raw)):
+        key = selected[r].tobytes()
+        if key in done:
+            instrumentation.count("decode_cache_hits")
+            states[r], costs[r] = states[done[key]], costs[done[key]]
+            continue
+        state = raw[r]
+        if np.any(counts[r] != 1):
+            state = repair_state(sub, state, counts[r], selected[r], congestion_penalty_coef, power)
+        if polish_rounds > 0:
+            state, cost, _ = steepest_descent(sub, state, congestion_penalty_coef, power, max_iters=polish_rounds)
+        else:
+            cost = sub.cost(state, congestion_penalty_coef, power)
+        states[r, routable] = state
+        costs[r] = cost
+        done[key] = r
+
+    order = np.argsort(costs, kind="stable")
+    return states[order], costs[order]
+
+
+def best_decoded(sampleset, G, candidate_lists, congestion_penalty_coef, var_idx=None,
+                 polish_rounds=3, power=2):
+    """
+    Decode a SampleSet and keep the cheapest state (-1 for demands without candidates).
+    Returns: (best_state, best_cost, final_edge_loads) like simulated_annealing.
+    """
+    index = build_path_index(G, candidate_lists)
+    states, costs = decode_sampleset(sampleset, G, candidate_lists, congestion_penalty_coef, var_idx,
+                                     polish_rounds, power, index=index)
+    sub, routable = _routable(index)
+    best_state = [int(s) for s in states[0]]
+    return best_state, float(costs[0]), index.loads_dict(sub.edge_loads(states[0][routable]))
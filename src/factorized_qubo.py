@@ -0,0 +1,209 @@
+import math
+import random
+
+import dimod
+import numpy as np
+
+from src import instrumentation
+from src.qubo_formulation import edge_variable_map, scaled_penalties
+
+
+class FactorizedQubo:
+    """
+    The energy of qubo_formulation.build_qubo kept as a sum of squares instead of pairwise couplings:
+      E(x) = sum_d alpha*(1 - sum_i x_d_i)^2 + sum_e beta*(sum_{v on e} c_v*x_v - cap_e)^2
+    Memory is O(total path length) rather than O(sum_e n_e^2), and the energy change of a flip
+    only needs the running sums of the demand and of the edges on the flipped variable's path.
+
+    Attributes:
+     - labels: variable labels x_<demand>_<path>, demand-major
+     - demand_ptr: variables of demand d are demand_ptr[d]:demand_ptr[d+1]
+     - var_coef: demand value of each variable (its contribution to edge loads)
+     - var_ptr, var_edges: variable v touches used-edge ids var_edges[var_ptr[v]:var_ptr[v+1]]
+     - edge_cap: capacity of each used edge (edges no path uses carry no term, as in build_qubo)
+    """
+
+    def __init__(self, labels, demand_ptr, var_coef, var_ptr, var_edges, edge_cap, alpha, beta):
+        self.labels = labels
+        self.demand_ptr = np.asarray(demand_ptr, dtype=np.int64)
+        self.var_coef = np.asarray(var_coef, dtype=float)
+        self.var_ptr = np.asarray(var_ptr, dtype=np.int64)
+        self.var_edges = np.asarray(var_edges, dtype=np.int64)
+        self.edge_cap = np.asarray(edge_cap, dtype=float)
+        self.alpha = float(alpha)
+        self.beta = float(beta)
+
+        self.num_variables = len(labels)
+        self.num_demands = len(self.demand_ptr) - 1
+        self.num_edges = len(self.edge_cap)
+        self.var_demand = np.repeat(np.arange(self.num_demands), np.diff(self.demand_ptr))
+        self._entry_var = np.repeat(np.arange(self.num_variables), np.diff(self.var_ptr))
+
+    def dense_num_interactions(self):
+        """Number of quadratic terms the materialized BQM would hold (upper bound; repeated pairs merge)."""
+        n_e = np.bincount(self.var_edges, minlength=self.num_edges)
+        k_d = np.diff(self.demand_ptr)
+        return int(np.sum(n_e * (n_e - 1) // 2) + np.sum(k_d * (k_d - 1) // 2))
+
+    def energies(self, samples):
+        """Energy of each row of a (reads x variables) 0/1 matrix, columns in `labels` order."""
+        X = np.atleast_2d(np.asarray(samples, dtype=float))
+        sums = np.add.reduceat(X, self.demand_ptr[:-1], axis=1) if self.num_variables else X[:, :0]
+        out = self.alpha * np.sum((1.0 - sums) ** 2, axis=1)
+        weights = self.var_coef[self._entry_var]
+        for r in range(len(X)):
+            loads = np.bincount(self.var_edges, weights=X[r, self._entry_var] * weights,
+                                minlength=self.num_edges)
+            out[r] += self.beta * np.sum((loads - self.edge_cap) ** 2)
+        return out
+
+    def to_bqm(self):
+        """Materialize the equivalent dimod BQM (only sensible for small instances)."""
+        bqm = dimod.BinaryQuadraticModel('BINARY')
+        for d in range(self.num_demands):
+            vars_d = self.labels[self.demand_ptr[d]:self.demand_ptr[d + 1]]
+            bqm.offset += self.alpha
+            for v in vars_d:
+                bqm.add_variable(v, -self.alpha)
+            for i in range(len(vars_d)):
+                for j in range(i + 1, len(vars_d)):
+                    bqm.add_interaction(vars_d[i], vars_d[j], 2 * self.alpha)
+
+        order = np.argsort(self.var_edges, kind="stable")
+        edge_of = self.var_edges[order]
+        var_of = self._entry_var[order]
+        bounds = np.searchsorted(edge_of, np.arange(self.num_edges + 1))
+        for e in range(self.num_edges):
+            cap = self.edge_cap[e]
+            on_e = var_of[bounds[e]:bounds[e + 1]]
+            bqm.offset += self.beta * cap**2
+            for a, v in enumerate(on_e):
+                c = self.var_coef[v]
+                bqm.add_variable(self.labels[v], self.beta * c**2 - 2 * self.beta * cap * c)
+                for v2 in on_e[a + 1:]:
+                    bqm.add_interaction(self.labels[v], self.labels[v2], 2 * self.beta * c * self.var_coef[v2])
+        return bqm
+
+
+@instrumentation.timed("qubo_build")
+def build_factorized_qubo(G, demands, candidate_lists, alpha=1.0, beta=1.0):
+    """
+    Factorized counterpart of qubo_formulation.build_qubo (same scaling, same energy).
+    Returns: FactorizedQubo
+    """
+    alpha_scaled, beta_scaled = scaled_penalties(G, demands, alpha, beta)
+
+    labels, var_coef, demand_ptr = [], [], [0]
+    var_id = {}
+    for d, (src, dst, dem) in enumerate(demands):
+        for i in range(len(candidate_lists[d])):
+            var_id[f"x_{d}_{i}"] = len(labels)
+            labels.append(f"x_{d}_{i}")
+            var_coef.append(dem)
+        demand_ptr.append(len(labels))
+
+    edge_to_vars = edge_variable_map(G, demands, candidate_lists)
+    edge_cap = []
+    per_var = [[] for _ in labels]
+    for e in G.edges:
+        load_expr = edge_to_vars.get(e)
+        if not load_expr:
+            continue
+        for _, v in load_expr:
+            per_var[var_id[v]].append(len(edge_cap))
+        edge_cap.append(G[e[0]][e[1]].get("capacity", 1))
+
+    var_ptr = np.zeros(len(labels) + 1, dtype=np.int64)
+    var_ptr[1:] = np.cumsum([len(es) for es in per_var])
+    var_edges = [e for es in per_var for e in es]
+    return FactorizedQubo(labels, demand_ptr, var_coef, var_ptr, var_edges, edge_cap, alpha_scaled, beta_scaled)
+
+
+@instrumentation.timed("solve")
+def solve_factorized(problem, num_reads=10, sweeps=100, temp_start=None, temp_end=None,
+                     swap_prob=0.8, seed=None, return_sampleset=False):
+    """
+    Simulated annealing directly on a FactorizedQubo.
+    Each move is either a single-variable flip or a swap inside one demand (one path off,
+    another on); both are priced from the demand sum and the per-edge loads in O(path length).
+    Every read starts from a random one-hot assignment. The default schedule runs from the
+    largest initial flip delta down to 1e-3 of it.
+    Returns (sample_dict, energy) like solve_sa, plus the SampleSet with return_sampleset=True.
+    """
+    rnd = random.Random(seed)
+    P = problem
+    alpha, beta = P.alpha, P.beta
+    coef = P.var_coef.tolist()
+    vdem = P.var_demand.tolist()
+    vptr = P.var_ptr.tolist()
+    vedges = P.var_edges.tolist()
+    cap = P.edge_cap.tolist()
+    dptr = P.demand_ptr.tolist()
+    n_vars, n_dem = P.num_variables, P.num_demands
+    moves_per_sweep = max(1, n_dem)
+
+    def flip_delta(v, x, s, L):
+        delta = 1 - 2 * x[v]
+        c = coef[v]
+        dE = alpha * (1 - 2 * delta * (1 - s[vdem[v]]))
+        for e in vedges[vptr[v]:vptr[v + 1]]:
+            dE += beta * (c * c + 2 * c * delta * (L[e] - cap[e]))
+        return dE
+
+    def apply_flip(v, x, s, L):
+        delta = 1 - 2 * x[v]
+        x[v] += delta
+        s[vdem[v]] += delta
+        c = coef[v] * delta
+        for e in vedges[vptr[v]:vptr[v + 1]]:
+            L[e] += c
+
+    rows = np.zeros((num_reads, n_vars), dtype=np.int8)
+    for r in range(num_reads):
+        x = [0] * n_vars
+        s = [0] * n_dem
+        L = [0.0] * P.num_edges
+        for d in range(n_dem):
+            if dptr[d + 1] > dptr[d]:
+                apply_flip(rnd.randrange(dptr[d], dptr[d + 1]), x, s, L)
+
+        t0 = temp_start
+        if t0 is None:
+            t0 = max((abs(flip_delta(v, x, s, L)) for v in range(n_vars)), default=1.0) or 1.0
+        t1 = temp_end if temp_end is not None else t0 * 1e-3
+        cooling = (t1 / t0) ** (1.0 / max(1, sweeps - 1))
+        temp = t0
+
+        for _ in range(sweeps):
+            for _ in range(moves_per_sweep):
+                d = rnd.randrange(n_dem)
+                lo, hi = dptr[d], dptr[d + 1]
+                if hi - lo == 0:
+                    continue
+                on = [v for v in range(lo, hi) if x[v]]
+                if len(on) == 1 and hi - lo > 1 and rnd.random() < swap_prob:
+                    a = on[0]
+                    b = rnd.randrange(lo, hi - 1)
+                    if b >= a:
+                        b += 1
+                    dE = flip_delta(a, x, s, L)
+                    apply_flip(a, x, s, L)
+                    dE += flip_delta(b, x, s, L)
+                    if dE <= 0 or rnd.random() < math.exp(-dE / temp):
+                        apply_flip(b, x, s, L)
+                    else:
+                        apply_flip(a, x, s, L)
+                else:
+                    v = rnd.randrange(lo, hi)
+                    dE = flip_delta(v, x, s, L)
+                    if dE <= 0 or rnd.random() < math.exp(-dE / temp):
+                        apply_flip(v, x, s, L)
+            temp *= cooling
+        rows[r] = x
+
+    energies = P.energies(rows)
+    sampleset = dimod.SampleSet.from_samples((rows, P.labels), 'BINARY', energy=energies)
+    best = sampleset.first
+    if return_sampleset:
+        return best.sample, best.energy, sampleset
+    return best.sample, best.energy
@@ -4,7 +4,10 @@ from collections import Counter, defaultdict
 
 import networkx as nx
 
+from src import instrumentation
 
+
+@instrumentation.timed("candidate_generation")
 def k_shortest_candidates(G, demand, k=6, weight='time', cutoff=None):
     """
     For each demand (s,t) produce up to k candidate simple paths (short-to-long).
@@ -56,6 +59,7 @@ def objective_cost(G, candidate_lists, state, congestion_penalty_coef=5.0, capac
     Compute total cost: travel time + congestion penalty.
     congestion penalty for each edge = coef * max(0, load - capacity)^power
     """
+    instrumentation.count("objective_evaluations")
     # travel time
     travel_cost = 0.0
     for i, p_idx in enumerate(state):
@@ -94,6 +98,7 @@ def sa_neighbor(state, candidate_lists):
 
 # --- QUBO construction (optional) ---
 
+@instrumentation.timed("qubo_build")
 def build_qubo(G, candidate_lists, penalty_constraint=50.0, congestion_penalty_coef=5.0, capacity_key='capacity', time_key='time', power=2):
     """
     Build a QUBO matrix (dict-of-dicts or dict with tuple keys) for binary variables x_{i,p}.
@@ -162,5 +167,6 @@ def build_qubo(G, candidate_lists, penalty_constraint=50.0, congestion_penalty_c
 
     # NOTE: sign bookkeeping for constraint expansion can be delicate depending on how you consume Q (Ising vs QUBO conventions).
     # The Q produced above is a basic starting QUBO; before sending to a solver, test small instances and adjust penalty_constraint scale.
+    instrumentation.gauge("qubo_nnz", len(Q))
 
     return Q, var_idx
\ No newline at end of file
@@ -0,0 +1,174 @@
+import csv
+import time
+
+import numpy as np
+
+from src import instrumentation
+from src.annealing import optimality_gap
+from src.lower_bound import lp_lower_bound
+from src.path_index import build_path_index, gather_ranges
+from src.shared_instance import share_path_index, shared_pool, worker_shared
+
+
+def population_loads(index, population):
+    """(individuals x edges) load matrix of a (individuals x demands) population, in one bincount."""
+    population = np.atleast_2d(population)
+    n = len(population)
+    paths = index.global_paths(population).ravel()
+    entries = gather_ranges(index.path_ptr, paths)
+    owner = np.repeat(np.arange(paths.size) // index.num_demands, index.path_len[paths])
+    flat = np.bincount(owner * index.num_edges + index.path_edges[entries], minlength=n * index.num_edges)
+    return flat.reshape(n, index.num_edges)
+
+
+def population_costs(index, population, congestion_penalty_coef=10.0, power=2):
+    """objective_cost of every individual, evaluated as matrix operations over edge loads."""
+    population = np.atleast_2d(population)
+    travel = index.path_time[index.global_paths(population)].sum(axis=1)
+    excess = np.maximum(0.0, population_loads(index, population) - index.capacity)
+    return travel + congestion_penalty_coef * np.sum(excess ** power, axis=1)
+
+
+def _worker_costs(population, congestion_penalty_coef, power):
+    return population_costs(worker_shared().index, population, congestion_penalty_coef, power)
+
+
+def _path_congestion(index, population, loads):
+    """(individuals x demands): overload summed over the edges of each chosen path, in its own parent."""
+    over = np.maximum(0.0, loads - index.capacity)
+    paths = index.global_paths(population).ravel()
+    entries = gather_ranges(index.path_ptr, paths)
+    gene = np.repeat(np.arange(paths.size), index.path_len[paths])
+    owner = gene // index.num_demands
+    scores = np.bincount(gene, weights=over[owner, index.path_edges[entries]], minlength=paths.size)
+    return scores.reshape(population.shape)
+
+
+def _random_population(index, n, rng):
+    return (rng.random((n, index.num_demands)) * index.num_choices).astype(np.int64)
+
+
+def _mutate(index, population, rate, rng):
+    """sa_neighbor-style mutation: each gene moves to a different candidate with probability `rate`."""
+    k = index.num_choices
+    mask = (rng.random(population.shape) < rate) & (k > 1)
+    shift = 1 + (rng.random(population.shape) * np.maximum(k - 1, 1)).astype(np.int64)
+    return np.where(mask, (population + shift) % k, population)
+
+
+@instrumentation.timed("solve")
+def genetic_algorithm(
+    G,
+    candidate_lists,
+    population_size=64,
+    generations=200,
+    elite=4,
+    crossover="edge",
+    mutation_rate=None,
+    tournament_size=3,
+    congestion_penalty_coef=10.0,
+    power=2,
+    time_budget=None,
+    workers=1,
+    initial_states=None,
+    log_csv=None,
+    seed=123,
+    lower_bound=None,
+    target_gap=None,
+    on_improve=None,
+):
+    """
+    Population-based search over path-choice states.
+    - crossover: 'uniform' (each demand from either parent) or 'edge' (each demand takes the parent
+      path with less overload on its edges, in that parent's loads)
+    - mutation_rate: per-demand probability of switching to another candidate (default 1/demands)
+    - elite: best individuals copied unchanged into the next generation
+    - time_budget: stop after this many seconds (checked once per generation)
+    - workers > 1 evaluates population chunks in a process pool attached to a shared-memory index
+    - initial_states: states (e.g. baseline or SA answers) seeded into the first generation
+    - target_gap: stop after the first generation whose best cost is within target_gap (relative)
+      of lower_bound (computed with lower_bound.lp_lower_bound if not given)
+    - on_improve(best_state): called after every generation that improved the best state
+    Fitness of the whole population is evaluated at once from a (population x edges) load matrix.
+    Raises ValueError if a demand has no candidate paths.
+    Returns: (best_state, best_cost, final_edge_loads)
+    """
+    rng = np.random.default_rng(seed)
+    index = build_path_index(G, candidate_lists)
+    stranded = np.flatnonzero(index.num_choices == 0).tolist()
+    if stranded:
+        raise ValueError(f"demands {stranded} have no candidate paths")
+    if mutation_rate is None:
+        mutation_rate = 1.0 / max(1, index.num_demands)
+    elite = min(elite, population_size)
+    if target_gap is not None and lower_bound is None:
+        lower_bound, _ = lp_lower_bound(G, candidate_lists, congestion_penalty_coef, power, index=index)
+
+    pool = shared = None
+    if workers and workers > 1:
+        shared = share_path_index(index)
+        pool = shared_pool(shared, workers)
+
+    def evaluate(population):
+        instrumentation.count("ga_individuals_evaluated", len(population))
+        if pool is None:
+            return population_costs(index, population, congestion_penalty_coef, power)
+        chunks = np.array_split(population, workers)
+        parts = pool.map(_worker_costs, chunks, [congestion_penalty_coef] * len(chunks), [power] * len(chunks))
+        return np.concatenate(list(parts))
+
+    population = _random_population(index, population_size, rng)
+    if initial_states is not None:
+        seeds = np.asarray(initial_states, dtype=np.int64)[:population_size]
+        population[:len(seeds)] = seeds
+
+    if log_csv is not None:
+        with open(log_csv, "w", newline="") as f:
+            csv.writer(f).writerow(["generation", "best_cost", "mean_cost"])
+
+    t0 = time.perf_counter()
+    try:
+        costs = evaluate(population)
+        best = int(np.argmin(costs))
+        best_state, best_cost = population[best].copy(), float(costs[best])
+
+        for gen in range(generations):
+            if time_budget is not None and time.perf_counter() - t0 >= time_budget:
+                break
+            n_children = population_size - elite
+            # tournament selection of two parents per child
+            contestants = rng.integers(0, population_size, size=(2, n_children, tournament_size))
+            winners = np.take_along_axis(contestants, np.argmin(costs[contestants], axis=2)[..., None], axis=2)[..., 0]
+            pa, pb = population[winners[0]], population[winners[1]]
+
+            if crossover == "edge":
+                loads = population_loads(index, population)
+                score_a = _path_congestion(index, pa, loads[winners[0]])
+                score_b = _path_congestion(index, pb, loads[winners[1]])
+                tie = rng.random(pa.shape) < 0.5
+                take_a = (score_a < score_b) | ((score_a == score_b) & tie)
+            else:
+                take_a = rng.random(pa.shape) < 0.5
+            children = _mutate(index, np.where(take_a, pa, pb), mutation_rate, rng)
+
+            keep = np.argsort(costs, kind="stable")[:elite]
+            population = np.concatenate([population[keep], children])
+            costs = np.concatenate([costs[keep], evaluate(children)])
+
+            best = int(np.argmin(costs))
+            if costs[best] < best_cost:
+                best_state, best_cost = population[best].copy(), float(costs[best])
+                if on_improve is not None:
+                    on_improve([int(s) for s in best_state])
+            if log_csv is not None:
+                with open(log_csv, "a", newline="") as f:
+                    csv.writer(f).writerow([gen, f"{best_cost:.6f}", f"{float(np.mean(costs)):.6f}"])
+            if target_gap is not None and optimality_gap(best_cost, lower_bound) <= target_gap:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+            shared.close()
+
+    final_loads = index.loads_dict(index.edge_loads(best_state))
+    return [int(s) for s in best_state], best_cost, final_loads
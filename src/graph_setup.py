@@ -1,7 +1,10 @@
 import random
+from itertools import islice
 
 import networkx as nx
 
+from src import instrumentation
+
 
 def build_toy_graph():
     """Builds a simple 4-node traffic graph with travel times and capacities."""
@@ -33,6 +36,7 @@ def generate_demands(G, num_demands=10, demand_size=25, seed=None):
     return demands
 
 
+@instrumentation.timed("candidate_generation")
 def enumerate_candidate_paths(G, demands, k=3):
     """
     For each demand (src, dst, demand_size), compute k candidate paths.
@@ -41,14 +45,15 @@ def enumerate_candidate_paths(G, demands, k=3):
     all_candidates = []
     for (s, t, d) in demands:
         try:
-            # Get up to k shortest simple paths
-            paths = list(nx.shortest_simple_paths(G, s, t))[:k]
+            # Get up to k shortest simple paths (the generator is lazy; don't exhaust it)
+            paths = list(islice(nx.shortest_simple_paths(G, s, t), k))
         except nx.NetworkXNoPath:
             paths = []
         all_candidates.append(paths)
     return all_candidates
 
 
+@instrumentation.timed("graph_build")
 def build_large_graph(grid_size=6, seed=42):
     """
     Build a larger grid network (grid_size x grid_size).
@@ -56,6 +61,7 @@ def build_large_graph(grid_size=6, seed=42):
     """
     random.seed(seed)
     G = nx.grid_2d_graph(grid_size, grid_size)  # lattice network
+    nx.set_node_attributes(G, {n: n for n in G.nodes}, "pos")  # grid coordinates for plotting
     G = nx.convert_node_labels_to_integers(G)   # relabel 0..N-1
     
     for (u, v) in G.edges():
@@ -0,0 +1,123 @@
+"""
+Streaming OD demand ingestion from trip files.
+
+Trip records (one row per trip) are read in chunks, filtered, sampled and mapped to graph node ids,
+and each chunk is immediately reduced to OD counts, so memory is bounded by the chunk size plus the
+number of distinct OD pairs rather than by the number of trips.
+
+    counts, stats = ingest_od_counts("trips.csv", origin_col="pu_zone", dest_col="do_zone",
+                                     time_col="pickup_time", start="2024-05-01", end="2024-05-02",
+                                     node_map=zone_to_node, sample=0.1)
+    demands = to_demands(counts)           # [(s, t, demand_size), ...] per trip
+    commodities = to_commodities(counts)   # [(s, t, count), ...] for aggregation.split_annealing
+
+CSV is read with pandas; Parquet needs pyarrow.
+"""
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src import instrumentation
+
+
+def iter_trip_chunks(path, columns, chunksize=1_000_000):
+    """
+    Yield DataFrames of at most chunksize rows holding `columns` of a .csv(.gz) file, a .parquet file
+    or a directory of Parquet files (read as one pyarrow dataset, files in path order).
+    """
+    if str(path).endswith(".parquet") or os.path.isdir(path):
+        try:
+            import pyarrow.dataset as ds
+        except ImportError as e:
+            raise ImportError("reading Parquet trip files needs pyarrow (pip install pyarrow)") from e
+        for batch in ds.dataset(path, format="parquet").to_batches(columns=list(columns), batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=list(columns), chunksize=chunksize)
+
+
+def _as_time(values, like):
+    if pd.api.types.is_numeric_dtype(values) and not isinstance(like, (str, pd.Timestamp)):
+        return values
+    return pd.to_datetime(values)
+
+
+def _map_nodes(values, node_map):
+    return values if node_map is None else values.map(node_map)
+
+
+@instrumentation.timed("ingestion")
+def ingest_od_counts(path, origin_col="origin", dest_col="destination", time_col=None, start=None, end=None,
+                     node_map=None, nodes=None, sample=None, seed=0, chunksize=1_000_000,
+                     drop_self_loops=True):
+    """
+    Stream a trip file into OD counts.
+    - time_col, start, end: keep trips with start <= time < end (either bound optional); datetime
+      strings are parsed, numeric columns are compared as numbers
+    - node_map: dict or callable from file identifiers to graph nodes; trips whose origin or
+      destination has no mapping (None/NaN) are dropped
+    - nodes: optional collection of valid graph nodes (e.g. G.nodes); trips outside it are dropped
+    - sample: keep each trip independently with this probability (reproducible for a given seed)
+    Returns: (Counter {(s, t): trips}, stats dict with rows read / filtered / unmapped / sampled out / kept).
+    """
+    columns = [origin_col, dest_col] + ([time_col] if time_col is not None else [])
+    rng = np.random.default_rng(seed)
+    valid = None if nodes is None else set(nodes)
+    counts = Counter()
+    stats = Counter()
+
+    for chunk in iter_trip_chunks(path, columns, chunksize):
+        stats["rows_read"] += len(chunk)
+        if time_col is not None and (start is not None or end is not None):
+            t = _as_time(chunk[time_col], start if start is not None else end)
+            keep = np.ones(len(chunk), dtype=bool)
+            if start is not None:
+                keep &= (t >= (pd.Timestamp(start) if isinstance(start, str) else start)).to_numpy()
+            if end is not None:
+                keep &= (t < (pd.Timestamp(end) if isinstance(end, str) else end)).to_numpy()
+            stats["rows_filtered"] += int((~keep).sum())
+            chunk = chunk[keep]
+        if sample is not None:
+            keep = rng.random(len(chunk)) < sample
+            stats["rows_sampled_out"] += int((~keep).sum())
+            chunk = chunk[keep]
+
+        od = pd.DataFrame({"s": _map_nodes(chunk[origin_col], node_map),
+                           "t": _map_nodes(chunk[dest_col], node_map)})
+        mapped = od["s"].notna() & od["t"].notna()
+        if valid is not None:
+            mapped &= od["s"].isin(valid) & od["t"].isin(valid)
+        stats["rows_unmapped"] += int((~mapped).sum())
+        od = od[mapped]
+        if drop_self_loops:
+            loops = od["s"] == od["t"]
+            stats["rows_self_loops"] += int(loops.sum())
+            od = od[~loops]
+
+        for col in ("s", "t"):
+            # unmapped ids turn integer node columns into floats; restore them once those rows are gone
+            if pd.api.types.is_float_dtype(od[col]) and np.all(od[col] == np.floor(od[col])):
+                od[col] = od[col].astype(np.int64)
+        sizes = od.groupby(["s", "t"], sort=False).size()
+        pairs = zip(sizes.index.get_level_values(0).tolist(), sizes.index.get_level_values(1).tolist())
+        for od_pair, n in zip(pairs, sizes.tolist()):
+            counts[od_pair] += n
+        stats["rows_kept"] += len(od)
+
+    instrumentation.count("ingested_trips", stats["rows_kept"])
+    instrumentation.gauge("ingested_od_pairs", len(counts))
+    return counts, dict(stats)
+
+
+def to_commodities(counts, min_count=1, top=None):
+    """(s, t, count) tuples, most frequent first; drop pairs below min_count and keep the `top` largest."""
+    pairs = [(s, t, n) for (s, t), n in counts.most_common() if n >= min_count]
+    return pairs if top is None else pairs[:top]
+
+
+def to_demands(counts, demand_size=25, min_count=1, top=None):
+    """One (s, t, demand_size) tuple per trip, the shape generate_demands and the solvers use."""
+    return [(s, t, demand_size) for s, t, n in to_commodities(counts, min_count, top) for _ in range(n)]
@@ -0,0 +1,161 @@
+"""
+Stage timing spans, counters and gauges for the solve pipeline.
+
+Disabled by default: every hook starts with a single flag check, so instrumented functions
+cost one extra Python call when metrics are off.
+
+    from src import instrumentation
+    instrumentation.enable()
+    ...run the pipeline...
+    instrumentation.export_json("metrics.json")
+    instrumentation.export_prometheus("metrics.prom")
+"""
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_enabled = False
+_spans = {}     # (stage, name) -> [calls, total_seconds, max_seconds]
+_counters = {}  # name -> float
+_gauges = {}    # name -> float
+
+PROMETHEUS_PREFIX = "qat"
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Drop everything recorded so far."""
+    _spans.clear()
+    _counters.clear()
+    _gauges.clear()
+
+
+def _record_span(stage, name, seconds):
+    entry = _spans.get((stage, name))
+    if entry is None:
+        _spans[(stage, name)] = [1, seconds, seconds]
+    else:
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+    _update_peak_memory()
+
+
+def _update_peak_memory():
+    if resource is None:
+        return
+    # ru_maxrss is KiB on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    gauge_max("process_peak_rss_bytes", rss)
+
+
+@contextmanager
+def span(stage, name=""):
+    """Time a block under (stage, name)."""
+    if not _enabled:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_span(stage, name, time.perf_counter() - t0)
+
+
+def timed(stage, name=None):
+    """Decorator recording every call of the function as a span of `stage`."""
+    def decorator(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record_span(stage, label, time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Add value to a monotonically increasing counter."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def gauge(name, value):
+    """Set a gauge to its latest value."""
+    if _enabled:
+        _gauges[name] = value
+
+
+def gauge_max(name, value):
+    """Keep the largest value seen for a gauge (peaks, high-water marks)."""
+    if _enabled and value > _gauges.get(name, float("-inf")):
+        _gauges[name] = value
+
+
+def snapshot():
+    """All recorded metrics as plain dicts."""
+    spans = {}
+    for (stage, name), (calls, total, worst) in sorted(_spans.items()):
+        spans.setdefault(stage, {})[name] = {"calls": calls, "total_s": total, "max_s": worst}
+    return {"spans": spans, "counters": dict(_counters), "gauges": dict(_gauges)}
+
+
+def export_json(path=None):
+    """Metrics as a JSON string; also written to path when given."""
+    text = json.dumps(snapshot(), indent=2, sort_keys=True)
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
+
+
+def _prom_name(name):
+    return f"{PROMETHEUS_PREFIX}_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def export_prometheus(path=None):
+    """Metrics in the Prometheus text exposition format; also written to path when given."""
+    lines = []
+    if _spans:
+        for metric, kind, pos in (("stage_seconds_total", "counter", 1),
+                                  ("stage_calls_total", "counter", 0),
+                                  ("stage_max_seconds", "gauge", 2)):
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{metric} {kind}")
+            for (stage, name), entry in sorted(_spans.items()):
+                lines.append(f'{PROMETHEUS_PREFIX}_{metric}{{stage="{stage}",fn="{name}"}} {entry[pos]}')
+    for name, value in sorted(_counters.items()):
+        lines.append(f"# TYPE {_prom_name(name)}_total counter")
+        lines.append(f"{_prom_name(name)}_total {value}")
+    for name, value in sorted(_gauges.items()):
+        lines.append(f"# TYPE {_prom_name(name)} gauge")
+        lines.append(f"{_prom_name(name)} {value}")
+    text = "\n".join(lines) + "\n"
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
@@ -1,3 +1,8 @@
+import glob
+import json
+import os
+import re
+
 import matplotlib.pyplot as plt
 import pandas as pd
 
@@ -38,5 +43,159 @@ def analyze_log(log_csv="sa_log.csv", out_png="sa_plot.png"):
     print(f"[log_analysis] Plot saved to {out_png}")
 
 
+# ---------------------------------------------------------------------------
+# Batch analytics over many run logs
+# ---------------------------------------------------------------------------
+# Run logs are ingested once into a Parquet table (one row per episode, tagged with the run's
+# parameters); the queries and plots below work on that table instead of re-reading CSVs.
+
+LOG_COLUMNS = ["episode", "temp", "current_cost", "best_cost", "acceptance_rate", "violations"]
+
+# filename token prefix -> parameter column (grid4, d10, dsize25, pen10.0, ep60, m20, ...)
+PARAM_ALIASES = {
+    "grid": "grid_size",
+    "d": "num_demands",
+    "dsize": "demand_size",
+    "pen": "penalty",
+    "ep": "episodes",
+    "m": "moves_per_episode",
+    "seed": "seed",
+}
+
+
+def parse_run_params(path):
+    """
+    Run parameters of a log file: number-suffixed tokens of the file name
+    (demo_sa_grid4_d10.csv -> grid_size=4, num_demands=10, family='demo_sa'), overridden by a
+    <log>.json sidecar if one exists.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    params, family = {}, []
+    for token in stem.split("_"):
+        m = re.fullmatch(r"([A-Za-z]+)(-?\d+(?:\.\d+)?)", token)
+        if m is None:
+            family.append(token)
+            continue
+        key, value = m.groups()
+        params[PARAM_ALIASES.get(key, key)] = float(value) if "." in value else int(value)
+    params["family"] = "_".join(family)
+    sidecar = os.path.splitext(path)[0] + ".json"
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            params.update(json.load(f))
+    return params
+
+
+def ingest_logs(log_dir, store=None, pattern="*.csv"):
+    """
+    Ingest every run log under log_dir into a Parquet store (default <log_dir>/runs.parquet).
+    Files already in the store with the same modification time are not read again.
+    Returns: the full table (run, params..., episode metrics).
+    """
+    if store is None:
+        store = os.path.join(log_dir, "runs.parquet")
+    old = pd.read_parquet(store) if os.path.exists(store) else None
+    seen = {} if old is None else dict(old.groupby("run", sort=False)["mtime"].first())
+
+    frames, keep = [], set()
+    for path in sorted(glob.glob(os.path.join(log_dir, "**", pattern), recursive=True)):
+        run = os.path.relpath(path, log_dir)
+        mtime = os.path.getmtime(path)
+        keep.add(run)
+        if seen.get(run) == mtime:
+            continue
+        df = pd.read_csv(path)
+        if not set(LOG_COLUMNS[:4]) <= set(df.columns):
+            continue  # not an SA run log (e.g. a sweep summary)
+        for col in LOG_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce") if col in df else float("nan")
+        df = df[LOG_COLUMNS]
+        for key, value in parse_run_params(path).items():
+            df[key] = value
+        df["run"] = run
+        df["mtime"] = mtime
+        frames.append(df)
+
+    dirty = bool(frames) or set(seen) != keep
+    if old is not None:
+        changed = {f["run"].iloc[0] for f in frames}
+        frames.insert(0, old[old["run"].isin(keep - changed)])
+    if not frames:
+        return pd.DataFrame(columns=LOG_COLUMNS + ["run", "mtime"])
+    table = pd.concat(frames, ignore_index=True)
+    if dirty:
+        os.makedirs(os.path.dirname(os.path.abspath(store)), exist_ok=True)
+        table.to_parquet(store, index=False)
+    return table
+
+
+def load_store(store, columns=None, filters=None):
+    """Read (only the needed columns / row groups of) a Parquet run store."""
+    return pd.read_parquet(store, columns=columns, filters=filters)
+
+
+def _groups(by):
+    return [] if by is None else ([by] if isinstance(by, str) else list(by))
+
+
+def convergence_curves(table, by=None, metric="best_cost"):
+    """Per-episode median / min / max / quartiles of metric across the runs of each configuration."""
+    grouped = table.groupby(_groups(by) + ["episode"])[metric]
+    curves = grouped.agg(["median", "min", "max", "count"])
+    curves["q25"] = grouped.quantile(0.25)
+    curves["q75"] = grouped.quantile(0.75)
+    return curves.reset_index()
+
+
+def time_to_target(table, target=None, rel_gap=None, by=None, metric="best_cost"):
+    """
+    First episode at which each run's metric reaches the target: an absolute value, or within
+    rel_gap of the best final value of its configuration (`by`). NaN for runs that never get there.
+    Returns one row per run with the configuration columns, target and episode.
+    """
+    keys = _groups(by)
+    runs = table.groupby(keys + ["run"], sort=False)
+    if target is not None:
+        goal = pd.Series(target, index=runs.size().index)
+    else:
+        final = runs[metric].min()
+        best = final.groupby(level=keys).transform("min") if keys else pd.Series(final.min(), index=final.index)
+        goal = best + rel_gap * best.abs()
+    reached = table.join(goal.rename("target"), on=keys + ["run"])
+    reached = reached[reached[metric] <= reached["target"]]
+    first = reached.groupby(keys + ["run"], sort=False)["episode"].min()
+    return pd.DataFrame({"target": goal, "episode": first.reindex(goal.index)}).reset_index()
+
+
+def acceptance_profile(table, by=None, bins=10):
+    """Mean acceptance rate per fraction of the run (bins of episode / last episode) and configuration."""
+    progress = table["episode"] / table.groupby("run")["episode"].transform("max").clip(lower=1)
+    stage = (progress * bins).clip(upper=bins - 1).astype(int)
+    profile = table.assign(stage=stage).groupby(_groups(by) + ["stage"])["acceptance_rate"].mean()
+    return profile.unstack("stage") if by is not None else profile
+
+
+def plot_runs(table, by, metric="best_cost", out_png="runs_comparison.png", log_y=False):
+    """Median convergence curve with interquartile band per configuration, from the store only."""
+    curves = convergence_curves(table, by, metric)
+    keys = _groups(by)
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for name, curve in curves.groupby(keys):
+        label = ", ".join(f"{k}={v}" for k, v in zip(keys, name if isinstance(name, tuple) else (name,)))
+        line, = ax.plot(curve["episode"], curve["median"], label=f"{label} (n={int(curve['count'].max())})")
+        ax.fill_between(curve["episode"], curve["q25"], curve["q75"], color=line.get_color(), alpha=0.2)
+    ax.set_xlabel("Episode")
+    ax.set_ylabel(metric)
+    if log_y:
+        ax.set_yscale("log")
+    ax.legend(fontsize=8)
+    ax.set_title(f"{metric} by {', '.join(keys)}")
+    fig.tight_layout()
+    fig.savefig(out_png)
+    plt.close(fig)
+    print(f"[log_analysis] Plot saved to {out_png}")
+    return out_png
+
+
 if __name__ == "__main__":
-    analyze_log()
\ No newline at end of file
+    analyze_log()
@@ -0,0 +1,71 @@
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+
+from src import instrumentation
+from src.path_index import build_path_index
+
+
+def shortest_time_bound(index):
+    """Trivial bound: every demand on its fastest candidate with no congestion penalty."""
+    return float(sum(index.path_time[lo:hi].min() for lo, hi in zip(index.demand_ptr[:-1], index.demand_ptr[1:])
+                     if hi > lo))
+
+
+@instrumentation.timed("lower_bound")
+def lp_lower_bound(G, candidate_lists, congestion_penalty_coef=10.0, power=2, index=None, time_limit=None):
+    """
+    Lower bound on min objective_cost from the LP relaxation of the path-choice problem.
+    Variables: y_{i,p} in [0, 1] with sum_p y_{i,p} = 1, and z_e >= 0 per edge.
+    z_e lies above the piecewise-linear interpolation of max(0, load - cap)^power through integer
+    loads; it is convex and exact at integer loads, so the LP optimum never exceeds the integer one.
+    Edges that cannot be overloaded (fewer demands can reach them than their capacity) get no z_e.
+    Solved with HiGHS; if it does not finish (e.g. time_limit) the shortest-time bound is returned.
+    Returns: (bound, y) with y the fractional path weights in global path order (None on fallback).
+    """
+    if index is None:
+        index = build_path_index(G, candidate_lists)
+    P = index.num_paths
+
+    # max possible load per edge = number of demands with at least one candidate through it
+    entry_path = np.repeat(np.arange(P), index.path_len)
+    entry_edge = index.path_edges
+    pairs = np.unique(index.path_demand[entry_path] * index.num_edges + entry_edge)
+    max_load = np.bincount(pairs % index.num_edges, minlength=index.num_edges)
+    cap = index.capacity
+    relevant = np.flatnonzero(np.isfinite(cap) & (max_load > cap))
+
+    order = np.argsort(entry_edge, kind="stable")
+    sorted_edges = entry_edge[order]
+    sorted_paths = entry_path[order]
+    bounds_at = np.searchsorted(sorted_edges, np.arange(index.num_edges + 1))
+
+    rows, cols, vals, b_ub = [], [], [], []
+    r = 0
+    for m, e in enumerate(relevant):
+        paths_on_e = sorted_paths[bounds_at[e]:bounds_at[e + 1]]
+        for L in range(max(0, int(np.floor(cap[e]))), int(max_load[e])):
+            f0 = max(0.0, L - cap[e]) ** power
+            slope = max(0.0, L + 1 - cap[e]) ** power - f0
+            # slope * load_e - z_e <= slope * L - f(L)
+            rows.extend([r] * (len(paths_on_e) + 1))
+            cols.extend(paths_on_e.tolist())
+            cols.append(P + m)
+            vals.extend([slope] * len(paths_on_e))
+            vals.append(-1.0)
+            b_ub.append(slope * L - f0)
+            r += 1
+
+    n_vars = P + len(relevant)
+    c = np.concatenate([index.path_time, np.full(len(relevant), float(congestion_penalty_coef))])
+    A_eq = sparse.csr_matrix((np.ones(P), (index.path_demand, np.arange(P))), shape=(index.num_demands, n_vars))
+    A_ub = sparse.csr_matrix((vals, (rows, cols)), shape=(r, n_vars)) if r else None
+    bounds = [(0, 1)] * P + [(0, None)] * len(relevant)
+    options = {} if time_limit is None else {"time_limit": time_limit}
+
+    res = linprog(c, A_ub=A_ub, b_ub=b_ub if r else None, A_eq=A_eq, b_eq=np.ones(index.num_demands),
+                  bounds=bounds, method="highs", options=options)
+    instrumentation.gauge("lower_bound_lp_rows", r + index.num_demands)
+    if res.status != 0:
+        return shortest_time_bound(index), None
+    return float(res.fun), res.x[:P]
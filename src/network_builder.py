@@ -1,8 +1,11 @@
 import networkx as nx
 
+from src import instrumentation
+
 from .network_config import ROAD_NETWORK
 
 
+@instrumentation.timed("graph_build")
 def build_network():
     """Builds and returns a NetworkX graph from ROAD_NETWORK."""
     G = nx.Graph()
@@ -1,11 +1,9 @@
 import random
-from itertools import product
-
-import pandas as pd
 
 from src.annealing import simulated_annealing
 from src.formulation import k_shortest_candidates
 from src.network_builder import build_network
+from src.sweep import expand_grid, run_sweep
 
 
 def build_random_demand(G, n=60, seed=11):
@@ -26,21 +24,30 @@ def final_violations(G, cands, state):
             v += load - cap
     return v
 
-if __name__ == "__main__":
+def build_instance(params):
     G = build_network()
     demand = build_random_demand(G, n=60, seed=11)
-    cands = k_shortest_candidates(G, demand, k=4)
+    return G, k_shortest_candidates(G, demand, k=4)
 
-    rows = []
-    for ep, mpe, pen in product([60, 120, 200], [len(cands)//4, len(cands)//2, len(cands)], [5.0, 10.0, 25.0]):
-        state, best_cost, _ = simulated_annealing(
-            G, cands, episodes=ep, temp_start=50, temp_end=0.5,
-            moves_per_episode=mpe, congestion_penalty_coef=pen,
-            log_csv=f"grid_ep{ep}_m{mpe}_pen{pen}.csv", seed=123
-        )
-        v = final_violations(G, cands, state)
-        rows.append({"episodes": ep, "moves_per_episode": mpe, "penalty": pen,
-                     "best_cost": best_cost, "violations": v})
-    df = pd.DataFrame(rows).sort_values(["violations", "best_cost"])
+def run_cell(instance, params):
+    G, cands = instance
+    ep, mpe, pen = params["episodes"], params["moves_per_episode"], params["penalty"]
+    state, best_cost, _ = simulated_annealing(
+        G, cands, episodes=ep, temp_start=50, temp_end=0.5,
+        moves_per_episode=mpe, congestion_penalty_coef=pen,
+        log_csv=f"grid_ep{ep}_m{mpe}_pen{pen}.csv", seed=123
+    )
+    return {"best_cost": best_cost, "violations": final_violations(G, cands, state)}
+
+if __name__ == "__main__":
+    instance = build_instance({})
+    n = len(instance[1])
+    cells = expand_grid({
+        "episodes": [60, 120, 200],
+        "moves_per_episode": [n//4, n//2, n],
+        "penalty": [5.0, 10.0, 25.0],
+    })
+    df = run_sweep(cells, lambda params: instance, run_cell, out_dir="results/sweeps/param_grid")
+    df = df.sort_values(["violations", "best_cost"])
     print(df)
     df.to_csv("param_grid_summary.csv", index=False)
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Partitioned solving for large networks.
+
+The network is cut into regions with balanced edge counts by recursive coordinate bisection over
+node coordinates (grid or geographic positions, else a computed layout). Demands whose candidate
+paths all stay inside one region are solved per region, in parallel processes; the regional
+problems share no edges, so they are independent. The remaining cross-region demands are solved on
+the whole network. The two sides then exchange loads for a few rounds: each side is re-solved,
+warm-started, against the capacity the other side leaves (a price exchange through the congestion
+penalty). A final global steepest-descent pass (polish) removes remaining single-demand
+improvements across region borders.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src import instrumentation
+from src.annealing import simulated_annealing
+from src.path_index import build_path_index, gather_ranges
+from src.polish import polish
+from src.rolling_horizon import residual_graph
+from src.visualize import graph_layout
+
+
+def _bisect(nodes, coords, weights, parts, first_region, out):
+    if parts == 1 or len(nodes) <= 1:
+        out[nodes] = first_region
+        return
+    left_parts = parts // 2
+    span = coords[nodes].max(axis=0) - coords[nodes].min(axis=0)
+    axis = int(np.argmax(span))
+    order = nodes[np.argsort(coords[nodes, axis], kind="stable")]
+    cum = np.cumsum(weights[order])
+    cut = int(np.searchsorted(cum, cum[-1] * left_parts / parts)) + 1
+    cut = min(max(cut, 1), len(order) - 1)
+    _bisect(order[:cut], coords, weights, left_parts, first_region, out)
+    _bisect(order[cut:], coords, weights, parts - left_parts, first_region + left_parts, out)
+
+
+def partition_graph(G, regions=4, cache_dir=None):
+    """
+    Region id per node (dict) from recursive coordinate bisection, weighting nodes by degree so
+    regions hold similar numbers of edges. Coordinates come from visualize.graph_layout.
+    """
+    coords = graph_layout(G, cache_dir)
+    weights = np.array([max(1, d) for _, d in G.degree()], dtype=float)
+    out = np.zeros(G.number_of_nodes(), dtype=np.int64)
+    _bisect(np.arange(G.number_of_nodes()), coords, weights, regions, 0, out)
+    return dict(zip(G.nodes, out.tolist()))
+
+
+def classify_demands(candidate_lists, region_of):
+    """Region of every demand whose candidates all stay inside one region, else -1 (cross-region)."""
+    labels = []
+    for P in candidate_lists:
+        found = {region_of[node] for path in P for node in path}
+        labels.append(found.pop() if len(found) == 1 else -1)
+    return labels
+
+
+def _solve(G, candidate_lists, initial_state, congestion_penalty_coef, seed, sa_kwargs):
+    state, _, _ = simulated_annealing(G, candidate_lists, congestion_penalty_coef=congestion_penalty_coef,
+                                      log_csv=os.devnull, seed=seed, initial_state=initial_state, verbose=False,
+                                      **sa_kwargs)
+    return state
+
+
+@instrumentation.timed("solve")
+def partitioned_solve(G, candidate_lists, regions=4, rounds=2, workers=None, congestion_penalty_coef=10.0,
+                      polish_iters=1000, seed=123, region_of=None, **sa_kwargs):
+    """
+    Solve by regions in parallel, coordinate with the cross-region demands for `rounds` load
+    exchanges, then polish globally.
+    - region_of: precomputed node -> region map (default partition_graph(G, regions))
+    - workers: processes for the regional solves (None = os.cpu_count(), 0 or 1 = serial)
+    - sa_kwargs: passed to every simulated_annealing call (episodes, temp_start, ...)
+    Returns: (best_state, best_cost, final_edge_loads, info) with info holding the region sizes,
+    intra / cross demand counts, the cost after each round and before polishing, and timings.
+    """
+    t0 = time.perf_counter()
+    if region_of is None:
+        region_of = partition_graph(G, regions)
+    labels = np.array(classify_demands(candidate_lists, region_of))
+    index = build_path_index(G, candidate_lists)
+    edges_only = build_path_index(G, [])
+    members = {r: np.flatnonzero(labels == r) for r in sorted(set(labels.tolist())) if r >= 0}
+    cross = np.flatnonzero(labels < 0)
+    region_nodes = {}
+    for node, r in region_of.items():
+        region_nodes.setdefault(r, []).append(node)
+
+    state = np.zeros(len(candidate_lists), dtype=np.int64)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=min(workers, max(1, len(members)))) if workers > 1 and members else None
+
+    def loads_of(ids):
+        paths = index.global_paths(state)[ids]
+        return np.bincount(index.path_edges[gather_ranges(index.path_ptr, paths)], minlength=index.num_edges)
+
+    round_costs = []
+    intra_ids = np.flatnonzero(labels >= 0)
+    try:
+        for rnd in range(rounds):
+            # regional solves against the capacity left by cross-region demands
+            R = residual_graph(G, edges_only, loads_of(cross))
+            jobs = {}
+            for r, ids in members.items():
+                sub = R.subgraph(region_nodes[r]).copy()
+                args = (sub, [candidate_lists[i] for i in ids], state[ids].tolist(), congestion_penalty_coef,
+                        seed + 1000 * rnd + r, sa_kwargs)
+                jobs[r] = pool.submit(_solve, *args) if pool is not None else _solve(*args)
+            for r, ids in members.items():
+                state[ids] = jobs[r].result() if pool is not None else jobs[r]
+
+            # cross-region demands on the whole network against the regional loads
+            if len(cross):
+                R = residual_graph(G, edges_only, loads_of(intra_ids))
+                state[cross] = _solve(R, [candidate_lists[i] for i in cross], state[cross].tolist(),
+                                      congestion_penalty_coef, seed + 1000 * rnd + 999, sa_kwargs)
+            round_costs.append(index.cost(state, congestion_penalty_coef))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    solve_s = time.perf_counter() - t0
+    best_state, best_cost, final_loads = polish(G, candidate_lists, state, congestion_penalty_coef,
+                                                max_iters=polish_iters)
+    info = {
+        "regions": len(region_nodes),
+        "region_edges": [G.subgraph(nodes).number_of_edges() for _, nodes in sorted(region_nodes.items())],
+        "intra_demands": int(len(intra_ids)),
+        "cross_demands": int(len(cross)),
+        "round_costs": round_costs,
+        "solve_s": solve_s,
+        "total_s": time.perf_counter() - t0,
+    }
+    return best_state, best_cost, final_loads, info
+
+
+def compare_with_monolithic(G, candidate_lists, regions=4, rounds=2, workers=None, congestion_penalty_coef=10.0,
+                            seed=123, **sa_kwargs):
+    """
+    Run partitioned_solve and one global simulated_annealing (+ polish) with the same settings.
+    Returns a dict with both costs and times and the relative gap of the partitioned cost.
+    """
+    state, cost, _, info = partitioned_solve(G, candidate_lists, regions, rounds, workers, congestion_penalty_coef,
+                                             seed=seed, **sa_kwargs)
+    t0 = time.perf_counter()
+    mono = _solve(G, candidate_lists, None, congestion_penalty_coef, seed, sa_kwargs)
+    _, mono_cost, _ = polish(G, candidate_lists, mono, congestion_penalty_coef)
+    mono_s = time.perf_counter() - t0
+    return {
+        "partitioned_cost": cost,
+        "monolithic_cost": mono_cost,
+        "gap": (cost - mono_cost) / max(abs(mono_cost), 1e-9),
+        "partitioned_s": info["total_s"],
+        "monolithic_s": mono_s,
+        **{k: v for k, v in info.items() if k not in ("solve_s", "total_s")},
+    }
@@ -0,0 +1,182 @@
+import numpy as np
+
+
+class PathIndex:
+    """
+    Array form of (G, candidate_lists): every candidate path becomes a row of
+    integer edge ids so loads and move deltas can be computed with NumPy
+    instead of walking node lists and edge dicts.
+
+    Attributes:
+     - edges: edge keys tuple(sorted((u, v))) in G.edges order (edge id = position)
+     - capacity, time: float arrays indexed by edge id
+     - demand_ptr: demand i owns global path ids demand_ptr[i]:demand_ptr[i+1]
+     - path_ptr, path_edges: path q uses edge ids path_edges[path_ptr[q]:path_ptr[q+1]]
+     - path_demand, path_time: owning demand and travel time of each global path
+    """
+
+    def __init__(self, edges, capacity, time, demand_ptr, path_ptr, path_edges):
+        self.edges = edges
+        self.capacity = np.asarray(capacity, dtype=float)
+        self.time = np.asarray(time, dtype=float)
+        self.demand_ptr = np.asarray(demand_ptr, dtype=np.int64)
+        self.path_ptr = np.asarray(path_ptr, dtype=np.int64)
+        self.path_edges = np.asarray(path_edges, dtype=np.int64)
+
+        self.num_edges = len(self.capacity)
+        self.num_demands = len(self.demand_ptr) - 1
+        self.num_paths = len(self.path_ptr) - 1
+        self.num_choices = np.diff(self.demand_ptr)
+        self.path_demand = np.repeat(np.arange(self.num_demands), self.num_choices)
+        self.path_len = np.diff(self.path_ptr)
+        path_of_entry = np.repeat(np.arange(self.num_paths), self.path_len)
+        self.path_time = np.bincount(path_of_entry, weights=self.time[self.path_edges],
+                                     minlength=self.num_paths)
+
+    def path_edge_ids(self, q):
+        """Edge ids of global path q."""
+        return self.path_edges[self.path_ptr[q]:self.path_ptr[q + 1]]
+
+    def global_paths(self, state):
+        """Global path ids chosen by a state (or a (reads x demands) matrix of states)."""
+        return self.demand_ptr[:-1] + np.asarray(state, dtype=np.int64)
+
+    def edge_loads(self, state):
+        """Per-edge load array of a state."""
+        entries = gather_ranges(self.path_ptr, self.global_paths(state))
+        return np.bincount(self.path_edges[entries], minlength=self.num_edges)
+
+    def penalty(self, loads, congestion_penalty_coef=5.0, power=2):
+        """Congestion penalty coef * max(0, load - capacity)^power summed over edges."""
+        excess = np.maximum(0.0, np.asarray(loads, dtype=float) - self.capacity)
+        return congestion_penalty_coef * float(np.sum(excess ** power))
+
+    def cost(self, state, congestion_penalty_coef=5.0, power=2):
+        """Same value as formulation.objective_cost for the indexed instance."""
+        travel = float(np.sum(self.path_time[self.global_paths(state)]))
+        return travel + self.penalty(self.edge_loads(state), congestion_penalty_coef, power)
+
+    def loads_dict(self, loads):
+        """Convert a load array to the {tuple(sorted(edge)): load} dict used elsewhere."""
+        return {e: int(load) for e, load in zip(self.edges, loads)}
+
+
+def gather_ranges(ptr, rows):
+    """Concatenated positions ptr[r]:ptr[r+1] for every r in rows (vectorized)."""
+    rows = np.asarray(rows, dtype=np.int64).ravel()
+    starts = ptr[rows]
+    lengths = ptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    # offset of each output slot from the start of its own range
+    seg_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + (np.arange(total) - seg_start)
+
+
+def build_path_index(G, candidate_lists, capacity_key='capacity', time_key='time'):
+    """
+    Build a PathIndex for G and candidate_lists.
+    Missing capacities are treated as unbounded and missing times as 1,
+    matching objective_cost / path_travel_time.
+    A path_store.CandidateStore over G's edges is indexed straight from its int32 buffers.
+    """
+    if hasattr(candidate_lists, "path_index"):
+        index = candidate_lists.path_index(G, capacity_key, time_key)
+        if index is not None:
+            return index
+    edge_id = {}
+    edges, capacity, time = [], [], []
+    for j, (u, v, attrs) in enumerate(G.edges(data=True)):
+        edge_id[(u, v)] = j
+        edge_id[(v, u)] = j
+        edges.append(tuple(sorted((u, v))))
+        capacity.append(attrs.get(capacity_key, float('inf')))
+        time.append(attrs.get(time_key, 1))
+
+    demand_ptr = [0]
+    path_ptr = [0]
+    path_edges = []
+    for P in candidate_lists:
+        for path in P:
+            path_edges.extend(edge_id[(u, v)] for u, v in zip(path[:-1], path[1:]))
+            path_ptr.append(len(path_edges))
+        demand_ptr.append(len(path_ptr) - 1)
+
+    return PathIndex(edges, capacity, time, demand_ptr, path_ptr, path_edges)
+
+
+class LoadState:
+    """
+    Edge loads of a state kept up to date move by move.
+    Tracks travel time, excess = sum max(0, load - cap)^power and overload = sum max(0, load - cap)
+    (compute_capacity_violation), so objective_cost = travel + coef * excess for any coef without
+    rescanning edges. Subclasses with another state (e.g. aggregation.SplitLoadState) reuse the
+    per-vehicle path_delta / _shift primitives.
+    """
+
+    def __init__(self, index, state, power=2):
+        self.state = [int(s) for s in state]
+        self._base = index.demand_ptr[:-1].tolist()
+        self._setup(index, index.edge_loads(self.state),
+                    float(np.sum(index.path_time[index.global_paths(self.state)])), power)
+
+    def _setup(self, index, loads, travel, power):
+        self.index = index
+        self.power = power
+        self.loads = [int(x) for x in loads]
+        self._cap = index.capacity.tolist()
+        self._ptr = index.path_ptr.tolist()
+        self._edges = index.path_edges.tolist()
+        self._time = index.path_time.tolist()
+        self.travel = travel
+        excess = np.maximum(0.0, np.asarray(self.loads, dtype=float) - index.capacity)
+        self.excess = float(np.sum(excess ** power))
+        self.overload = float(np.sum(excess))
+
+    def cost(self, congestion_penalty_coef):
+        return self.travel + congestion_penalty_coef * self.excess
+
+    def path_delta(self, old, new):
+        """(d_travel, d_excess, d_overload) of moving one vehicle from global path old to new (old=None adds one)."""
+        if old == new:
+            return 0.0, 0.0, 0.0
+        loads, cap, power = self.loads, self._cap, self.power
+        d_exc = d_over = 0.0
+        old_edges = self._edges[self._ptr[old]:self._ptr[old + 1]] if old is not None else []
+        for e in old_edges:
+            x = loads[e] - cap[e]
+            if x > 0:
+                d_exc += max(0.0, x - 1) ** power - x ** power
+                d_over -= min(1.0, x)
+            loads[e] -= 1
+        for e in self._edges[self._ptr[new]:self._ptr[new + 1]]:
+            x = loads[e] + 1 - cap[e]
+            if x > 0:
+                d_exc += x ** power - max(0.0, x - 1) ** power
+                d_over += min(1.0, x)
+        for e in old_edges:
+            loads[e] += 1
+        return self._time[new] - (self._time[old] if old is not None else 0.0), d_exc, d_over
+
+    def _shift(self, old, new, delta):
+        """Move one vehicle's loads from global path old (or None) to new and add delta to the totals."""
+        if old is not None:
+            for e in self._edges[self._ptr[old]:self._ptr[old + 1]]:
+                self.loads[e] -= 1
+        for e in self._edges[self._ptr[new]:self._ptr[new + 1]]:
+            self.loads[e] += 1
+        self.travel += delta[0]
+        self.excess += delta[1]
+        self.overload += delta[2]
+
+    def move_delta(self, i, choice):
+        """(d_travel, d_excess, d_overload) of switching demand i to path index `choice`."""
+        return self.path_delta(self._base[i] + self.state[i], self._base[i] + choice)
+
+    def apply(self, i, choice, delta=None):
+        """Switch demand i to path index `choice` (pass the move_delta result to skip recomputing it)."""
+        if delta is None:
+            delta = self.move_delta(i, choice)
+        self._shift(self._base[i] + self.state[i], self._base[i] + choice, delta)
+        self.state[i] = choice
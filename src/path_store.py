@@ -0,0 +1,211 @@
+"""
+Compact storage for candidate lists.
+
+PathStore interns every distinct path once, as its start node id plus int32 edge ids (G.edges
+order, the same ids PathIndex uses) in one contiguous buffer with offsets. CandidateStore keeps
+one range of path ids per demand and is a read-only sequence: candidates[i][p] decodes path p of
+demand i back to its node list, so code written for lists of lists of nodes keeps working.
+
+    candidates = CandidateStore.from_lists(G, enumerate_candidate_paths(G, demands, k=3))
+    candidates[i][state[i]]        # node path
+    candidates.path_index()        # PathIndex without walking node lists
+
+Demands sharing an OD pair share their paths, so memory drops several-fold on real demand sets,
+and pickling ships a few NumPy arrays plus the node labels.
+"""
+from array import array
+from collections.abc import Sequence
+
+import numpy as np
+
+from src.path_index import PathIndex, gather_ranges
+
+
+class PathStore:
+    """
+    Interned paths of one graph.
+    - nodes: node labels (node id = position); edge_src / edge_dst: int32 endpoints per edge id
+    - start: int32 first node per path; ptr / edges: path q uses edges[ptr[q]:ptr[q+1]]
+    """
+
+    def __init__(self, G):
+        self.nodes = list(G.nodes)
+        node_id = {n: i for i, n in enumerate(self.nodes)}
+        self._src = array("i", [node_id[u] for u, _ in G.edges])
+        self._dst = array("i", [node_id[v] for _, v in G.edges])
+        self.capacity = np.array([d.get("capacity", float("inf")) for _, _, d in G.edges(data=True)], dtype=float)
+        self.time = np.array([d.get("time", 1) for _, _, d in G.edges(data=True)], dtype=float)
+        self._start = array("i")
+        self._ptr = array("q", [0])
+        self._edges = array("i")
+        self._lookup = None
+
+    def _index(self):
+        node_id = {n: i for i, n in enumerate(self.nodes)}
+        edge_id = {}
+        for j, (u, v) in enumerate(zip(self._src, self._dst)):
+            edge_id[(u, v)] = edge_id[(v, u)] = j
+        interned = {tuple(self._decode_ids(q)): q for q in range(len(self))}
+        self._lookup = (node_id, edge_id, interned)
+        return self._lookup
+
+    def add(self, path):
+        """Path id of a node path, interning it on first sight."""
+        node_id, edge_id, interned = self._lookup or self._index()
+        ids = tuple(node_id[n] for n in path)
+        q = interned.get(ids)
+        if q is None:
+            q = len(self._start)
+            self._start.append(ids[0] if ids else -1)
+            self._edges.extend(edge_id[(u, v)] for u, v in zip(ids[:-1], ids[1:]))
+            self._ptr.append(len(self._edges))
+            interned[ids] = q
+        return q
+
+    def __len__(self):
+        return len(self._start)
+
+    # NumPy views of the buffers; don't hold them across add(), which may resize the buffers
+    @property
+    def edge_src(self):
+        return np.frombuffer(self._src, dtype=np.int32)
+
+    @property
+    def edge_dst(self):
+        return np.frombuffer(self._dst, dtype=np.int32)
+
+    @property
+    def start(self):
+        return np.frombuffer(self._start, dtype=np.int32)
+
+    @property
+    def ptr(self):
+        return np.frombuffer(self._ptr, dtype=np.int64)
+
+    @property
+    def edges(self):
+        return np.frombuffer(self._edges, dtype=np.int32)
+
+    def path_edges(self, q):
+        """int32 edge ids of path q."""
+        return np.frombuffer(self._edges[self._ptr[q]:self._ptr[q + 1]], dtype=np.int32)
+
+    def _decode_ids(self, q):
+        cur = self._start[q]
+        if cur < 0:
+            return []
+        ids = [cur]
+        src, dst = self._src, self._dst
+        for e in self._edges[self._ptr[q]:self._ptr[q + 1]]:
+            cur = dst[e] if src[e] == cur else src[e]
+            ids.append(cur)
+        return ids
+
+    def path(self, q):
+        """Node list of path q."""
+        return [self.nodes[i] for i in self._decode_ids(q)]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the path buffers (excluding node labels)."""
+        return sum(a.itemsize * len(a) for a in (self._start, self._ptr, self._edges))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_lookup"] = None  # rebuilt on the next add()
+        return state
+
+
+class _Candidates(Sequence):
+    """Candidate paths of one demand (decoded on access)."""
+
+    __slots__ = ("_store", "_ids")
+
+    def __init__(self, store, ids):
+        self._store = store
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, p):
+        if isinstance(p, slice):
+            return [self._store.path(int(q)) for q in self._ids[p]]
+        return self._store.path(int(self._ids[p]))
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class CandidateStore(Sequence):
+    """
+    Read-only candidate_lists backed by a PathStore.
+    - paths: the PathStore; path_ids: int32 interned path id per (demand, choice)
+    - demand_ptr: demand i owns path_ids[demand_ptr[i]:demand_ptr[i+1]]
+    """
+
+    def __init__(self, paths, path_ids, demand_ptr):
+        self.paths = paths
+        self.path_ids = np.asarray(path_ids, dtype=np.int32)
+        self.demand_ptr = np.asarray(demand_ptr, dtype=np.int64)
+
+    @classmethod
+    def from_lists(cls, G, candidate_lists, paths=None):
+        """Intern candidate_lists (lists of node paths per demand) into a new or given PathStore."""
+        new_store = paths is None
+        paths = PathStore(G) if new_store else paths
+        path_ids, demand_ptr = array("i"), [0]
+        for P in candidate_lists:
+            path_ids.extend(paths.add(path) for path in P)
+            demand_ptr.append(len(path_ids))
+        if new_store:
+            paths._lookup = None  # the interning dict costs more than the paths; rebuilt on demand
+        return cls(paths, np.frombuffer(path_ids, dtype=np.int32), demand_ptr)
+
+    def __len__(self):
+        return len(self.demand_ptr) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("demand index out of range")
+        return _Candidates(self.paths, self.path_ids[self.demand_ptr[i]:self.demand_ptr[i + 1]])
+
+    def to_lists(self):
+        """Plain lists of node paths (the format enumerate_candidate_paths returns)."""
+        return [list(P) for P in self]
+
+    @property
+    def nbytes(self):
+        return self.paths.nbytes + self.path_ids.nbytes + self.demand_ptr.nbytes
+
+    def path_index(self, G=None, capacity_key="capacity", time_key="time"):
+        """
+        PathIndex of these candidates straight from the int32 buffers (same as build_path_index).
+        With G, capacities and times are read from G, which must have the store's edges in the
+        same order (e.g. a copy with modified attributes); returns None when it does not.
+        """
+        store = self.paths
+        capacity, time = store.capacity, store.time
+        if G is not None:
+            node_id = {n: i for i, n in enumerate(store.nodes)}
+            try:
+                same = [(node_id[u], node_id[v]) for u, v in G.edges] == list(zip(store._src, store._dst))
+            except KeyError:
+                same = False
+            if not same:
+                return None
+            data = [d for _, _, d in G.edges(data=True)]
+            capacity = [d.get(capacity_key, float("inf")) for d in data]
+            time = [d.get(time_key, 1) for d in data]
+        rows = self.path_ids.astype(np.int64)
+        path_ptr = np.r_[0, np.cumsum(np.diff(store.ptr)[rows])]
+        entries = gather_ranges(store.ptr, rows)
+        edges = [tuple(sorted((store.nodes[u], store.nodes[v]))) for u, v in zip(store._src, store._dst)]
+        return PathIndex(edges, capacity, time, self.demand_ptr, path_ptr, store.edges[entries].astype(np.int64))
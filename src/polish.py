@@ -0,0 +1,102 @@
+import numpy as np
+
+from src import instrumentation
+from src.path_index import LoadState, build_path_index, gather_ranges
+
+
+def _edge_penalty(loads, capacity, coef, power):
+    return coef * np.maximum(0.0, loads - capacity) ** power
+
+
+def path_move_deltas(index, state, congestion_penalty_coef=10.0, power=2, loads=None):
+    """
+    objective_cost change of moving each demand to each of its candidate paths, all at once.
+    For a move of demand i from its current path c to path q:
+      delta = time(q) - time(c) + sum_{e in q} add(e) + sum_{e in c} rem(e) - sum_{e in q and c} (add(e) + rem(e))
+    with add/rem the penalty change of one more/less vehicle on e at the current loads.
+    Returns: float array over global paths (0 for each demand's current path).
+    """
+    state = np.asarray(state, dtype=np.int64)
+    if loads is None:
+        loads = index.edge_loads(state)
+    loads = np.asarray(loads, dtype=float)
+    base = _edge_penalty(loads, index.capacity, congestion_penalty_coef, power)
+    add = _edge_penalty(loads + 1, index.capacity, congestion_penalty_coef, power) - base
+    rem = _edge_penalty(loads - 1, index.capacity, congestion_penalty_coef, power) - base
+
+    entry_path = np.repeat(np.arange(index.num_paths), index.path_len)
+    entry_edge = index.path_edges
+    path_add = np.bincount(entry_path, weights=add[entry_edge], minlength=index.num_paths)
+
+    current = index.global_paths(state)
+    cur_entries = gather_ranges(index.path_ptr, current)
+    cur_demand = np.repeat(np.arange(index.num_demands), index.path_len[current])
+    cur_rem = np.bincount(cur_demand, weights=rem[entry_edge[cur_entries]], minlength=index.num_demands)
+
+    # edges a candidate shares with its demand's current path cancel out
+    E = index.num_edges
+    cur_keys = np.sort(cur_demand * E + entry_edge[cur_entries])
+    keys = index.path_demand[entry_path] * E + entry_edge
+    pos = np.minimum(np.searchsorted(cur_keys, keys), max(0, len(cur_keys) - 1))
+    shared = (cur_keys[pos] == keys) if len(cur_keys) else np.zeros(len(keys), dtype=bool)
+    overlap = np.bincount(entry_path, weights=np.where(shared, add[entry_edge] + rem[entry_edge], 0.0),
+                          minlength=index.num_paths)
+
+    delta = (index.path_time - index.path_time[current][index.path_demand]
+             + path_add + cur_rem[index.path_demand] - overlap)
+    delta[current] = 0.0
+    return delta
+
+
+def move_delta_matrix(index, state, congestion_penalty_coef=10.0, power=2, loads=None):
+    """(demands x k) matrix of path_move_deltas; +inf where a demand has fewer than k candidates."""
+    delta = path_move_deltas(index, state, congestion_penalty_coef, power, loads)
+    kmax = int(index.num_choices.max()) if index.num_demands else 0
+    local = np.arange(index.num_paths) - index.demand_ptr[:-1][index.path_demand]
+    matrix = np.full((index.num_demands, kmax), np.inf)
+    matrix[index.path_demand, local] = delta
+    return matrix
+
+
+@instrumentation.timed("polish")
+def steepest_descent(index, state, congestion_penalty_coef=10.0, power=2, max_iters=1000, tol=1e-9):
+    """
+    Repeatedly apply the best improving single-demand moves until none remain.
+    Each iteration scores the whole neighbourhood with move_delta_matrix, then walks the improving
+    moves best first, re-pricing each against the loads left by the moves already taken this
+    iteration (O(path length)) and applying it if it still improves.
+    Returns: (state, cost, loads) with loads the per-edge load array.
+    """
+    current = LoadState(index, state, power)
+    for _ in range(max_iters):
+        matrix = move_delta_matrix(index, current.state, congestion_penalty_coef, power, current.loads)
+        if matrix.size == 0:
+            break
+        best_choice = np.argmin(matrix, axis=1)
+        best_delta = matrix[np.arange(index.num_demands), best_choice]
+        improving = np.flatnonzero(best_delta < -tol)
+        if len(improving) == 0:
+            break
+        instrumentation.count("polish_moves_considered", len(improving))
+
+        for i in improving[np.argsort(best_delta[improving], kind="stable")].tolist():
+            choice = int(best_choice[i])
+            d = current.move_delta(i, choice)
+            if d[0] + congestion_penalty_coef * d[1] < -tol:
+                current.apply(i, choice, d)
+                instrumentation.count("polish_moves_applied")
+
+    state = np.asarray(current.state, dtype=np.int64)
+    loads = np.asarray(current.loads, dtype=np.int64)
+    cost = float(np.sum(index.path_time[index.global_paths(state)])) + index.penalty(loads, congestion_penalty_coef, power)
+    return state, cost, loads
+
+
+def polish(G, candidate_lists, state, congestion_penalty_coef=10.0, power=2, max_iters=1000):
+    """
+    Steepest-descent cleanup of any solver's state (SA, baselines, decoded QUBO samples).
+    Returns: (best_state, best_cost, final_edge_loads) like simulated_annealing.
+    """
+    index = build_path_index(G, candidate_lists)
+    state, cost, loads = steepest_descent(index, state, congestion_penalty_coef, power, max_iters)
+    return [int(s) for s in state], cost, index.loads_dict(loads)
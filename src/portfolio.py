@@ -0,0 +1,211 @@
+"""
+Solver portfolio racing under a shared time budget.
+
+Every solver in the portfolio runs in its own process on the same instance. Iterative solvers
+(SA, penalty continuation, genetic) send each improved incumbent to the parent as they go, and every
+solver sends its final answer; the parent keeps the best so far. The race ends when the deadline
+passes, every solver has finished, or an answer within target_gap of the lower bound arrives.
+Solvers still running at that point are terminated, so the answer is the best state found by any
+solver within the budget.
+
+Each entry is (name, fn, kwargs) with fn a module-level function
+fn(G, demands, candidate_lists, congestion_penalty_coef, **kwargs) -> (state, cost, ...). If fn takes
+an on_improve argument, it is passed a callback to call with every improved state.
+Costs are re-scored with objective_cost at the portfolio's penalty, so entries are comparable.
+"""
+import inspect
+import multiprocessing as mp
+import os
+import queue
+import time
+
+import pandas as pd
+
+from src.annealing import optimality_gap, penalty_continuation_annealing, simulated_annealing
+from src.baselines import shortest_path_baseline
+from src.genetic import genetic_algorithm
+from src.lower_bound import lp_lower_bound
+from src.path_index import build_path_index
+
+TRACE_COLUMNS = ["solver", "status", "cost", "violations", "elapsed_s", "incumbent", "error"]
+
+
+def _sa(G, demands, candidate_lists, congestion_penalty_coef, on_improve=None, **kwargs):
+    return simulated_annealing(G, candidate_lists, congestion_penalty_coef=congestion_penalty_coef,
+                               log_csv=os.devnull, verbose=False, on_improve=on_improve, **kwargs)
+
+
+def _penalty_continuation(G, demands, candidate_lists, congestion_penalty_coef, on_improve=None, **kwargs):
+    return penalty_continuation_annealing(G, candidate_lists, log_csv=os.devnull, verbose=False,
+                                          on_improve=on_improve, **kwargs)
+
+
+def _genetic(G, demands, candidate_lists, congestion_penalty_coef, on_improve=None, **kwargs):
+    return genetic_algorithm(G, candidate_lists, congestion_penalty_coef=congestion_penalty_coef,
+                             on_improve=on_improve, **kwargs)
+
+
+def _shortest_path(G, demands, candidate_lists, congestion_penalty_coef):
+    return shortest_path_baseline(G, demands, candidate_lists, congestion_penalty_coef)
+
+
+def _dimod_sa(G, demands, candidate_lists, congestion_penalty_coef, num_reads=20):
+    from src.decoding import best_decoded
+    from src.quantum_solvers import solve_sa
+    from src.qubo_formulation import build_qubo
+    bqm = build_qubo(G, demands, candidate_lists, verbose=False)
+    _, _, sampleset = solve_sa(bqm, num_reads=num_reads, return_sampleset=True)
+    return best_decoded(sampleset, G, candidate_lists, congestion_penalty_coef)
+
+
+def _qaoa_pieces(G, demands, candidate_lists, congestion_penalty_coef, max_vars=12, reps=1, maxiter=20):
+    """
+    QAOA on pieces of at most max_vars QUBO variables (consecutive demands, solved independently),
+    stitched together and cleaned up with steepest descent over the whole instance.
+    """
+    from src.decoding import best_decoded
+    from src.polish import polish
+    from src.quantum_solvers import solve_qaoa
+    from src.qubo_formulation import build_qubo
+    state = []
+    lo = 0
+    while lo < len(demands):
+        hi, size = lo, 0
+        while hi < len(demands) and (hi == lo or size + len(candidate_lists[hi]) <= max_vars):
+            size += len(candidate_lists[hi])
+            hi += 1
+        piece_cands = candidate_lists[lo:hi]
+        bqm = build_qubo(G, demands[lo:hi], piece_cands, verbose=False)
+        _, _, sampleset = solve_qaoa(bqm, reps=reps, maxiter=maxiter, return_sampleset=True)
+        state.extend(best_decoded(sampleset, G, piece_cands, congestion_penalty_coef)[0])
+        lo = hi
+    return polish(G, candidate_lists, state, congestion_penalty_coef)
+
+
+def default_portfolio(time_budget=None, include_dimod=True, include_qaoa=False):
+    """SA variants, penalty continuation, the genetic solver, the shortest-path baseline and QUBO samplers."""
+    entries = [
+        ("shortest_path", _shortest_path, {}),
+        ("sa", _sa, {}),
+        ("sa_long_hot", _sa, {"episodes": 200, "temp_start": 200.0, "seed": 7}),
+        ("penalty_continuation", _penalty_continuation, {}),
+        ("genetic", _genetic, {"time_budget": time_budget}),
+    ]
+    if include_dimod:
+        entries.append(("dimod_sa", _dimod_sa, {}))
+    if include_qaoa:
+        entries.append(("qaoa_pieces", _qaoa_pieces, {}))
+    return entries
+
+
+def _race_worker(name, fn, kwargs, G, demands, candidate_lists, congestion_penalty_coef, results):
+    try:
+        index = build_path_index(G, candidate_lists)
+        if "on_improve" in inspect.signature(fn).parameters:
+            posted = [float("inf")]
+
+            def on_improve(state):
+                cost = index.cost(state, congestion_penalty_coef)
+                if cost < posted[0]:  # rescored at the portfolio penalty, only post real improvements
+                    posted[0] = cost
+                    results.put((name, "incumbent", [int(s) for s in state], cost, None, time.time()))
+
+            kwargs = {**kwargs, "on_improve": on_improve}
+        state = fn(G, demands, candidate_lists, congestion_penalty_coef, **kwargs)[0]
+        state = [int(s) for s in state]
+        cost = index.cost(state, congestion_penalty_coef)
+        results.put((name, "done", state, cost, None, time.time()))
+    except Exception as e:  # report instead of dying silently; the race goes on
+        results.put((name, "error", None, None, repr(e), time.time()))
+
+
+def run_portfolio(G, demands, candidate_lists, entries=None, time_budget=60.0, target_gap=None,
+                  lower_bound=None, congestion_penalty_coef=10.0):
+    """
+    Race the portfolio entries (default_portfolio if None) against each other.
+    - time_budget: global deadline in seconds; solvers still running then are cancelled
+    - target_gap: stop as soon as some answer is within this relative gap of lower_bound
+      (computed with lp_lower_bound while the solvers run if not given)
+    Returns: (winner, traces) with winner a dict (solver, state, cost, loads, elapsed_s), or None
+    if no answer or incumbent arrived in time, and traces a DataFrame with one row per solver
+    (status 'done', 'error', 'cancelled' or 'crashed'; cost is the final answer, or the last
+    incumbent of a cancelled solver; incumbent marks solvers that improved the best-so-far).
+    """
+    if entries is None:
+        entries = default_portfolio(time_budget)
+    index = build_path_index(G, candidate_lists)
+    ctx = mp.get_context()
+    results = ctx.Queue()
+
+    t0 = time.time()  # wall clock, so finish times stamped in the workers are comparable
+    deadline = t0 + time_budget
+    procs = {}
+    for name, fn, kwargs in entries:
+        p = ctx.Process(target=_race_worker, daemon=True,
+                        args=(name, fn, kwargs, G, demands, candidate_lists, congestion_penalty_coef,
+                              results))
+        p.start()
+        procs[name] = p
+
+    if target_gap is not None and lower_bound is None:
+        lower_bound, _ = lp_lower_bound(G, candidate_lists, congestion_penalty_coef, index=index,
+                                        time_limit=max(0.0, deadline - time.time()))
+
+    traces = {}
+    partial = {}  # last incumbent of each running solver
+    winner = None
+    try:
+        while len(traces) < len(procs):
+            now = time.time()
+            if now >= deadline:
+                break
+            try:
+                name, status, state, cost, error, finished = results.get(timeout=min(0.1, deadline - now))
+            except queue.Empty:
+                for name, p in procs.items():
+                    if name not in traces and not p.is_alive() and p.exitcode not in (0, None):
+                        traces[name] = {"solver": name, "status": "crashed", "elapsed_s": time.time() - t0,
+                                        "error": f"exit code {p.exitcode}"}
+                continue
+
+            elapsed = finished - t0
+            row = {"solver": name, "status": status, "elapsed_s": elapsed, "error": error}
+            if state is not None:
+                row["cost"] = cost
+                row["violations"] = index.penalty(index.edge_loads(state), 1.0, 1)
+                improved = winner is None or cost < winner["cost"]
+                row["incumbent"] = improved or partial.get(name, {}).get("incumbent", False)
+                if improved:
+                    winner = {"solver": name, "state": state, "cost": cost, "elapsed_s": elapsed}
+            if status == "incumbent":
+                partial[name] = {**row, "status": "cancelled"}
+            else:
+                traces[name] = row
+            if (winner is not None and target_gap is not None
+                    and optimality_gap(winner["cost"], lower_bound) <= target_gap):
+                break
+    finally:
+        for name, p in procs.items():
+            if p.is_alive():
+                p.terminate()
+            p.join()
+
+    for name in procs:
+        traces.setdefault(name, {**partial.get(name, {}), "solver": name, "status": "cancelled",
+                                 "elapsed_s": time.time() - t0})
+    if winner is not None:
+        winner["loads"] = index.loads_dict(index.edge_loads(winner["state"]))
+    trace_df = pd.DataFrame([traces[name] for name in procs], columns=TRACE_COLUMNS)
+    return winner, trace_df
+
+
+if __name__ == "__main__":
+    from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+
+    G = build_large_graph(grid_size=6, seed=42)
+    demands = generate_demands(G, num_demands=60, seed=42)
+    candidate_lists = enumerate_candidate_paths(G, demands, k=3)
+    winner, traces = run_portfolio(G, demands, candidate_lists, time_budget=20.0, target_gap=0.01)
+    print(traces.to_string(index=False))
+    if winner is not None:
+        print(f"winner: {winner['solver']} cost={winner['cost']:.2f} after {winner['elapsed_s']:.2f}s")
@@ -1,6 +1,6 @@
 import logging
 from dimod import SimulatedAnnealingSampler
-from dimod import BinaryQuadraticModel
+from dimod import BinaryQuadraticModel, SampleSet
 import numpy as np
 from dwave.system import DWaveSampler, EmbeddingComposite
 # import docplex.mp.model as cpx
@@ -12,14 +12,19 @@ from qiskit_algorithms.optimizers import COBYLA,SPSA
 from qiskit_aer import AerSimulator
 from qiskit_optimization.algorithms import MinimumEigenOptimizer
 
+from src import instrumentation
+
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)  # adjust as desired
 
 # D-Wave solver
-def solve_dwave(bqm, num_reads=100):
+@instrumentation.timed("solve")
+def solve_dwave(bqm, num_reads=100, return_sampleset=False, verbose=True):
     """
     Solve a BQM using D-Wave sampler if available,
     otherwise fall back to a local simulated annealer.
+    With return_sampleset=True also returns the full SampleSet (see decoding.decode_sampleset).
+    verbose=False suppresses the status prints.
     """
     try:
         # Try using the actual quantum hardware
@@ -27,24 +32,32 @@ def solve_dwave(bqm, num_reads=100):
         response = sampler.sample(bqm, num_reads=num_reads)
         sol = response.first.sample
         energy = response.first.energy
-        print("✅ Solved using D-Wave QPU.")
+        if verbose:
+            print("✅ Solved using D-Wave QPU.")
     except Exception as e:
-        print(f"⚠️ Falling back to Simulated Annealing (local). Reason: {e}")
+        if verbose:
+            print(f"⚠️ Falling back to Simulated Annealing (local). Reason: {e}")
         sampler = SimulatedAnnealingSampler()
         response = sampler.sample(bqm, num_reads=num_reads)
         sol = response.first.sample
         energy = response.first.energy
 
+    if return_sampleset:
+        return sol, energy, response
     return sol, energy
 
 
-def solve_sa(bqm, num_reads=100):
+@instrumentation.timed("solve")
+def solve_sa(bqm, num_reads=100, return_sampleset=False):
     """
     Solve QUBO using Classical Simulated Annealing (SA).
+    With return_sampleset=True also returns the full SampleSet (see decoding.decode_sampleset).
     """
     sampler = SimulatedAnnealingSampler()
     sampleset = sampler.sample(bqm, num_reads=num_reads)
     best = sampleset.first
+    if return_sampleset:
+        return best.sample, best.energy, sampleset
     return best.sample, best.energy
 
 
@@ -94,11 +107,14 @@ def _qp_constraint_counts(qp: QuadraticProgram):
     return int(num_vars), int(num_lin), int(num_quad)
 
 
-def solve_qaoa(bqm, reps=1, maxiter=50, optimizer_name="SPSA"):
+@instrumentation.timed("solve")
+def solve_qaoa(bqm, reps=1, maxiter=50, optimizer_name="SPSA", return_sampleset=False):
     """
     Solve dimod BQM using QAOA via QuadraticProgram conversion.
     - Robust prints for qp sizes/constraints compatible with multiple qiskit versions.
     - Returns (solution_dict, objective_value)
+    - With return_sampleset=True also returns every measured bitstring as a dimod SampleSet
+      (energies are the QuadraticProgram objective values), for decoding.decode_sampleset.
     """
     # ---- convert BQM -> QuadraticProgram ----
     qp = bqm_to_qp(bqm)
@@ -156,4 +172,18 @@ def solve_qaoa(bqm, reps=1, maxiter=50, optimizer_name="SPSA"):
     log.info(f"[QAOA] Parsed solution (first 20 shown): {dict(list(solution.items())[:20])}")
     log.info(f"[QAOA] Objective value: {fval}")
 
+    if return_sampleset:
+        return solution, float(fval), _qaoa_sampleset(result, var_names)
     return solution, float(fval)
+
+
+def _qaoa_sampleset(result, var_names):
+    """Collect all QAOA result samples (not only the best) into a dimod SampleSet."""
+    samples = getattr(result, "samples", None) or []
+    if not samples:
+        rows = np.asarray([result.x], dtype=np.int8)
+        energies = [float(result.fval)]
+    else:
+        rows = np.rint(np.asarray([s.x for s in samples], dtype=float)).astype(np.int8)
+        energies = [float(s.fval) for s in samples]
+    return SampleSet.from_samples((rows, var_names), "BINARY", energy=energies)
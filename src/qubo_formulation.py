@@ -1,55 +1,201 @@
+from collections import defaultdict
+
 import dimod
 
-def build_qubo(G, demands, candidate_lists, alpha=1.0, beta=1.0):
+from src import instrumentation
+
+
+def scaled_penalties(G, demands, alpha=1.0, beta=1.0):
+    """Scale penalties relative to max demand/capacity. Returns (alpha_scaled, beta_scaled)."""
+    max_demand = max(d[2] for d in demands)
+    max_cap = max(G[e[0]][e[1]].get("capacity", 1) for e in G.edges)
+    return alpha * max_demand, beta / max_cap
+
+
+def edge_variable_map(G, demands, candidate_lists):
+    """
+    For each edge of G (in G.edges orientation), the (demand_val, variable) pairs whose path uses it.
+    Variables are named x_<demand>_<path>.
+    """
+    canon = {}
+    for u, v in G.edges:
+        canon[(u, v)] = (u, v)
+        canon[(v, u)] = (u, v)
+
+    edge_to_vars = defaultdict(list)
+    for d, (src, dst, dem) in enumerate(demands):
+        for i, path in enumerate(candidate_lists[d]):
+            for u, v in zip(path[:-1], path[1:]):
+                edge_to_vars[canon[(u, v)]].append((dem, f"x_{d}_{i}"))
+    return edge_to_vars
+
+
+@instrumentation.timed("qubo_build")
+def build_qubo(G, demands, candidate_lists, alpha=1.0, beta=1.0, verbose=True):
     """
     Build normalized QUBO for traffic assignment.
     - G: networkx graph with 'capacity' on edges
     - demands: list of (src, dst, demand_val)
     - candidate_lists: list of candidate paths per demand
     - alpha, beta: penalty weights (scaled automatically)
+    - verbose: print the scaling factors
+    Energy: sum_d alpha*(1 - sum_i x_d_i)^2 + sum_e beta*(sum_{d,i on e} dem_d*x_d_i - cap_e)^2
+    (see factorized_qubo for the same energy without the pairwise edge couplings).
     """
     bqm = dimod.BinaryQuadraticModel('BINARY')
 
-    # Scale penalties relative to max demand/capacity
+    alpha_scaled, beta_scaled = scaled_penalties(G, demands, alpha, beta)
     max_demand = max(d[2] for d in demands)
     max_cap = max(G[e[0]][e[1]].get("capacity", 1) for e in G.edges)
-    alpha_scaled = alpha * max_demand
-    beta_scaled = beta / max_cap
 
-    print(f"[QUBO] Scaling factors → alpha={alpha_scaled:.3f}, beta={beta_scaled:.3f}")
-    print(f"[QUBO] Max demand={max_demand}, Max capacity={max_cap}")
+    if verbose:
+        print(f"[QUBO] Scaling factors → alpha={alpha_scaled:.3f}, beta={beta_scaled:.3f}")
+        print(f"[QUBO] Max demand={max_demand}, Max capacity={max_cap}")
 
     # One-path-per-demand constraint
     for d, (src, dst, dem) in enumerate(demands):
         paths = candidate_lists[d]
         vars_d = [f"x_{d}_{i}" for i in range(len(paths))]
 
-        # (1 - sum(x))^2 penalty
+        # (1 - sum(x))^2 penalty = 1 - sum(x) + 2 sum_{i<j} x_i x_j for binary x
         bqm.offset += alpha_scaled
         for v in vars_d:
-            bqm.add_variable(v, -2 * alpha_scaled)
+            bqm.add_variable(v, -alpha_scaled)
         for i in range(len(vars_d)):
             for j in range(i+1, len(vars_d)):
                 bqm.add_interaction(vars_d[i], vars_d[j], 2 * alpha_scaled)
 
     # Capacity violation penalties
+    edge_to_vars = edge_variable_map(G, demands, candidate_lists)
     for e in G.edges:
         cap = G[e[0]][e[1]].get("capacity", 1)
-        load_expr = []
-        for d, (src, dst, dem) in enumerate(demands):
-            for i, path in enumerate(candidate_lists[d]):
-                if e in path:
-                    load_expr.append((dem, f"x_{d}_{i}"))
+        load_expr = edge_to_vars.get(e)
 
         if load_expr:
             for coef, v in load_expr:
                 bqm.add_variable(v, beta_scaled * coef**2)
-                for coef2, v2 in load_expr:
-                    if v != v2:
-                        bqm.add_interaction(v, v2, 2 * beta_scaled * coef * coef2)
+            for a in range(len(load_expr)):
+                coef, v = load_expr[a]
+                for coef2, v2 in load_expr[a+1:]:
+                    bqm.add_interaction(v, v2, 2 * beta_scaled * coef * coef2)
 
             bqm.offset += beta_scaled * cap**2
             for coef, v in load_expr:
                 bqm.add_variable(v, -2 * beta_scaled * cap * coef)
 
-    return bqm
\ No newline at end of file
+    instrumentation.gauge("qubo_nnz", len(bqm.linear) + len(bqm.quadratic))
+    return bqm
+
+
+class IncrementalQubo:
+    """
+    build_qubo's BQM maintained under added / removed demands.
+    Keeps the edge -> {variable: demand_val} index, so add_demand / remove_demand touch only the
+    demand's one-hot block and the variables already on its paths' edges. Demands get stable ids
+    (variables x_<id>_<path>); the edge offset beta*cap^2 is counted while an edge carries any
+    variable, as in build_qubo. alpha scales with the largest demand, so when that changes every
+    one-hot block is re-weighted (the only O(total variables) case).
+    full_rebuild() / max_difference() check the result against build_qubo.
+    """
+
+    def __init__(self, G, alpha=1.0, beta=1.0):
+        self.G = G
+        self.alpha = alpha
+        self.beta = beta
+        self.bqm = dimod.BinaryQuadraticModel('BINARY')
+        self.beta_scaled = beta / max(G[e[0]][e[1]].get("capacity", 1) for e in G.edges)
+        self.alpha_scaled = 0.0
+        self.demands = {}      # id -> (src, dst, demand_val)
+        self.candidates = {}   # id -> candidate paths
+        self.edge_vars = defaultdict(dict)
+        self._next_id = 0
+        self._canon = {}
+        for u, v in G.edges:
+            self._canon[(u, v)] = (u, v)
+            self._canon[(v, u)] = (u, v)
+
+    def variables(self, demand_id):
+        return [f"x_{demand_id}_{i}" for i in range(len(self.candidates[demand_id]))]
+
+    def _add_one_hot(self, names, weight):
+        self.bqm.offset += weight
+        for v in names:
+            self.bqm.add_variable(v, -weight)
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                self.bqm.add_interaction(names[i], names[j], 2 * weight)
+
+    def _rescale_alpha(self, skip=None):
+        sizes = [d[2] for d in self.demands.values()]
+        target = self.alpha * max(sizes) if sizes else 0.0
+        if target != self.alpha_scaled:
+            for demand_id in self.demands:
+                if demand_id != skip:
+                    self._add_one_hot(self.variables(demand_id), target - self.alpha_scaled)
+            self.alpha_scaled = target
+
+    @instrumentation.timed("qubo_update")
+    def add_demand(self, demand, paths):
+        """Add (src, dst, demand_val) with its candidate paths; returns the demand id."""
+        demand_id = self._next_id
+        self._next_id += 1
+        dem = demand[2]
+        self.demands[demand_id] = tuple(demand)
+        self.candidates[demand_id] = [list(p) for p in paths]
+        self._rescale_alpha(skip=demand_id)
+        names = self.variables(demand_id)
+        self._add_one_hot(names, self.alpha_scaled)
+        beta = self.beta_scaled
+        for v, path in zip(names, paths):
+            self.bqm.add_variable(v, 0.0)
+            for a, b in zip(path[:-1], path[1:]):
+                e = self._canon[(a, b)]
+                cap = self.G[e[0]][e[1]].get("capacity", 1)
+                on_edge = self.edge_vars[e]
+                if not on_edge:
+                    self.bqm.offset += beta * cap ** 2
+                self.bqm.add_variable(v, beta * dem ** 2 - 2 * beta * cap * dem)
+                for v2, dem2 in on_edge.items():
+                    self.bqm.add_interaction(v, v2, 2 * beta * dem * dem2)
+                on_edge[v] = dem
+        return demand_id
+
+    @instrumentation.timed("qubo_update")
+    def remove_demand(self, demand_id):
+        """Remove a demand: its variables (and with them all their terms) and its offsets."""
+        names = self.variables(demand_id)
+        self.bqm.offset -= self.alpha_scaled
+        for v, path in zip(names, self.candidates[demand_id]):
+            for a, b in zip(path[:-1], path[1:]):
+                e = self._canon[(a, b)]
+                on_edge = self.edge_vars[e]
+                del on_edge[v]
+                if not on_edge:
+                    cap = self.G[e[0]][e[1]].get("capacity", 1)
+                    self.bqm.offset -= self.beta_scaled * cap ** 2
+                    del self.edge_vars[e]
+            self.bqm.remove_variable(v)
+        del self.demands[demand_id], self.candidates[demand_id]
+        self._rescale_alpha()
+
+    def full_rebuild(self):
+        """build_qubo over the current demands (id order), relabeled to this builder's variable names."""
+        ids = sorted(self.demands)
+        if not ids:
+            return dimod.BinaryQuadraticModel('BINARY')
+        bqm = build_qubo(self.G, [self.demands[i] for i in ids], [self.candidates[i] for i in ids],
+                         self.alpha, self.beta, verbose=False)
+        mapping = {f"x_{pos}_{p}": f"x_{i}_{p}" for pos, i in enumerate(ids) for p in range(len(self.candidates[i]))}
+        return bqm.relabel_variables(mapping, inplace=False)
+
+    def max_difference(self, other=None):
+        """Largest absolute coefficient / offset difference from `other` (default: full_rebuild())."""
+        other = self.full_rebuild() if other is None else other
+        diff = abs(self.bqm.offset - other.offset)
+        for v in set(self.bqm.variables) | set(other.variables):
+            diff = max(diff, abs(self.bqm.linear.get(v, 0.0) - other.linear.get(v, 0.0)))
+        for u, v in set(self.bqm.quadratic) | set(other.quadratic):
+            a = self.bqm.get_quadratic(u, v, default=0.0) if u in self.bqm.variables and v in self.bqm.variables else 0.0
+            b = other.get_quadratic(u, v, default=0.0) if u in other.variables and v in other.variables else 0.0
+            diff = max(diff, abs(a - b))
+        return diff
@@ -0,0 +1,179 @@
+"""
+Time-stepped point-queue simulation of a path assignment.
+
+Each vehicle follows its chosen candidate path edge by edge. Entering an edge, it needs the
+free-flow time of the edge (in ticks), then joins the edge's exit queue. An edge releases at most
+`outflow` vehicles per tick, first come first served. An edge holds at most `storage` vehicles;
+while it is full, vehicles wanting to enter it wait at the end of the upstream edge (spillback) or
+at their origin.
+
+All vehicle and edge state lives in NumPy arrays, and every tick is a handful of array operations
+over the vehicles at the head of a queue, so 100k vehicles run at hundreds of ticks per second.
+Capacities are the same 'capacity' edge attribute objective_cost uses: by default an edge stores
+storage_factor * capacity vehicles and releases capacity / free-flow time vehicles per tick.
+"""
+import numpy as np
+
+from src import instrumentation
+from src.path_index import build_path_index, gather_ranges
+
+WAITING, ACTIVE, DONE = 0, 1, 2
+
+
+def _rank_within(groups, order_keys):
+    """Position of every item among the items of its group, ordered by order_keys (lexsort keys)."""
+    order = np.lexsort(tuple(order_keys) + (groups,))
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    run_start = np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - run_start
+    return rank
+
+
+@instrumentation.timed("simulate")
+def simulate(index, state, departures=None, dt=1.0, outflow=None, storage=None, storage_factor=2.0,
+             max_ticks=100_000):
+    """
+    Simulate the assignment `state` over a PathIndex.
+    - departures: departure time per vehicle in time units, like the edge times (default all 0);
+      a vehicle departs at the first tick at or after its departure time
+    - dt: time units per tick; free-flow time of an edge is ceil(time / dt) ticks (at least 1)
+    - outflow, storage: per-edge vehicles released per tick / vehicles held (defaults from capacity)
+    The run stops early in gridlock: a tick in which nothing moved although every queue had its full
+    outflow credit, no vehicle was still traversing an edge and nobody was left to depart.
+    Returns a dict with per-vehicle 'depart', 'arrive', 'travel_time' (in time units, NaN if not
+    arrived) and 'free_flow_time'; per-edge 'max_queue' and 'blocked_ticks'; per-tick 'in_network'
+    and 'spillback' (vehicles held back by full edges); 'ticks'; 'gridlock' (whether the run stopped
+    early) and 'stuck' (ids of vehicles that never arrived).
+    """
+    paths = index.global_paths(state)
+    n = len(paths)
+    E = index.num_edges
+    fft = np.maximum(1, np.ceil(index.time / dt)).astype(np.int64)
+    cap = index.capacity
+    if outflow is None:
+        outflow = np.where(np.isfinite(cap), cap / fft, np.inf)
+    if storage is None:
+        storage = np.where(np.isfinite(cap), np.maximum(1, np.floor(storage_factor * cap)), np.inf)
+    outflow = np.minimum(np.broadcast_to(np.asarray(outflow, dtype=float), (E,)), float(n) + 1)
+    storage = np.minimum(np.broadcast_to(np.asarray(storage, dtype=float), (E,)), float(n) + 1).astype(np.int64)
+
+    if departures is None:
+        depart = np.zeros(n, dtype=np.int64)
+    else:  # time units -> ticks; the tolerance keeps exact multiples of dt on their own tick
+        depart = np.maximum(0, np.ceil(np.asarray(departures, dtype=float) / dt - 1e-9)).astype(np.int64)
+    first = index.path_ptr[paths]           # entry of each vehicle's first edge in path_edges
+    last = index.path_ptr[paths + 1]        # one past its last edge
+    cur = first.copy()                      # entry of the edge the vehicle is on (or about to enter)
+    ready = np.full(n, np.iinfo(np.int64).max)
+    status = np.full(n, WAITING, dtype=np.int8)
+    arrive = np.full(n, -1, dtype=np.int64)
+    status[first == last] = DONE            # empty paths arrive at once
+    arrive[first == last] = depart[first == last]
+
+    occ = np.zeros(E, dtype=np.int64)
+    credit = np.zeros(E)
+    credit_cap = np.maximum(outflow, 1.0)
+    max_queue = np.zeros(E, dtype=np.int64)
+    blocked_ticks = np.zeros(E, dtype=np.int64)
+    in_network, spillback = [], []
+    edge_of = index.path_edges
+    ids = np.arange(n)
+
+    t = 0
+    gridlock = False
+    while t < max_ticks and (np.any(status == ACTIVE) or np.any(status == WAITING)):
+        if not np.any(status == ACTIVE):
+            t = max(t, int(depart[status == WAITING].min()))  # jump over idle ticks
+        credit = np.minimum(credit + outflow, credit_cap)
+
+        # vehicles at the exit of their edge, FIFO by arrival at the queue
+        head = ids[(status == ACTIVE) & (ready <= t)]
+        head_edge = edge_of[cur[head]]
+        queue_len = np.bincount(head_edge, minlength=E)
+        max_queue = np.maximum(max_queue, queue_len)
+        released = head[_rank_within(head_edge, (head, ready[head])) < np.floor(credit[head_edge])]
+
+        finishing = released[cur[released] + 1 == last[released]]
+        moving = released[cur[released] + 1 < last[released]]
+        starting = ids[(status == WAITING) & (depart <= t)]
+
+        # exits first, so vehicles leaving an edge this tick make room on it
+        np.subtract.at(occ, edge_of[cur[released]], 1)
+        np.subtract.at(credit, edge_of[cur[released]], 1.0)
+        status[finishing] = DONE
+        arrive[finishing] = t
+
+        # entries: movers and new departures compete for the room left on their next edge
+        entering = np.concatenate([moving, starting])
+        target = np.concatenate([cur[moving] + 1, cur[starting]])
+        target_edge = edge_of[target]
+        since = np.concatenate([ready[moving], depart[starting]])
+        room = storage - occ
+        ok = _rank_within(target_edge, (entering, since)) < room[target_edge]
+        blocked = entering[~ok]
+        held = moving[~ok[:len(moving)]]
+        if len(held):  # held vehicles did not leave their edge after all
+            np.add.at(occ, edge_of[cur[held]], 1)
+            np.add.at(credit, edge_of[cur[held]], 1.0)
+        entering, target, target_edge = entering[ok], target[ok], target_edge[ok]
+        np.add.at(occ, target_edge, 1)
+        cur[entering] = target
+        ready[entering] = t + fft[target_edge]
+        status[entering] = ACTIVE
+
+        full = occ >= storage
+        blocked_ticks += full
+        in_network.append(int(np.count_nonzero(status == ACTIVE)))
+        spillback.append(len(blocked))
+        t += 1
+
+        # nothing moved although the outflow credit of every queue is saturated, and nothing else is
+        # under way: the next tick would repeat this one forever
+        if (len(finishing) == 0 and len(entering) == 0 and np.all(credit[head_edge] >= credit_cap[head_edge])
+                and not np.any((status == ACTIVE) & (ready >= t)) and not np.any((status == WAITING) & (depart >= t))):
+            gridlock = True
+            break
+
+    instrumentation.count("sim_ticks", t)
+    arrived = arrive >= 0
+    travel = np.where(arrived, (arrive - depart) * dt, np.nan)
+    free_flow = np.bincount(np.repeat(ids, last - first), weights=fft[edge_of[gather_ranges(index.path_ptr, paths)]],
+                            minlength=n) * dt
+    return {
+        "depart": depart * dt,
+        "arrive": np.where(arrived, arrive * dt, np.nan),
+        "travel_time": travel,
+        "free_flow_time": free_flow,
+        "max_queue": max_queue,
+        "blocked_ticks": blocked_ticks,
+        "in_network": np.asarray(in_network),
+        "spillback": np.asarray(spillback),
+        "ticks": t,
+        "gridlock": gridlock,
+        "stuck": ids[~arrived],
+    }
+
+
+def simulate_assignment(G, candidate_lists, state, departures=None, **kwargs):
+    """simulate() for (G, candidate_lists, state) as the solvers return them."""
+    return simulate(build_path_index(G, candidate_lists), state, departures, **kwargs)
+
+
+def summarize(result):
+    """Headline numbers of a simulate() result."""
+    travel = result["travel_time"]
+    arrived = ~np.isnan(travel)
+    delay = travel[arrived] - result["free_flow_time"][arrived]
+    return {
+        "vehicles": len(travel),
+        "arrived": int(arrived.sum()),
+        "mean_travel_time": float(np.mean(travel[arrived])) if arrived.any() else float("nan"),
+        "total_delay": float(np.sum(delay)),
+        "max_delay": float(np.max(delay)) if arrived.any() else float("nan"),
+        "spillback_vehicle_ticks": int(np.sum(result["spillback"])),
+        "edges_ever_full": int(np.count_nonzero(result["blocked_ticks"])),
+        "stuck": len(result["stuck"]),
+        "ticks": result["ticks"],
+    }
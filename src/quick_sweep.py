@@ -1,11 +1,9 @@
-import os
 import random
 
-import pandas as pd
-
 from src.annealing import simulated_annealing
 from src.formulation import k_shortest_candidates
 from src.network_builder import build_network
+from src.sweep import expand_grid, run_sweep
 
 
 def build_random_demand(G, n=25, seed=7):
@@ -28,21 +26,27 @@ def final_violations(G, candidate_lists, state):
             v += load - cap
     return v
 
-def run_once(penalty):
+def build_instance(params):
     G = build_network()
     demand = build_random_demand(G, n=25, seed=7)
-    cands = k_shortest_candidates(G, demand, k=4)
+    return G, k_shortest_candidates(G, demand, k=4)
+
+def run_cell(instance, params):
+    G, cands = instance
+    penalty = params["penalty"]
     state, best_cost, _loads = simulated_annealing(
         G, cands, episodes=60, temp_start=50.0, temp_end=0.5,
         congestion_penalty_coef=penalty, log_csv=f"sa_log_pen{penalty}.csv", seed=123
     )
     v = final_violations(G, cands, state)
-    return {"penalty": penalty, "best_cost": best_cost, "violations": v}
+    return {"best_cost": best_cost, "violations": v}
+
+def run_once(penalty):
+    return {"penalty": penalty, **run_cell(build_instance({}), {"penalty": penalty})}
 
 if __name__ == "__main__":
-    rows = []
-    for p in [1.0, 5.0, 10.0, 25.0, 50.0]:
-        rows.append(run_once(p))
-    df = pd.DataFrame(rows)
+    # the instance does not depend on the penalty, so it is built once and shared by all cells
+    cells = expand_grid({"penalty": [1.0, 5.0, 10.0, 25.0, 50.0]})
+    df = run_sweep(cells, build_instance, run_cell, out_dir="results/sweeps/quick_sweep")
     print(df.sort_values("penalty"))
     df.to_csv("quick_sweep_summary.csv", index=False)
\ No newline at end of file
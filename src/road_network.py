@@ -0,0 +1,174 @@
+"""
+Road networks from real data as compact arrays.
+
+RoadNetwork keeps an undirected network as per-edge arrays (endpoints, time, capacity) plus a CSR
+adjacency over both directions. It is built from an edge-list CSV, a GraphML file or a NetworkX
+graph, saved as one .npy file per array, and reopened memory-mapped, so a large network loads in
+milliseconds without re-parsing. to_networkx() gives the graph the candidate generators and solvers
+take (edge attributes 'time', 'capacity' and 'weight').
+
+    net = load_edge_csv("roads.csv", source_col="u", target_col="v", time_col="minutes")
+    net.save("results/networks/city")
+    net = RoadNetwork.load("results/networks/city")   # memory-mapped
+    G = net.to_networkx()
+"""
+import json
+import os
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src import instrumentation
+
+ARRAYS = ("nodes", "src", "dst", "time", "capacity", "indptr", "indices", "adj_edge")
+
+
+class RoadNetwork:
+    """
+    Attributes:
+     - nodes: original node labels (node id = position)
+     - src, dst, time, capacity: per-edge arrays (edge id = position; capacity inf when unknown)
+     - indptr, indices, adj_edge: CSR adjacency; the neighbours of node n are
+       indices[indptr[n]:indptr[n+1]], reached over edges adj_edge[indptr[n]:indptr[n+1]]
+    """
+
+    def __init__(self, nodes, src, dst, time, capacity, indptr=None, indices=None, adj_edge=None):
+        self.nodes = nodes
+        self.src = src
+        self.dst = dst
+        self.time = time
+        self.capacity = capacity
+        if indptr is None:
+            indptr, indices, adj_edge = _build_csr(len(nodes), src, dst)
+        self.indptr = indptr
+        self.indices = indices
+        self.adj_edge = adj_edge
+
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def num_edges(self):
+        return len(self.src)
+
+    def neighbors(self, n):
+        """Node ids adjacent to node id n."""
+        return self.indices[self.indptr[n]:self.indptr[n + 1]]
+
+    def to_scipy(self, weight="time"):
+        """Symmetric scipy.sparse CSR matrix of edge `weight` (for scipy.sparse.csgraph)."""
+        values = getattr(self, weight)[self.adj_edge]
+        return sparse.csr_matrix((values, self.indices, self.indptr), shape=(self.num_nodes, self.num_nodes))
+
+    @instrumentation.timed("graph_build")
+    def to_networkx(self):
+        """nx.Graph with the original node labels and time / capacity / weight (= time) on edges."""
+        G = nx.Graph()
+        labels = self.nodes.tolist()
+        G.add_nodes_from(labels)
+        G.add_edges_from(
+            (labels[u], labels[v], {"time": t, "capacity": c, "weight": t})
+            for u, v, t, c in zip(self.src.tolist(), self.dst.tolist(), self.time.tolist(),
+                                  self.capacity.tolist())
+        )
+        return G
+
+    def save(self, directory):
+        """Write every array as <directory>/<name>.npy (plus meta.json)."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"num_nodes": self.num_nodes, "num_edges": self.num_edges}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Open a saved network; with mmap the arrays are read lazily from disk."""
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in ARRAYS}
+        return cls(**arrays)
+
+
+def _build_csr(num_nodes, src, dst):
+    """CSR adjacency over both directions of every edge, neighbours in edge order."""
+    heads = np.concatenate([src, dst])
+    tails = np.concatenate([dst, src])
+    edge = np.concatenate([np.arange(len(src)), np.arange(len(src))])
+    order = np.argsort(heads, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(heads, minlength=num_nodes), out=indptr[1:])
+    return indptr, tails[order].astype(np.int32), edge[order].astype(np.int32)
+
+
+def _node_array(labels):
+    """Labels as an int64 array if they are all integers, else a fixed-width string array (mmap-able)."""
+    values = np.asarray(labels)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64)
+    return values.astype(str)
+
+
+@instrumentation.timed("graph_build")
+def from_edge_frame(df, source_col="source", target_col="target", time_col="time", capacity_col="capacity",
+                    default_time=1.0, default_capacity=float("inf")):
+    """
+    RoadNetwork from a DataFrame with one row per road segment.
+    Missing time / capacity columns or values use the defaults. Self-loops are dropped; parallel
+    segments between the same pair of nodes are merged into one edge with the fastest time and the
+    summed capacity.
+    """
+    codes, labels = pd.factorize(pd.concat([df[source_col], df[target_col]], ignore_index=True))
+    u, v = codes[:len(df)], codes[len(df):]
+    edges = pd.DataFrame({
+        "a": np.minimum(u, v),
+        "b": np.maximum(u, v),
+        "time": df[time_col].to_numpy(dtype=float) if time_col in df else default_time,
+        "capacity": df[capacity_col].to_numpy(dtype=float) if capacity_col in df else default_capacity,
+    })
+    edges["time"] = edges["time"].fillna(default_time)
+    edges["capacity"] = edges["capacity"].fillna(default_capacity)
+    edges = edges[edges["a"] != edges["b"]]
+    merged = edges.groupby(["a", "b"], sort=False).agg(time=("time", "min"), capacity=("capacity", "sum"))
+    a = merged.index.get_level_values(0).to_numpy(dtype=np.int32)
+    b = merged.index.get_level_values(1).to_numpy(dtype=np.int32)
+    return RoadNetwork(_node_array(labels), a, b, merged["time"].to_numpy(), merged["capacity"].to_numpy())
+
+
+def load_edge_csv(path, source_col="source", target_col="target", time_col="time", capacity_col="capacity",
+                  default_time=1.0, default_capacity=float("inf")):
+    """RoadNetwork from an edge-list CSV (see from_edge_frame for defaults and merging)."""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in (source_col, target_col, time_col, capacity_col) if c in header]
+    df = pd.read_csv(path, usecols=usecols)
+    return from_edge_frame(df, source_col, target_col, time_col, capacity_col, default_time, default_capacity)
+
+
+def from_networkx(G, time_key="time", capacity_key="capacity", default_time=1.0, default_capacity=float("inf")):
+    """RoadNetwork from a NetworkX graph (edge attributes time_key / capacity_key, else the defaults)."""
+    rows = [(u, v, d.get(time_key, default_time), d.get(capacity_key, default_capacity))
+            for u, v, d in G.edges(data=True)]
+    df = pd.DataFrame(rows, columns=["source", "target", "time", "capacity"])
+    net = from_edge_frame(df, default_time=default_time, default_capacity=default_capacity)
+    if net.num_nodes < G.number_of_nodes():  # keep isolated nodes too
+        isolated = [n for n in G.nodes if G.degree(n) == 0]
+        net = RoadNetwork(_node_array(list(net.nodes.tolist()) + isolated), net.src, net.dst, net.time, net.capacity)
+    return net
+
+
+def load_graphml(path, time_key="time", capacity_key="capacity", length_key="length", speed_key=None,
+                 default_time=1.0, default_capacity=float("inf")):
+    """
+    RoadNetwork from a GraphML file. Edges without time_key get length / speed when both
+    length_key and speed_key attributes are present (e.g. OSM exports), else default_time.
+    """
+    G = nx.read_graphml(path)
+    for _, _, d in G.edges(data=True):
+        if time_key not in d and speed_key is not None and length_key in d and speed_key in d:
+            d[time_key] = float(d[length_key]) / float(d[speed_key])
+        for key in (time_key, capacity_key):
+            if key in d:
+                d[key] = float(d[key])
+    return from_networkx(G, time_key, capacity_key, default_time, default_capacity)
@@ -0,0 +1,164 @@
+"""
+Rolling-horizon assignment of demands that depart over time.
+
+The horizon is cut into windows of `window` time units that advance by `step` (step < window, so
+consecutive windows overlap). Each window is solved with simulated_annealing over the vehicles
+departing in it. Only vehicles departing in its first `step` time units are committed; the rest are
+re-planned by the next window, warm-started from this window's choices. Committed vehicles still on
+the road when a later window starts count as background load: each window solves against the
+residual capacity capacity - background on every edge.
+
+Candidate paths for window t+1 are generated in a helper process while window t is being solved.
+Departure times use the unit of the 'time' edge attribute (1 per edge when missing), and
+queue_sim.simulate_assignment(G, candidate_lists, state, departures) replays the result.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from src import instrumentation
+from src.annealing import simulated_annealing
+from src.graph_setup import enumerate_candidate_paths
+from src.path_index import build_path_index, gather_ranges
+
+_worker_graph = {}
+
+
+def _init_worker(G):
+    _worker_graph["G"] = G
+
+
+def _candidates_in_worker(od_pairs, k):
+    return _candidates(_worker_graph["G"], od_pairs, k)
+
+
+def _candidates(G, od_pairs, k):
+    return dict(zip(od_pairs, enumerate_candidate_paths(G, [(s, t, 0) for s, t in od_pairs], k=k)))
+
+
+def window_starts(departures, window, step):
+    """Start times of the windows covering all departures."""
+    lo, hi = float(np.min(departures)), float(np.max(departures))
+    return (lo + step * np.arange(int(np.floor((hi - lo) / step)) + 1)).tolist()
+
+
+class BackgroundLoads:
+    """Edge entries (edge id, exit time) of committed vehicles, for loads still ahead at time T."""
+
+    def __init__(self, num_edges):
+        self.num_edges = num_edges
+        self.edges = np.zeros(0, dtype=np.int64)
+        self.exit = np.zeros(0)
+
+    def add(self, index, state, departures):
+        paths = index.global_paths(state)
+        entries = gather_ranges(index.path_ptr, paths)
+        lengths = index.path_len[paths]
+        edge_time = index.time[index.path_edges[entries]]
+        vehicle = np.repeat(np.arange(len(paths)), lengths)
+        # exit time of each edge = departure + cumulative free-flow time along the path
+        start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        cum = np.cumsum(edge_time)
+        exit_time = np.asarray(departures, dtype=float)[vehicle] + cum - np.r_[0.0, cum][start]
+        self.edges = np.concatenate([self.edges, index.path_edges[entries]])
+        self.exit = np.concatenate([self.exit, exit_time])
+
+    def loads_at(self, t):
+        """Per-edge load of vehicles still on an edge after time t (does not drop anything)."""
+        return np.bincount(self.edges[self.exit > t], minlength=self.num_edges)
+
+    def prune(self, t):
+        """Forget entries that left their edge by time t; only safe for a clock that never goes back."""
+        keep = self.exit > t
+        self.edges, self.exit = self.edges[keep], self.exit[keep]
+
+
+def residual_graph(G, index, background):
+    """Copy of G whose capacities are reduced by the background load array (index edge order)."""
+    H = G.copy()
+    cap = index.capacity - background
+    nx.set_edge_attributes(H, {e: c for e, c in zip(G.edges, cap) if np.isfinite(c)}, "capacity")
+    return H
+
+
+@instrumentation.timed("solve")
+def rolling_horizon(G, demands, departures, window=10.0, step=5.0, k=3, congestion_penalty_coef=10.0,
+                    pipeline=True, seed=123, **sa_kwargs):
+    """
+    Assign every demand with one simulated_annealing call per overlapping window.
+    - departures: departure time of each demand
+    - window, step: window length and advance (step <= window); the overlap is re-planned
+    - pipeline: generate the next window's candidates in a helper process during each solve
+    - sa_kwargs: passed to simulated_annealing (episodes, temp_start, ...)
+    Returns: (state, candidate_lists, windows) with state / candidate_lists per demand and windows a
+    DataFrame with one row per window (start, vehicles, committed, background, cost, solve_s).
+    """
+    if step > window:
+        raise ValueError("step must not exceed window, or some departures are never planned")
+    departures = np.asarray(departures, dtype=float)
+    log_csv = sa_kwargs.pop("log_csv", os.devnull)
+    n = len(demands)
+    if n == 0:
+        return [], [], pd.DataFrame()
+    index_edges = build_path_index(G, [])
+    background = BackgroundLoads(index_edges.num_edges)
+    starts = window_starts(departures, window, step)
+    members = [np.flatnonzero((departures >= s) & (departures < s + window)) for s in starts]
+
+    cache = {}
+    state = [None] * n
+    planned = {}  # demand -> choice from the previous window (warm start)
+    rows = []
+    pool = ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(G,)) if pipeline else None
+
+    def request(w):
+        """Candidates still missing for window w (a future when pipelined)."""
+        od = list(dict.fromkeys((demands[i][0], demands[i][1]) for i in members[w]))
+        od = [p for p in od if p not in cache]
+        if pool is None:
+            return _candidates(G, od, k)
+        return pool.submit(_candidates_in_worker, od, k)
+
+    try:
+        pending = request(0)
+        for w, start in enumerate(starts):
+            cache.update(pending.result() if pool is not None else pending)
+            if w + 1 < len(starts):
+                pending = request(w + 1)  # overlaps with this window's solve
+
+            ids = members[w]
+            committed = ids[departures[ids] < start + step] if w + 1 < len(starts) else ids
+            if len(ids) == 0:
+                rows.append({"start": start, "vehicles": 0, "committed": 0, "background": 0,
+                             "cost": 0.0, "solve_s": 0.0})
+                continue
+            cands = [cache[(demands[i][0], demands[i][1])] for i in ids]
+            background.prune(start)  # window starts only move forward
+            bg = background.loads_at(start)
+            H = residual_graph(G, index_edges, bg)
+            warm = [planned.get(i, 0) for i in ids]
+
+            t0 = time.perf_counter()
+            choice, cost, _ = simulated_annealing(H, cands, congestion_penalty_coef=congestion_penalty_coef,
+                                                  log_csv=log_csv, seed=seed + w,
+                                                  initial_state=warm, **sa_kwargs)
+            solve_s = time.perf_counter() - t0
+
+            planned = dict(zip(ids.tolist(), choice))
+            for i in committed.tolist():
+                state[i] = planned[i]
+            pos = np.searchsorted(ids, committed)
+            window_index = build_path_index(G, [cands[p] for p in pos])
+            background.add(window_index, [choice[p] for p in pos], departures[committed])
+            rows.append({"start": start, "vehicles": len(ids), "committed": len(committed),
+                         "background": int(bg.sum()), "cost": cost, "solve_s": solve_s})
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    candidate_lists = [cache[(s, t)] for s, t, *_ in demands]
+    return state, candidate_lists, pd.DataFrame(rows)
@@ -0,0 +1,184 @@
+"""
+Online routing over the SA engine with asyncio micro-batching.
+
+Callers await RoutingService.route(origin, destination, departure). Requests are queued and
+coalesced into a batch once max_batch requests are waiting or max_wait seconds have passed since
+the first one. Each batch is assigned by a short simulated_annealing run, warm-started from the
+shortest candidates, against the residual capacity left by vehicles routed earlier and still on
+the road (rolling_horizon.BackgroundLoads). Solving runs in an executor, so the event loop keeps
+accepting requests meanwhile.
+
+    async with RoutingService(G) as service:
+        path = await service.route(3, 17, departure=0.0)
+        print(service.stats())
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src import instrumentation
+from src.annealing import simulated_annealing
+from src.graph_setup import enumerate_candidate_paths
+from src.path_index import build_path_index
+from src.rolling_horizon import BackgroundLoads, residual_graph
+
+
+class RoutingService:
+    """
+    Micro-batching route server for one graph.
+    - max_batch, max_wait: batch size cap and the longest a request waits for companions (seconds)
+    - episodes, congestion_penalty_coef: settings of the per-batch SA run
+    - executor: where batches are solved (default: one worker thread, so batches see each other's
+      loads in order)
+    - history: number of recent latencies / batch sizes kept for stats()
+    - prune_lag: background entries that left their edge more than prune_lag time units before the
+      latest batch's earliest departure are forgotten; requests departing earlier than that see
+      no load from them
+    """
+
+    def __init__(self, G, k=3, max_batch=64, max_wait=0.02, episodes=20, congestion_penalty_coef=10.0,
+                 executor=None, history=10_000, prune_lag=1000.0, seed=0):
+        self.G = G
+        self.k = k
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.episodes = episodes
+        self.congestion_penalty_coef = congestion_penalty_coef
+        self.seed = seed
+        self.prune_lag = prune_lag
+        self._clock = -np.inf
+        self._executor = executor
+        self._own_executor = executor is None
+        self._edges = build_path_index(G, [])
+        self._background = BackgroundLoads(self._edges.num_edges)
+        self._cache = {}
+        self._queue = None
+        self._worker = None
+        self._latencies = deque(maxlen=history)
+        self._batch_sizes = deque(maxlen=history)
+        self._served = 0
+
+    async def start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._batch_loop())
+        return self
+
+    async def stop(self):
+        """Finish queued requests, then stop the batcher."""
+        if self._worker is None:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+        if self._own_executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def route(self, origin, destination, departure=0.0):
+        """Path (list of nodes) assigned to one vehicle; resolves when its batch is solved."""
+        if self._worker is None:
+            raise RuntimeError("RoutingService is not running; use 'async with' or await start()")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((origin, destination, float(departure)), time.perf_counter(), future))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            requests = [req for req, _, _ in batch]
+            try:
+                paths = await loop.run_in_executor(self._executor, self._assign, requests)
+            except Exception as e:  # fail this batch's callers, keep serving
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            self._batch_sizes.append(len(batch))
+            for (_, submitted, future), path in zip(batch, paths):
+                self._latencies.append(done - submitted)
+                if not future.done():
+                    future.set_result(path)
+            self._served += len(batch)
+
+    def _assign(self, requests):
+        """Solve one batch (runs in the executor). Returns one node path per request."""
+        missing = list(dict.fromkeys((s, t) for s, t, _ in requests if (s, t) not in self._cache))
+        if missing:
+            found = enumerate_candidate_paths(self.G, [(s, t, 0) for s, t in missing], k=self.k)
+            self._cache.update(zip(missing, found))
+        cands = [self._cache[(s, t)] for s, t, _ in requests]
+        departures = np.array([d for _, _, d in requests])
+        earliest = float(departures.min())
+        self._clock = max(self._clock, earliest)
+        self._background.prune(self._clock - self.prune_lag)
+        bg = self._background.loads_at(earliest)
+        H = residual_graph(self.G, self._edges, bg)
+
+        state, _, _ = simulated_annealing(H, cands, episodes=self.episodes,
+                                          congestion_penalty_coef=self.congestion_penalty_coef,
+                                          log_csv=os.devnull, seed=self.seed + len(self._batch_sizes),
+                                          initial_state=[0] * len(cands), verbose=False)
+        self._background.add(build_path_index(self.G, cands), state, departures)
+        instrumentation.count("service_requests", len(requests))
+        return [cands[i][s] for i, s in enumerate(state)]
+
+    def stats(self):
+        """Latency percentiles (seconds) and batch sizes over the recent history."""
+        lat = np.asarray(self._latencies, dtype=float)
+        sizes = np.asarray(self._batch_sizes, dtype=float)
+        out = {"served": self._served, "batches": len(sizes)}
+        for q in (50, 90, 99):
+            out[f"latency_p{q}"] = float(np.percentile(lat, q)) if len(lat) else float("nan")
+        out["batch_size_mean"] = float(sizes.mean()) if len(sizes) else float("nan")
+        out["batch_size_max"] = int(sizes.max()) if len(sizes) else 0
+        return out
+
+
+async def route_many(service, requests):
+    """Local client: submit (origin, destination, departure) requests concurrently, paths in order."""
+    return await asyncio.gather(*(service.route(*req) for req in requests))
+
+
+if __name__ == "__main__":
+    from src.graph_setup import build_large_graph, generate_demands
+
+    async def demo():
+        G = build_large_graph(grid_size=8, seed=42)
+        demands = generate_demands(G, num_demands=300, seed=42)
+        async with RoutingService(G, max_batch=50) as service:
+            await route_many(service, [(s, t, i / 30) for i, (s, t, _) in enumerate(demands)])
+            print(service.stats())
+
+    asyncio.run(demo())
@@ -0,0 +1,193 @@
+"""
+Compiled SA move/accept loop over a PathIndex.
+
+_anneal_moves runs a block of moves on flat arrays: proposals and acceptance draws are generated
+up front with NumPy (one Generator per run), so the loop itself is deterministic arithmetic. With
+Numba installed it is JIT-compiled (nopython); otherwise the same function runs as plain Python
+over lists. Both backends consume identical draws, so a seed gives the same trajectory either way.
+
+Backend selection: the `backend` argument, else the SA_KERNEL environment variable, else "auto"
+(numba when importable, python otherwise).
+
+    kernel = AnnealKernel(index, state, congestion_penalty_coef=10.0, seed=1)
+    for temp in temps:
+        kernel.episode(temp, moves)
+    kernel.best_state, kernel.best_cost
+"""
+import math
+import os
+
+import numpy as np
+
+try:
+    import numba
+    HAVE_NUMBA = True
+except ImportError:
+    numba = None
+    HAVE_NUMBA = False
+
+BACKENDS = ("auto", "numba", "python")
+# totals slots
+TRAVEL, EXCESS, OVERLOAD, CURRENT, BEST = range(5)
+
+
+def select_backend(backend=None):
+    """Resolve 'auto' / None (SA_KERNEL env var) to 'numba' or 'python'."""
+    if backend is None:
+        backend = os.environ.get("SA_KERNEL", "auto")
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown SA kernel backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "auto":
+        return "numba" if HAVE_NUMBA else "python"
+    if backend == "numba" and not HAVE_NUMBA:
+        raise ImportError("SA kernel backend 'numba' requested but numba is not installed")
+    return backend
+
+
+def _anneal_moves(base, num_choices, path_ptr, path_edges, path_time, cap, power, coef, temp,
+                  state, loads, picks, offsets, uniforms, journal_i, journal_old, totals):
+    """
+    Run len(picks) moves in place on state / loads / totals.
+    Move k switches demand picks[k] to one of its other candidates (offsets[k] picks which) and is
+    accepted if delta <= 0 or uniforms[k] < exp(-delta / temp). Accepted moves are journaled as
+    (demand, old choice) so the caller can rebuild the best state of the block.
+    Returns (accepts, best_pos, journaled): best_pos = journal length at the last new best, or -1.
+    """
+    accepts = 0
+    journaled = 0
+    best_pos = -1
+    t = max(1e-9, temp)
+    for k in range(len(picks)):
+        i = picks[k]
+        nc = num_choices[i]
+        if nc <= 1:
+            accepts += 1
+            continue
+        cur = state[i]
+        choice = (cur + 1 + offsets[k] % (nc - 1)) % nc
+        old = base[i] + cur
+        new = base[i] + choice
+
+        d_exc = 0.0
+        d_over = 0.0
+        for p in range(path_ptr[old], path_ptr[old + 1]):
+            e = path_edges[p]
+            x = loads[e] - cap[e]
+            if x > 0:
+                d_exc += max(0.0, x - 1) ** power - x ** power
+                d_over -= min(1.0, x)
+            loads[e] -= 1
+        for p in range(path_ptr[new], path_ptr[new + 1]):
+            e = path_edges[p]
+            x = loads[e] + 1 - cap[e]
+            if x > 0:
+                d_exc += x ** power - max(0.0, x - 1) ** power
+                d_over += min(1.0, x)
+        d_travel = path_time[new] - path_time[old]
+        delta = d_travel + coef * d_exc
+
+        if delta <= 0 or uniforms[k] < math.exp(-delta / t):
+            for p in range(path_ptr[new], path_ptr[new + 1]):
+                loads[path_edges[p]] += 1
+            state[i] = choice
+            journal_i[journaled] = i
+            journal_old[journaled] = cur
+            journaled += 1
+            accepts += 1
+            totals[TRAVEL] += d_travel
+            totals[EXCESS] += d_exc
+            totals[OVERLOAD] += d_over
+            totals[CURRENT] += delta
+            if totals[CURRENT] < totals[BEST]:
+                totals[BEST] = totals[CURRENT]
+                best_pos = journaled
+        else:
+            for p in range(path_ptr[old], path_ptr[old + 1]):
+                loads[path_edges[p]] += 1
+    return accepts, best_pos, journaled
+
+
+_anneal_moves_jit = numba.njit(cache=True)(_anneal_moves) if HAVE_NUMBA else None
+
+
+class AnnealKernel:
+    """
+    SA state over a PathIndex advanced in blocks of moves by _anneal_moves.
+    - state, loads: current choices / edge loads; best_state, best_cost: best seen so far
+    - current_cost, overload: objective_cost and compute_capacity_violation of the current state
+    - backend: resolved backend name ('numba' or 'python')
+    """
+
+    def __init__(self, index, state, congestion_penalty_coef=10.0, power=2, seed=123, backend=None):
+        self.backend = select_backend(backend)
+        self.index = index
+        self.coef = float(congestion_penalty_coef)
+        self.power = power
+        self.rng = np.random.default_rng(seed)
+        state = np.asarray(state, dtype=np.int64)
+        loads = index.edge_loads(state)
+        excess = np.maximum(0.0, loads - index.capacity)
+        travel = float(np.sum(index.path_time[index.global_paths(state)]))
+        cost = travel + self.coef * float(np.sum(excess ** power))
+        totals = [travel, float(np.sum(excess ** power)), float(np.sum(excess)), cost, cost]
+        arrays = (index.demand_ptr[:-1], index.num_choices, index.path_ptr, index.path_edges,
+                  index.path_time, index.capacity)
+        if self.backend == "numba":
+            self._run = _anneal_moves_jit
+            self._arrays = tuple(np.ascontiguousarray(a) for a in arrays)
+            self._state, self._loads = state.copy(), loads.astype(np.int64)
+            self._totals = np.array(totals)
+        else:
+            self._run = _anneal_moves
+            self._arrays = tuple(a.tolist() for a in arrays)
+            self._state, self._loads = state.tolist(), loads.tolist()
+            self._totals = totals
+        self._best = np.array(state)
+
+    @property
+    def state(self):
+        return [int(s) for s in self._state]
+
+    @property
+    def loads(self):
+        return np.asarray(self._loads, dtype=np.int64)
+
+    @property
+    def best_state(self):
+        return [int(s) for s in self._best]
+
+    @property
+    def current_cost(self):
+        return float(self._totals[CURRENT])
+
+    @property
+    def best_cost(self):
+        return float(self._totals[BEST])
+
+    @property
+    def overload(self):
+        return float(self._totals[OVERLOAD])
+
+    def episode(self, temp, moves):
+        """Run `moves` moves at temperature temp; returns the number accepted."""
+        n = self.index.num_demands
+        if n == 0 or moves <= 0:
+            return 0
+        picks = self.rng.integers(0, n, moves)
+        offsets = self.rng.integers(0, 2 ** 62, moves)
+        uniforms = self.rng.random(moves)
+        journal_i = np.zeros(moves, dtype=np.int64)
+        journal_old = np.zeros(moves, dtype=np.int64)
+        if self.backend == "python":
+            picks, offsets, uniforms = picks.tolist(), offsets.tolist(), uniforms.tolist()
+            journal_i, journal_old = journal_i.tolist(), journal_old.tolist()
+        accepts, best_pos, journaled = self._run(*self._arrays, self.power, self.coef, float(temp),
+                                                 self._state, self._loads, picks, offsets, uniforms,
+                                                 journal_i, journal_old, self._totals)
+        if best_pos >= 0:
+            # best state = end state with the accepted moves after the best one undone
+            best = np.array(self._state, dtype=np.int64)
+            for j in range(journaled - 1, best_pos - 1, -1):
+                best[journal_i[j]] = journal_old[j]
+            self._best = best
+        return int(accepts)
@@ -0,0 +1,217 @@
+"""
+What-if evaluation of capacity changes and road closures against a solved baseline.
+
+A scenario is a dict of edge modifications (edges as (u, v) in either orientation):
+
+    {"name": "bridge closed", "closed": [(3, 4)]}
+    {"name": "lane works", "capacity_factor": {(3, 4): 0.5}, "time": {(4, 5): 3}}
+
+with keys 'closed', 'capacity', 'capacity_factor', 'time' and 'time_factor'.
+
+evaluate_scenarios first re-scores the baseline assignment under every scenario at once, from a
+scenarios x edges capacity / time matrix. Then each scenario is re-optimized locally: only demands
+with a candidate path on a modified edge get new candidates (their old candidates minus closed
+paths, plus detours that avoid the modified edges), and steepest_descent starts from the baseline
+choices. Candidate generation and path indexing for unaffected demands are never repeated: their
+rows of the baseline PathIndex are spliced into the scenario index.
+
+Demands left without any path by a closure are reported as 'unroutable' and excluded from both
+sides of 'delta', which compares the re-optimized cost with the baseline cost of the same
+(routable) demands.
+"""
+import time
+from itertools import islice
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from src import instrumentation
+from src.path_index import PathIndex, build_path_index, gather_ranges
+from src.polish import steepest_descent
+
+MODIFIERS = ("closed", "capacity", "capacity_factor", "time", "time_factor")
+
+
+def _edge_key(u, v):
+    return tuple(sorted((u, v)))
+
+
+def scenario_matrices(index, scenarios):
+    """
+    (capacity, time, closed): scenarios x edges arrays in index edge order, starting from the
+    baseline values. Closed edges get capacity 0 (their baseline time is kept).
+    """
+    edge_id = {e: j for j, e in enumerate(index.edges)}
+    S = len(scenarios)
+    capacity = np.tile(index.capacity, (S, 1))
+    times = np.tile(index.time, (S, 1))
+    closed = np.zeros((S, index.num_edges), dtype=bool)
+    for s, scenario in enumerate(scenarios):
+        unknown = set(scenario) - set(MODIFIERS) - {"name"}
+        if unknown:
+            raise ValueError(f"unknown scenario keys {sorted(unknown)}; expected {MODIFIERS}")
+
+        def ids(edges):
+            try:
+                return [edge_id[_edge_key(*e)] for e in edges]
+            except KeyError as e:
+                raise KeyError(f"scenario {scenario.get('name', s)!r} modifies missing edge {e}") from None
+
+        for key, target, combine in (("capacity", capacity, lambda old, x: x),
+                                     ("capacity_factor", capacity, lambda old, x: old * x),
+                                     ("time", times, lambda old, x: x),
+                                     ("time_factor", times, lambda old, x: old * x)):
+            mods = scenario.get(key, {})
+            cols = ids(mods)
+            target[s, cols] = combine(target[s, cols], np.array(list(mods.values()), dtype=float))
+        cols = ids(scenario.get("closed", []))
+        closed[s, cols] = True
+        capacity[s, cols] = 0.0
+    return capacity, times, closed
+
+
+def rescore(index, state, capacity, times, congestion_penalty_coef=10.0, power=2):
+    """
+    Cost of one assignment under every row of scenario capacity / time matrices (vectorized).
+    Returns a dict of per-scenario arrays: travel, penalty, cost, overload.
+    """
+    loads = index.edge_loads(state).astype(float)
+    excess = np.maximum(0.0, loads[None, :] - capacity)
+    travel = times @ loads
+    penalty = congestion_penalty_coef * np.sum(excess ** power, axis=1)
+    return {"travel": travel, "penalty": penalty, "cost": travel + penalty, "overload": excess.sum(axis=1)}
+
+
+def scenario_graph(G, scenario):
+    """Copy of G with the scenario applied (closed edges removed)."""
+    H = G.copy()
+    for key in ("capacity", "capacity_factor", "time", "time_factor"):
+        attr = key.split("_")[0]
+        for (u, v), x in scenario.get(key, {}).items():
+            if key.endswith("_factor"):
+                default = float("inf") if attr == "capacity" else 1
+                H.edges[u, v][attr] = H.edges[u, v].get(attr, default) * x
+            else:
+                H.edges[u, v][attr] = x
+    H.remove_edges_from(scenario.get("closed", []))
+    return H
+
+
+def affected_demands(index, edge_mask):
+    """Demands with at least one candidate path using an edge in the boolean edge_mask."""
+    entry_path = np.repeat(np.arange(index.num_paths), index.path_len)
+    hit_paths = np.unique(entry_path[edge_mask[index.path_edges]])
+    return np.unique(index.path_demand[hit_paths])
+
+
+def _detours(H, scenario, od_pairs, k):
+    """
+    Up to k shortest paths per OD pair in the scenario graph H (scenario_graph, closed edges gone)
+    avoiding every other modified edge.
+    """
+    avoid = {_edge_key(u, v) for key in MODIFIERS if key != "closed" for u, v in scenario.get(key, {})}
+    H = H.copy()
+    H.remove_edges_from([e for e in H.edges if _edge_key(*e) in avoid])
+    out = {}
+    for s, t in od_pairs:
+        try:
+            out[(s, t)] = list(islice(nx.shortest_simple_paths(H, s, t), k))
+        except (nx.NetworkXNoPath, nx.NodeNotFound):
+            out[(s, t)] = []
+    return out
+
+
+def _subset_cost(index, state, demands, congestion_penalty_coef=10.0, power=2):
+    """Cost of the given demands' chosen paths alone (the other demands put no load on the network)."""
+    paths = index.global_paths(state)[demands]
+    loads = np.bincount(index.path_edges[gather_ranges(index.path_ptr, paths)], minlength=index.num_edges)
+    return float(index.path_time[paths].sum()) + index.penalty(loads, congestion_penalty_coef, power)
+
+
+def _splice_index(index, hit_index, hit, keep, capacity, times):
+    """
+    PathIndex of the demands in keep under one scenario's capacity / time row: demands in hit take
+    their paths from hit_index (built over the same edges, one demand per entry of hit), the
+    others reuse their rows of index.
+    """
+    first = index.demand_ptr[:-1].copy()
+    count = index.num_choices.copy()
+    first[hit] = index.num_paths + hit_index.demand_ptr[:-1]
+    count[hit] = hit_index.num_choices
+    pool_ptr = np.r_[index.path_ptr, index.path_ptr[-1] + hit_index.path_ptr[1:]]
+    pool_edges = np.r_[index.path_edges, hit_index.path_edges]
+    count = count[keep]
+    rows = np.repeat(first[keep], count) + (np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count))
+    path_ptr = np.r_[0, np.cumsum(np.diff(pool_ptr)[rows])]
+    return PathIndex(index.edges, capacity, times, np.r_[0, np.cumsum(count)], path_ptr,
+                     pool_edges[gather_ranges(pool_ptr, rows)])
+
+
+@instrumentation.timed("scenarios")
+def evaluate_scenarios(G, candidate_lists, state, scenarios, congestion_penalty_coef=10.0, power=2, k=3,
+                       reoptimize=True, max_iters=1000):
+    """
+    Compare a solved baseline (candidate_lists, state) with every scenario.
+    Returns a DataFrame with one row per scenario (plus a 'baseline' row first):
+      changed_edges, affected (demands with a candidate on a changed edge), stranded (baseline
+      vehicles on closed edges), rescored_cost (baseline assignment under the scenario),
+      reoptimized_cost (routable demands), baseline_cost (the same demands in the baseline),
+      delta (reoptimized_cost - baseline_cost), moved (demands changing path), unroutable
+      (demands with no path left, excluded from the costs), overload (after re-optimization), solve_s.
+    """
+    index = build_path_index(G, candidate_lists)
+    state = np.asarray(state, dtype=np.int64)
+    capacity, times, closed = scenario_matrices(index, scenarios)
+    scores = rescore(index, state, capacity, times, congestion_penalty_coef, power)
+    base_cost = index.cost(state, congestion_penalty_coef, power)
+    base_loads = index.edge_loads(state)
+    changed = (capacity != index.capacity) | (times != index.time) | closed
+
+    rows = [{"scenario": "baseline", "changed_edges": 0, "affected": 0, "stranded": 0,
+             "rescored_cost": base_cost, "reoptimized_cost": base_cost, "baseline_cost": base_cost,
+             "delta": 0.0, "moved": 0,
+             "unroutable": 0, "overload": float(np.maximum(0.0, base_loads - index.capacity).sum()),
+             "solve_s": 0.0}]
+    for s, scenario in enumerate(scenarios):
+        t0 = time.perf_counter()
+        row = {"scenario": scenario.get("name", f"scenario_{s}"), "changed_edges": int(changed[s].sum()),
+               "stranded": int(base_loads[closed[s]].sum()), "rescored_cost": float(scores["cost"][s])}
+        hit = affected_demands(index, changed[s])
+        row["affected"] = len(hit)
+        if not reoptimize:
+            rows.append(row)
+            continue
+
+        od = {i: (candidate_lists[i][0][0], candidate_lists[i][0][-1]) for i in hit.tolist()}
+        detours = _detours(scenario_graph(G, scenario), scenario, set(od.values()), k) if od else {}
+        closed_edges = {index.edges[j] for j in np.flatnonzero(closed[s])}
+        lists = list(candidate_lists)
+        start = state.copy()
+        for i in hit.tolist():
+            kept = [p for p in candidate_lists[i]
+                    if not any(_edge_key(u, v) in closed_edges for u, v in zip(p[:-1], p[1:]))]
+            new = kept + [p for p in detours[od[i]] if p not in kept]
+            chosen = candidate_lists[i][state[i]]
+            lists[i] = new
+            start[i] = new.index(chosen) if chosen in new else 0
+        routable = np.array([len(P) > 0 for P in lists])
+        keep = np.flatnonzero(routable)
+
+        hit_index = build_path_index(G, [lists[i] for i in hit.tolist()])
+        sub_index = _splice_index(index, hit_index, hit, keep, capacity[s], times[s])
+        new_state, cost, loads = steepest_descent(sub_index, start[keep], congestion_penalty_coef, power, max_iters)
+        old_paths = [candidate_lists[i][state[i]] for i in keep]
+        kept_base = _subset_cost(index, state, keep, congestion_penalty_coef, power)
+        row.update({
+            "reoptimized_cost": cost,
+            "baseline_cost": kept_base,
+            "delta": cost - kept_base,
+            "moved": sum(lists[i][c] != p for i, c, p in zip(keep.tolist(), new_state.tolist(), old_paths)),
+            "unroutable": int((~routable).sum()),
+            "overload": float(np.maximum(0.0, loads - sub_index.capacity).sum()),
+            "solve_s": time.perf_counter() - t0,
+        })
+        rows.append(row)
+    instrumentation.count("scenarios_evaluated", len(scenarios))
+    return pd.DataFrame(rows)
@@ -0,0 +1,185 @@
+"""
+Instances in named shared memory for process-pool workers.
+
+share_arrays copies a dict of NumPy arrays into one multiprocessing.shared_memory block. The
+resulting SharedArrays pickles as its handle (block name + layout), so passing it to a pool
+initializer, run_sweep's build_instance or a submitted task ships a few hundred bytes, and each
+worker maps the same pages instead of receiving its own copy:
+
+    with share_path_index(build_path_index(G, candidate_lists)) as shared:
+        with ProcessPoolExecutor(initializer=init, initargs=(shared,)) as pool:
+            ...  # in the worker: shared.index is a PathIndex over the shared block
+
+The process that created the block owns it: close() on exit of the with-block unlinks it (and an
+atexit hook does so if it is never closed). Attached copies only unmap.
+"""
+import atexit
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.path_index import PathIndex
+
+_ALIGN = 64
+_INDEX_ARRAYS = ("capacity", "time", "demand_ptr", "path_ptr", "path_edges",
+                 "num_choices", "path_demand", "path_len", "path_time")
+_NETWORK_ARRAYS = ("nodes", "src", "dst", "time", "capacity", "indptr", "indices", "adj_edge")
+
+
+class SharedArrays:
+    """
+    NumPy arrays living in one named shared-memory block.
+    - arrays: dict of read-only views into the block
+    - meta: small picklable extras stored inside the block (e.g. edge labels)
+    - kind: 'arrays', 'path_index' or 'road_network' (selects the .index / .network views)
+    """
+
+    def __init__(self, shm, layout, kind, owner):
+        self._shm = shm
+        self.layout = layout
+        self.kind = kind
+        self.owner = owner
+        self.arrays = {}
+        for name, (offset, dtype, shape) in layout.items():
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            self.arrays[name] = view
+        self._cache = {}
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def handle(self):
+        return self._shm.name, self.layout, self.kind
+
+    @property
+    def meta(self):
+        if "meta" not in self._cache:
+            blob = self.arrays.get("_meta")
+            self._cache["meta"] = pickle.loads(blob.tobytes()) if blob is not None else None
+        return self._cache["meta"]
+
+    @property
+    def index(self):
+        """PathIndex whose arrays are views of the shared block (kind 'path_index')."""
+        if "index" not in self._cache:
+            index = PathIndex.__new__(PathIndex)
+            for name in _INDEX_ARRAYS:
+                setattr(index, name, self.arrays[name])
+            index.edges = self.meta
+            index.num_edges = len(index.capacity)
+            index.num_demands = len(index.demand_ptr) - 1
+            index.num_paths = len(index.path_ptr) - 1
+            self._cache["index"] = index
+        return self._cache["index"]
+
+    @property
+    def network(self):
+        """RoadNetwork whose arrays are views of the shared block (kind 'road_network')."""
+        if "network" not in self._cache:
+            from src.road_network import RoadNetwork
+            self._cache["network"] = RoadNetwork(**{name: self.arrays[name] for name in _NETWORK_ARRAYS})
+        return self._cache["network"]
+
+    def __reduce__(self):
+        return attach, (self.handle,)
+
+    def close(self):
+        """Drop the views and unmap the block; the owner also unlinks it."""
+        if self._shm is None:
+            return
+        if self.owner:
+            atexit.unregister(self.close)
+        self.arrays.clear()
+        self._cache.clear()
+        shm, self._shm = self._shm, None
+        try:
+            shm.close()
+        except BufferError:  # a caller still holds a view; the mapping goes away with the process
+            pass
+        if self.owner:
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def share_arrays(arrays, meta=None, kind="arrays"):
+    """Copy a dict of arrays (and optional picklable meta) into a new shared-memory block."""
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    if meta is not None:
+        arrays["_meta"] = np.frombuffer(pickle.dumps(meta), dtype=np.uint8)
+    layout, offset = {}, 0
+    for name, a in arrays.items():
+        layout[name] = (offset, a.dtype.str, a.shape)
+        offset += -(-a.nbytes // _ALIGN) * _ALIGN
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, a in arrays.items():
+        start = layout[name][0]
+        shm.buf[start:start + a.nbytes] = a.tobytes()
+    shared = SharedArrays(shm, layout, kind, owner=True)
+    atexit.register(shared.close)
+    return shared
+
+
+def attach(handle):
+    """Map an existing block by handle (what a SharedArrays unpickles to in a worker)."""
+    name, layout, kind = handle
+    shm = shared_memory.SharedMemory(name=name)
+    return SharedArrays(shm, layout, kind, owner=False)
+
+
+def share_path_index(index):
+    """Put a PathIndex (edge arrays, path CSR, times, capacities) in shared memory."""
+    return share_arrays({name: getattr(index, name) for name in _INDEX_ARRAYS}, meta=index.edges,
+                        kind="path_index")
+
+
+def share_road_network(net):
+    """Put a RoadNetwork (edge arrays and CSR adjacency) in shared memory."""
+    return share_arrays({name: getattr(net, name) for name in _NETWORK_ARRAYS}, kind="road_network")
+
+
+_worker_shared = {}
+
+
+def _init_worker(shared):
+    _worker_shared["shared"] = shared
+
+
+def worker_shared():
+    """The SharedArrays a shared_pool worker was started with."""
+    return _worker_shared["shared"]
+
+
+def shared_pool(shared, workers=None):
+    """ProcessPoolExecutor whose workers attach to `shared` once at start-up (see worker_shared)."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,))
+
+
+def _candidate_chunk(od_pairs, k):
+    from src.graph_setup import enumerate_candidate_paths
+    cache = _worker_shared.setdefault("graph", {})
+    if "G" not in cache:
+        # NetworkX's k-shortest paths needs a graph object; build it once per worker
+        cache["G"] = worker_shared().network.to_networkx()
+    return enumerate_candidate_paths(cache["G"], [(s, t, 0) for s, t in od_pairs], k=k)
+
+
+def parallel_candidate_paths(shared_network, demands, k=3, workers=None, chunksize=256):
+    """
+    enumerate_candidate_paths over a shared RoadNetwork, demands split across a shared_pool.
+    Returns candidate lists in demand order, as enumerate_candidate_paths does.
+    """
+    od_pairs = [(d[0], d[1]) for d in demands]
+    chunks = [od_pairs[i:i + chunksize] for i in range(0, len(od_pairs), chunksize)]
+    with shared_pool(shared_network, workers) as pool:
+        parts = pool.map(_candidate_chunk, chunks, [k] * len(chunks))
+        return [P for part in parts for P in part]
@@ -0,0 +1,196 @@
+"""
+Parallel, resumable parameter sweeps.
+
+Cells that share an instance (graph, demands, candidate paths, optional QUBO) are grouped by the
+values of `instance_params`; each instance is built once in the parent and shipped to every worker
+process once, at pool start-up. Every finished cell is persisted as JSON under out_dir, keyed by
+its params and a fingerprint of its instance, so a rerun after a crash only executes the missing
+cells and a changed build_instance does not pick up stale results.
+
+With share_index=True, instances shaped (G, candidate_lists, *rest) reach the workers as
+(SharedArrays, None, *rest): the parent puts one PathIndex per instance in shared memory
+(shared_instance.share_path_index) and workers map it instead of unpickling the graph and paths.
+run_sa_cell accepts both shapes.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import pandas as pd
+
+from src.annealing import compute_capacity_violation, simulated_annealing
+from src.path_index import build_path_index
+from src.queue_sim import simulate, summarize
+from src.shared_instance import SharedArrays, share_path_index
+
+_worker_instances = {}
+
+
+def expand_grid(grid):
+    """{'penalty': [1, 5], 'episodes': [60]} -> [{'penalty': 1, 'episodes': 60}, {'penalty': 5, ...}]"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[n] for n in names))]
+
+
+def cell_id(params, fingerprint=None):
+    """Stable file-name-safe id of a parameter cell (and of the instance it runs on, if given)."""
+    key = params if fingerprint is None else {"params": params, "instance": fingerprint}
+    blob = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def instance_key(params, instance_params):
+    return tuple((name, params.get(name)) for name in instance_params)
+
+
+def instance_fingerprint(instance):
+    """
+    Cheap summary of a built (G, candidate_lists, *rest) instance for the cell cache key: node /
+    edge / demand / path counts, summed edge capacity and time, a digest of the demand OD pairs and
+    any scalar extras. None for other instance shapes.
+    """
+    if not isinstance(instance, tuple) or len(instance) < 2 or not hasattr(instance[0], "number_of_edges"):
+        return None
+    G, candidate_lists, *rest = instance
+    od = [[P[0][0], P[0][-1]] if len(P) else None for P in candidate_lists]
+    return {
+        "nodes": G.number_of_nodes(),
+        "edges": G.number_of_edges(),
+        "capacity": G.size(weight="capacity"),
+        "time": G.size(weight="time"),
+        "demands": len(candidate_lists),
+        "paths": sum(len(P) for P in candidate_lists),
+        "od": hashlib.sha1(json.dumps(od, default=str).encode()).hexdigest()[:16],
+        "extra": [x for x in rest if isinstance(x, (bool, int, float, str))],
+    }
+
+
+def _init_worker(instances):
+    _worker_instances.clear()
+    _worker_instances.update(instances)
+
+
+def _run_in_worker(run_cell, key, params):
+    return run_cell(_worker_instances[key], params)
+
+
+def _save_cell(out_dir, cid, params, result):
+    path = os.path.join(out_dir, f"{cid}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"params": params, "result": result}, f, default=float)
+    os.replace(tmp, path)  # never leave a half-written cell behind
+
+
+def _load_cell(out_dir, cid):
+    path = os.path.join(out_dir, f"{cid}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["result"]
+
+
+def run_sweep(cells, build_instance, run_cell, instance_params=(), out_dir="results/sweeps/sweep",
+              workers=None, share_index=False):
+    """
+    Run run_cell(instance, params) for every params dict in cells.
+    - build_instance(params) -> shared artifacts, called once per distinct instance key
+      (the values of instance_params), also on resume: finished cells are cached under their
+      params plus instance_fingerprint(instance), so changed instances are rerun
+    - run_cell must be a module-level function returning a dict of results
+    - workers: process count (None = os.cpu_count(), 0 or 1 = run in this process)
+    - share_index: ship (G, candidate_lists, *rest) instances to pool workers as a shared-memory
+      PathIndex (run_cell then gets (SharedArrays, None, *rest); see run_sa_cell)
+    Returns: DataFrame with one row per cell (params columns followed by result columns),
+    in the order of `cells`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # instances are built up front (also for finished cells) so the cache key can include them
+    instances, fingerprints = {}, {}
+    for params in cells:
+        key = instance_key(params, instance_params)
+        if key not in instances:
+            instances[key] = build_instance(params)
+            fingerprints[key] = instance_fingerprint(instances[key])
+    ids = [cell_id(params, fingerprints[instance_key(params, instance_params)]) for params in cells]
+
+    results = {}
+    pending = []
+    for cid, params in zip(ids, cells):
+        done = _load_cell(out_dir, cid)
+        if done is not None:
+            results[cid] = done
+        else:
+            pending.append((cid, params))
+    if cells:
+        print(f"[sweep] {len(cells) - len(pending)}/{len(cells)} cells already done in {out_dir}")
+    needed = {instance_key(params, instance_params) for _, params in pending}
+    instances = {key: inst for key, inst in instances.items() if key in needed}
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if pending and workers <= 1:
+        for cid, params in pending:
+            result = run_cell(instances[instance_key(params, instance_params)], params)
+            _save_cell(out_dir, cid, params, result)
+            results[cid] = result
+    elif pending:
+        shared = {}
+        try:
+            if share_index:
+                for key, (G, candidate_lists, *rest) in instances.items():
+                    shared[key] = share_path_index(build_path_index(G, candidate_lists))
+                    instances[key] = (shared[key], None, *rest)
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_worker,
+                                     initargs=(instances,)) as pool:
+                futures = {
+                    pool.submit(_run_in_worker, run_cell, instance_key(p, instance_params), p): (cid, p)
+                    for cid, p in pending
+                }
+                for fut in as_completed(futures):
+                    cid, params = futures[fut]
+                    result = fut.result()
+                    _save_cell(out_dir, cid, params, result)
+                    results[cid] = result
+        finally:
+            for block in shared.values():
+                block.close()
+
+    rows = [{**params, **results[cid]} for cid, params in zip(ids, cells)]
+    return pd.DataFrame(rows)
+
+
+def run_sa_cell(instance, params):
+    """
+    Generic SA cell for instances shaped (G, candidate_lists, ...) or (SharedArrays, None, ...).
+    Reads episodes / moves_per_episode / penalty / temp_start / temp_end / seed / log_csv from params.
+    With params['simulate'] set, the best state is also replayed in queue_sim (all vehicles departing
+    at once) and its summary is added as sim_* columns.
+    """
+    G, candidate_lists = instance[0], instance[1]
+    index = None
+    if isinstance(G, SharedArrays):
+        index, G = G.index, None
+    state, best_cost, _ = simulated_annealing(
+        G, candidate_lists,
+        episodes=params.get("episodes", 80),
+        temp_start=params.get("temp_start", 50.0),
+        temp_end=params.get("temp_end", 0.5),
+        moves_per_episode=params.get("moves_per_episode"),
+        congestion_penalty_coef=params.get("penalty", 10.0),
+        log_csv=params.get("log_csv", "sa_log.csv"),
+        seed=params.get("seed", 123),
+        index=index,
+    )
+    if index is None:
+        violations = compute_capacity_violation(G, [candidate_lists[i][s] for i, s in enumerate(state)])
+        index = build_path_index(G, candidate_lists) if params.get("simulate") else None
+    else:
+        violations = index.penalty(index.edge_loads(state), 1.0, 1)
+    result = {"best_cost": best_cost, "violations": violations}
+    if params.get("simulate"):
+        sim = summarize(simulate(index, state))
+        result.update({f"sim_{k}": v for k, v in sim.items()})
+    return result
@@ -0,0 +1,185 @@
+"""
+Successive-halving / Hyperband tuning of simulated_annealing settings.
+
+Many configurations get a small episode budget; the best 1/eta of them move on to eta times the
+budget, until max_episodes. Configurations are scored penalty-independently: first by capacity
+violations, then by objective_cost at a fixed reference penalty. Trials are written in the
+param_grid summary shape (episodes, moves_per_episode, penalty, best_cost, violations, ...).
+"""
+import math
+import os
+import random
+import tempfile
+
+import pandas as pd
+
+from src.annealing import compute_capacity_violation, simulated_annealing
+from src.formulation import objective_cost
+from src.sweep import run_sweep
+
+DEFAULT_SPACE = {
+    "penalty": [1.0, 5.0, 10.0, 25.0, 50.0],
+    "temp_start": (5.0, 200.0),
+    "temp_end": (0.05, 2.0),
+    "moves_factor": [0.25, 0.5, 1.0, 2.0],
+}
+
+SUMMARY_COLUMNS = ["episodes", "moves_per_episode", "penalty", "best_cost", "violations"]
+
+
+def sample_configs(space, n, seed=0):
+    """n random configurations: list values are sampled uniformly, (lo, hi) tuples log-uniformly."""
+    rnd = random.Random(seed)
+    configs = []
+    for _ in range(n):
+        cfg = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                lo, hi = values
+                cfg[name] = math.exp(rnd.uniform(math.log(lo), math.log(hi)))
+            else:
+                cfg[name] = rnd.choice(values)
+        configs.append(cfg)
+    return configs
+
+
+def _trial_cell(instance, params):
+    G, candidate_lists, score_penalty = instance
+    moves = params.get("moves_per_episode")
+    state, best_cost, _ = simulated_annealing(
+        G, candidate_lists,
+        episodes=params["episodes"],
+        temp_start=params.get("temp_start", 50.0),
+        temp_end=params.get("temp_end", 0.5),
+        moves_per_episode=moves,
+        congestion_penalty_coef=params.get("penalty", 10.0),
+        log_csv=os.devnull,
+        seed=params.get("seed", 123),
+    )
+    violations = compute_capacity_violation(G, [candidate_lists[i][s] for i, s in enumerate(state)])
+    score = objective_cost(G, candidate_lists, state, score_penalty)
+    return {"best_cost": best_cost, "violations": violations, "score": score}
+
+
+def successive_halving(G, candidate_lists, configs, min_episodes=10, max_episodes=200, eta=3,
+                       score_penalty=10.0, workers=None, out_dir=None, seed=123):
+    """
+    Run successive halving over configs (dicts of SA settings; 'moves_factor' is scaled by the
+    number of demands into moves_per_episode).
+    Returns: (best_config, trials DataFrame with one row per (config, rung)).
+    """
+    if out_dir is None:
+        with tempfile.TemporaryDirectory(prefix="sh_") as tmp:
+            return successive_halving(G, candidate_lists, configs, min_episodes, max_episodes, eta,
+                                      score_penalty, workers, tmp, seed)
+    n = len(candidate_lists)
+    survivors = []
+    for trial, cfg in enumerate(configs):
+        cfg = dict(cfg)
+        if "moves_factor" in cfg:
+            cfg["moves_per_episode"] = max(1, int(round(cfg.pop("moves_factor") * n)))
+        cfg.setdefault("moves_per_episode", max(1, n // 2))
+        cfg["trial"] = trial
+        cfg["seed"] = seed
+        survivors.append(cfg)
+
+    instance = (G, candidate_lists, score_penalty)
+    frames = []
+    budget, rung = min_episodes, 0
+    while survivors:
+        cells = [{**cfg, "episodes": budget, "rung": rung} for cfg in survivors]
+        df = run_sweep(cells, lambda params: instance, _trial_cell, out_dir=out_dir, workers=workers)
+        frames.append(df)
+        if budget >= max_episodes or len(survivors) == 1:
+            break
+        ranked = df.sort_values(["violations", "score"], kind="stable")
+        keep = set(ranked["trial"].head(max(1, len(survivors) // eta)))
+        survivors = [cfg for cfg in survivors if cfg["trial"] in keep]
+        budget, rung = min(max_episodes, budget * eta), rung + 1
+
+    trials = pd.concat(frames, ignore_index=True)
+    trials = trials[SUMMARY_COLUMNS + [c for c in trials.columns if c not in SUMMARY_COLUMNS]]
+    final = trials[trials["rung"] == trials["rung"].max()].sort_values(["violations", "score"], kind="stable")
+    winner = next(cfg for cfg in survivors if cfg["trial"] == final["trial"].iloc[0])
+    best_config = {k: v for k, v in winner.items() if k not in ("trial", "seed")}
+    best_config["episodes"] = budget
+    return best_config, trials
+
+
+def hyperband(G, candidate_lists, space=DEFAULT_SPACE, min_episodes=10, max_episodes=270, eta=3,
+              score_penalty=10.0, workers=None, out_dir=None, seed=0):
+    """
+    Hyperband: successive halving brackets trading number of configurations for starting budget.
+    Bracket s starts at min_episodes * eta ** (s_max - s) episodes, so the most aggressive bracket
+    starts at min_episodes and the last one at (close to) max_episodes.
+    Returns: (best_config, trials DataFrame with a 'bracket' column).
+    """
+    s_max = max(0, int(math.floor(math.log(max_episodes / min_episodes, eta) + 1e-9)))
+    frames = []
+    best = None
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        configs = sample_configs(space, n, seed=seed + s)
+        bracket_dir = None if out_dir is None else os.path.join(out_dir, f"bracket{s}")
+        cfg, trials = successive_halving(G, candidate_lists, configs,
+                                         min_episodes=min(max_episodes, min_episodes * eta ** (s_max - s)),
+                                         max_episodes=max_episodes,
+                                         eta=eta, score_penalty=score_penalty, workers=workers,
+                                         out_dir=bracket_dir)
+        trials["bracket"] = s
+        frames.append(trials)
+        final = trials[trials["rung"] == trials["rung"].max()].sort_values(["violations", "score"])
+        row = final.iloc[0]
+        if best is None or (row["violations"], row["score"]) < best[0]:
+            best = ((row["violations"], row["score"]), cfg)
+    return best[1], pd.concat(frames, ignore_index=True)
+
+
+def instance_class(G, candidate_lists):
+    """Coarse instance class: power-of-two buckets of nodes, demands and candidates per demand."""
+    def bucket(x):
+        return 1 << max(0, math.ceil(math.log2(max(1, x))))
+    k = max((len(P) for P in candidate_lists), default=0)
+    return f"nodes<={bucket(G.number_of_nodes())}/demands<={bucket(len(candidate_lists))}/k<={k}"
+
+
+def recommend_settings(instances, space=DEFAULT_SPACE, n_configs=27, min_episodes=10, max_episodes=270,
+                       eta=3, score_penalty=10.0, workers=None, trials_csv=None, seed=0):
+    """
+    Tune on every (G, candidate_lists) instance and recommend one configuration per instance class
+    (the configuration that won most often within the class; ties go to the first instance).
+    Returns: (dict class -> config, trials DataFrame with an 'instance_class' column).
+    """
+    wins = {}
+    frames = []
+    for j, (G, candidate_lists) in enumerate(instances):
+        cls = instance_class(G, candidate_lists)
+        configs = sample_configs(space, n_configs, seed=seed + j)
+        cfg, trials = successive_halving(G, candidate_lists, configs, min_episodes, max_episodes, eta,
+                                         score_penalty=score_penalty, workers=workers)
+        trials["instance_class"] = cls
+        trials["instance"] = j
+        frames.append(trials)
+        wins.setdefault(cls, []).append(cfg)
+
+    recommended = {}
+    for cls, cfgs in wins.items():
+        keys = [tuple(sorted(c.items())) for c in cfgs]
+        recommended[cls] = dict(max(keys, key=keys.count))
+    trials = pd.concat(frames, ignore_index=True)
+    if trials_csv is not None:
+        trials.to_csv(trials_csv, index=False)
+    return recommended, trials
+
+
+if __name__ == "__main__":
+    from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+
+    instances = []
+    for grid_size, num_demands in [(4, 20), (6, 40)]:
+        G = build_large_graph(grid_size=grid_size, seed=42)
+        demands = generate_demands(G, num_demands=num_demands, seed=42)
+        instances.append((G, enumerate_candidate_paths(G, demands, k=3)))
+    recommended, trials = recommend_settings(instances, trials_csv="tuning_summary.csv")
+    for cls, cfg in recommended.items():
+        print(cls, cfg)
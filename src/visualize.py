@@ -1,36 +1,159 @@
+import hashlib
+import os
+
 import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection
 from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+
+from src import instrumentation
+
+# above this many nodes / edges, labels are decimated to the most loaded edges (or skipped)
+LABEL_THRESHOLD = 200
+# spring_layout is O(n^2) per iteration; bigger graphs without coordinates use spectral_layout
+SPRING_MAX_NODES = 1000
+
+_layout_cache = {}
+
+
+def graph_fingerprint(G):
+    """Hash of the node list and edge list, the key layouts are cached under."""
+    h = hashlib.sha1()
+    h.update(repr(list(G.nodes)).encode())
+    h.update(repr(list(G.edges)).encode())
+    return h.hexdigest()[:16]
+
+
+def node_coordinates(G):
+    """(nodes x 2) coordinates from node attributes 'pos' or 'x'/'y' (geographic), or None."""
+    data = list(G.nodes(data=True))
+    if data and all("pos" in d for _, d in data):
+        return np.array([d["pos"] for _, d in data], dtype=float)
+    if data and all("x" in d and "y" in d for _, d in data):
+        return np.array([(d["x"], d["y"]) for _, d in data], dtype=float)
+    return None
+
+
+@instrumentation.timed("layout")
+def graph_layout(G, cache_dir=None, seed=42):
+    """
+    (nodes x 2) coordinates in G.nodes order.
+    Uses node coordinates when present, else spring_layout (spectral_layout above
+    SPRING_MAX_NODES). Computed layouts are cached in memory per graph_fingerprint, and as
+    <cache_dir>/<fingerprint>.npy when cache_dir is given.
+    """
+    coords = node_coordinates(G)
+    if coords is not None:
+        return coords
+    key = graph_fingerprint(G)
+    if key in _layout_cache:
+        return _layout_cache[key]
+    path = None if cache_dir is None else os.path.join(cache_dir, f"{key}.npy")
+    if path is not None and os.path.exists(path):
+        coords = np.load(path)
+    else:
+        if G.number_of_nodes() <= SPRING_MAX_NODES:
+            pos = nx.spring_layout(G, seed=seed)
+        else:
+            pos = nx.spectral_layout(G)
+        coords = np.array([pos[n] for n in G.nodes], dtype=float)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, coords)
+    _layout_cache[key] = coords
+    return coords
+
+
+def edge_load_array(G, loads):
+    """Loads in G.edges order from a {tuple(sorted(edge)): load} dict (or an array, returned as is)."""
+    if loads is None:
+        return np.zeros(G.number_of_edges())
+    if isinstance(loads, dict):
+        return np.array([loads.get(tuple(sorted((u, v))), loads.get((u, v), 0)) for u, v in G.edges], dtype=float)
+    return np.asarray(loads, dtype=float)
+
+
+def path_loads(G, paths):
+    """Per-edge load array (G.edges order) of a list of node paths."""
+    edge_id = {}
+    for j, (u, v) in enumerate(G.edges):
+        edge_id[(u, v)] = edge_id[(v, u)] = j
+    ids = [edge_id[(u, v)] for path in paths for u, v in zip(path[:-1], path[1:])]
+    return np.bincount(np.asarray(ids, dtype=np.int64), minlength=G.number_of_edges()).astype(float)
+
+
+@instrumentation.timed("render")
+def draw_loads(G, loads=None, ax=None, pos=None, cmap="viridis", width=2.0, node_size=None,
+               label_threshold=LABEL_THRESHOLD, colorbar=True, title=None, cache_dir=None):
+    """
+    Draw G with every edge in one LineCollection colored by its load.
+    - loads: {tuple(sorted(edge)): load} dict or array in G.edges order
+    - pos: (nodes x 2) coordinates (default graph_layout(G, cache_dir))
+    Node labels are drawn up to label_threshold nodes; edge load labels for every edge up to
+    label_threshold edges, beyond that only for the label_threshold most loaded edges.
+    Returns the Axes.
+    """
+    if ax is None:
+        ax = plt.gca()
+    coords = graph_layout(G, cache_dir) if pos is None else np.asarray(pos, dtype=float)
+    node_idx = {n: i for i, n in enumerate(G.nodes)}
+    ends = np.array([(node_idx[u], node_idx[v]) for u, v in G.edges], dtype=np.int64).reshape(-1, 2)
+    values = edge_load_array(G, loads)
+
+    norm = Normalize(vmin=values.min() if len(values) else 0.0, vmax=values.max() if len(values) else 1.0)
+    lines = LineCollection(coords[ends], array=values, cmap=cmap, norm=norm, linewidths=width, zorder=1)
+    ax.add_collection(lines)
+
+    n = len(coords)
+    if node_size is None:
+        node_size = 300 if n <= label_threshold else max(1.0, 3000.0 / n)
+    ax.scatter(coords[:, 0], coords[:, 1], s=node_size, c="lightgrey", edgecolors="black",
+               linewidths=0.5 if n <= label_threshold else 0.0, zorder=2)
+    if n <= label_threshold:
+        for node, (x, y) in zip(G.nodes, coords):
+            ax.text(x, y, str(node), ha="center", va="center", fontsize=8, zorder=3)
+
+    if loads is not None and len(values):
+        labelled = np.arange(len(values))
+        if len(values) > label_threshold:
+            labelled = np.argsort(values, kind="stable")[::-1][:label_threshold]
+        mid = coords[ends[labelled]].mean(axis=1)
+        for (x, y), value in zip(mid, values[labelled]):
+            ax.text(x, y, f"{value:g}", ha="center", va="center", fontsize=6, zorder=3,
+                    bbox={"boxstyle": "round,pad=0.1", "fc": "white", "ec": "none", "alpha": 0.7})
+
+    if colorbar:
+        sm = ScalarMappable(norm=norm, cmap=cmap)
+        sm.set_array([])
+        ax.figure.colorbar(sm, ax=ax, label="Traffic Load")
+    ax.autoscale_view()
+    ax.set_aspect("equal", adjustable="datalim")
+    ax.axis("off")
+    if title is not None:
+        ax.set_title(title)
+    return ax
+
+
+def render_loads_png(G, loads, path, figsize=(10, 10), dpi=150, **kwargs):
+    """Headless draw_loads straight to a PNG (Agg canvas, no pyplot / display needed)."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    draw_loads(G, loads, ax=ax, **kwargs)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fig.savefig(path, dpi=dpi)
+    return path
 
 
-def plot_network(G, best_paths):
-    pos = nx.spring_layout(G)
-    
-    # Compute edge traffic load
-    edge_load = {edge: 0 for edge in G.edges()}
-    for path in best_paths:
-        for u, v in zip(path[:-1], path[1:]):
-            if (u, v) in edge_load:
-                edge_load[(u, v)] += 1
-            elif (v, u) in edge_load:
-                edge_load[(v, u)] += 1
-    
-    # Prepare color mapping
-    loads = np.array(list(edge_load.values()))
-    norm = Normalize(vmin=loads.min(), vmax=loads.max())
-    cmap = plt.cm.viridis
-    
-    # Create plot
+def plot_network(G, best_paths, out_png=None):
+    """Edge loads of best_paths over G; shown interactively, or written headless to out_png."""
+    loads = path_loads(G, best_paths)
+    if out_png is not None:
+        return render_loads_png(G, loads, out_png)
     fig, ax = plt.subplots()
-    nx.draw(G, pos, with_labels=True, ax=ax,
-            edge_color=[cmap(norm(load)) for load in loads],
-            width=2, node_size=500)
-    
-    # Create ScalarMappable for colorbar
-    sm = ScalarMappable(norm=norm, cmap=cmap)
-    sm.set_array([])
-    plt.colorbar(sm, ax=ax, label='Traffic Load')
-    
-    plt.show()
\ No newline at end of file
+    draw_loads(G, loads, ax=ax)
+    plt.show()
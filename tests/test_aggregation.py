@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from src.aggregation import aggregate_demands, aggregate_state, expand_state, solve_aggregated, split_annealing
+from src.formulation import objective_cost
+from src.graph_setup import build_large_graph, enumerate_candidate_paths
+
+
+def repeated_od_instance():
+    G = build_large_graph(grid_size=4, seed=0)
+    for u, v in G.edges:
+        G.edges[u, v]["capacity"] = 3
+    rnd = random.Random(0)
+    hubs = rnd.sample(list(G.nodes), 4)
+    demands = [(*rnd.sample(hubs, 2), 25) for _ in range(40)]
+    return G, demands
+
+def test_aggregate_and_expand_roundtrip():
+    demands = [("a", "b", 25), ("c", "d", 25), ("a", "b", 25), ("a", "b", 25)]
+    commodities, members = aggregate_demands(demands)
+    assert commodities == [("a", "b", 3), ("c", "d", 1)]
+    assert members == [[0, 2, 3], [1]]
+    cands = [[["a", "b"], ["a", "x", "b"]], [["c", "d"]]]
+    state = expand_state([[1, 2], [1]], members, len(demands))
+    assert state == [0, 0, 1, 1]
+    assert aggregate_state(state, members, cands) == [[1, 2], [1]]
+
+def test_solve_aggregated_cost_matches_per_trip_objective():
+    G, demands = repeated_od_instance()
+    state, cost, loads, cands = solve_aggregated(G, demands, lambda G, c: enumerate_candidate_paths(G, c, k=3),
+                                                 episodes=30)
+    assert len(state) == len(demands)
+    assert cost == objective_cost(G, cands, state, congestion_penalty_coef=10.0)
+    assert all(cands[i][0][0] == s and cands[i][0][-1] == t for i, (s, t, _) in enumerate(demands))
+
+
+def test_commodity_without_candidates_is_rejected():
+    G = build_large_graph(grid_size=3, seed=0)
+    cands = enumerate_candidate_paths(G, [(0, 8, 25)], k=2) + [[]]
+    with pytest.raises(ValueError, match=r"\[1\]"):
+        split_annealing(G, cands, [2, 1], episodes=2)
@@ -1 +1,55 @@
-# Placeholder test for annealing
+import random
+
+import pytest
+
+from src.annealing import (compute_capacity_violation, penalty_continuation_annealing,
+                           simulated_annealing)
+from src.formulation import objective_cost
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+
+
+def test_sa_is_reproducible_and_consistent(tmp_path):
+    G = build_large_graph(grid_size=4, seed=0)
+    demands = generate_demands(G, num_demands=12, seed=0)
+    cands = enumerate_candidate_paths(G, demands, k=3)
+    runs = [
+        simulated_annealing(G, cands, episodes=15, congestion_penalty_coef=10.0,
+                            log_csv=str(tmp_path / f"sa_{i}.csv"), seed=5)
+        for i in range(2)
+    ]
+    assert runs[0][:2] == runs[1][:2]
+    state, cost, loads = runs[0]
+    assert cost == objective_cost(G, cands, state, congestion_penalty_coef=10.0)
+    assert sum(loads.values()) == sum(len(cands[i][s]) - 1 for i, s in enumerate(state))
+
+def test_penalty_continuation_reports_trajectory(tmp_path):
+    G = build_large_graph(grid_size=3, seed=0)
+    for u, v in G.edges:
+        G.edges[u, v]["capacity"] = 2
+    demands = generate_demands(G, num_demands=20, seed=0)
+    cands = enumerate_candidate_paths(G, demands, k=3)
+    state, cost, loads, info = penalty_continuation_annealing(
+        G, cands, episodes=20, penalty_start=0.1, log_csv=str(tmp_path / "pc.csv"), seed=2)
+    assert len(info["penalty_trajectory"]) == len(info["violation_trajectory"]) == 20
+    assert info["final_penalty"] == info["penalty_trajectory"][-1]
+    # violations at the start push the penalty up from its initial value
+    assert max(info["penalty_trajectory"]) > 0.1
+    assert cost == objective_cost(G, cands, state, congestion_penalty_coef=info["final_penalty"])
+    paths = [cands[i][s] for i, s in enumerate(state)]
+    assert compute_capacity_violation(G, paths) <= min(info["violation_trajectory"])
+
+def test_best_cost_matches_objective_on_float_weights(tmp_path):
+    G = build_large_graph(grid_size=4, seed=0)
+    rnd = random.Random(0)
+    for u, v in G.edges:
+        G.edges[u, v]["time"] = rnd.uniform(0.1, 3.0)
+        G.edges[u, v]["capacity"] = rnd.uniform(0.5, 2.5)
+    cands = enumerate_candidate_paths(G, generate_demands(G, num_demands=30, seed=0), k=3)
+    for kernel in (None, "python"):
+        state, cost, _ = simulated_annealing(G, cands, episodes=40, congestion_penalty_coef=7.3, kernel=kernel,
+                                             log_csv=str(tmp_path / "sa.csv"), seed=1, verbose=False)
+        assert cost == pytest.approx(objective_cost(G, cands, state, congestion_penalty_coef=7.3), abs=1e-9)
+    state, cost, _, info = penalty_continuation_annealing(G, cands, episodes=20, log_csv=str(tmp_path / "pc.csv"),
+                                                          seed=1, verbose=False)
+    assert cost == pytest.approx(objective_cost(G, cands, state, congestion_penalty_coef=info["final_penalty"]),
+                                 abs=1e-9)
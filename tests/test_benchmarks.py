@@ -0,0 +1,20 @@
+from src.benchmarks import compare_results, make_instance, run_benchmarks
+
+
+def test_instances_are_reproducible():
+    a = make_instance(4, 6, seed=3)
+    b = make_instance(4, 6, seed=3)
+    assert a["demands"] == b["demands"]
+    assert a["candidate_lists"] == b["candidate_lists"]
+    assert a["state"] == b["state"]
+
+def test_run_and_compare_flags_regressions():
+    out = run_benchmarks(ladder=[(3, 4)], stages=["objective_cost", "enumerate_candidate_paths"], repeat=1)
+    assert {r["stage"] for r in out["results"]} == {"objective_cost", "enumerate_candidate_paths"}
+    assert all(r["median_s"] >= 0 for r in out["results"])
+
+    slower = {"meta": {}, "results": [dict(r) for r in out["results"]]}
+    slower["results"][0]["median_s"] = out["results"][0]["median_s"] * 2 + 1e-3
+    rows = compare_results(out, slower, threshold=0.1)
+    assert rows[0]["regression"] and rows[0]["stage"] == out["results"][0]["stage"]
+    assert not rows[1]["regression"]
@@ -0,0 +1,74 @@
+import random
+
+import dimod
+import networkx as nx
+import numpy as np
+
+from src.decoding import decode_samples, decode_sampleset, parse_var_label
+from src.formulation import k_shortest_candidates, objective_cost
+from src.path_index import build_path_index
+
+
+def tiny_graph():
+    G = nx.Graph()
+    G.add_edge("A","B", time=1, capacity=1)
+    G.add_edge("B","C", time=1, capacity=1)
+    G.add_edge("A","C", time=3, capacity=2)
+    return G
+
+def test_index_cost_matches_objective():
+    G = tiny_graph()
+    demand = [("A","C"), ("A","C"), ("B","C"), ("A","B")]
+    cands = k_shortest_candidates(G, demand, k=2)
+    index = build_path_index(G, cands)
+    rnd = random.Random(0)
+    for _ in range(20):
+        state = [rnd.randrange(len(P)) for P in cands]
+        assert index.cost(state, 7.0) == objective_cost(G, cands, state, congestion_penalty_coef=7.0)
+
+def test_decode_samples_skips_demands_without_candidates():
+    G = tiny_graph()
+    cands = [[], [["A","B"], ["A","C"]], [], [["B","C"]], []]
+    index = build_path_index(G, cands)
+    columns = np.arange(index.num_paths)
+    states, counts, _ = decode_samples([[0, 1, 1], [1, 1, 0]], columns, index)
+    assert counts.tolist() == [[0, 1, 0, 1, 0], [0, 2, 0, 0, 0]]
+    assert states.tolist() == [[-1, 1, -1, 0, -1], [-1, 0, -1, -1, -1]]
+
+def test_decode_repairs_one_hot_violations():
+    G = tiny_graph()
+    demand = [("A","C"), ("A","C"), ("B","C")]
+    cands = k_shortest_candidates(G, demand, k=2)
+    labels = [f"x_{d}_{p}" for d, P in enumerate(cands) for p in range(len(P))]
+    rows = [
+        [1, 0, 0, 1, 1, 0],  # feasible
+        [0, 0, 1, 1, 1, 0],  # demand 0 unassigned
+        [1, 1, 1, 1, 0, 0],  # demands 0 and 1 doubly assigned, demand 2 unassigned
+    ]
+    sampleset = dimod.SampleSet.from_samples((rows, labels), "BINARY", energy=[0.0, 0.0, 0.0])
+    states, costs = decode_sampleset(sampleset, G, cands, congestion_penalty_coef=10.0, polish_rounds=0)
+    assert states.shape == (3, 3)
+    for state, cost in zip(states, costs):
+        assert all(0 <= s < len(P) for s, P in zip(state, cands))
+        assert cost == objective_cost(G, cands, list(state), congestion_penalty_coef=10.0)
+    assert list(costs) == sorted(costs)
+
+    polished, pcosts = decode_sampleset(sampleset, G, cands, congestion_penalty_coef=10.0)
+    assert pcosts[0] <= costs[0]
+
+def test_parse_var_label():
+    assert parse_var_label("x_3_1") == (3, 1)
+    assert parse_var_label("y_3_1") is None
+    assert parse_var_label(5) is None
+
+def test_decode_sampleset_leaves_out_demands_without_candidates():
+    G = tiny_graph()
+    cands = [[], [["A","B","C"], ["A","C"]], [], [["B","C"]], []]
+    labels = ["x_1_0", "x_1_1", "x_3_0"]
+    rows = [[1, 0, 1], [1, 1, 0], [0, 0, 0]]
+    sampleset = dimod.SampleSet.from_samples((rows, labels), "BINARY", energy=[0.0, 0.0, 0.0])
+    states, costs = decode_sampleset(sampleset, G, cands, congestion_penalty_coef=10.0)
+    assert (states[:, [0, 2, 4]] == -1).all() and (states[:, [1, 3]] >= 0).all()
+    for state, cost in zip(states, costs):
+        routed = [cands[i] for i in (1, 3)]
+        assert cost == objective_cost(G, routed, [state[1], state[3]], congestion_penalty_coef=10.0)
@@ -0,0 +1,32 @@
+import numpy as np
+
+from src.decoding import best_decoded
+from src.factorized_qubo import build_factorized_qubo, solve_factorized
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.qubo_formulation import build_qubo
+
+
+def small_instance():
+    G = build_large_graph(grid_size=3, seed=1)
+    demands = generate_demands(G, num_demands=4, demand_size=3, seed=1)
+    cands = enumerate_candidate_paths(G, demands, k=3)
+    return G, demands, cands
+
+def test_energies_match_materialized_bqm():
+    G, demands, cands = small_instance()
+    bqm = build_qubo(G, demands, cands)
+    fq = build_factorized_qubo(G, demands, cands)
+    rng = np.random.default_rng(0)
+    samples = rng.integers(0, 2, size=(25, fq.num_variables))
+    expected = bqm.energies((samples, fq.labels))
+    assert np.allclose(fq.energies(samples), expected)
+    assert np.allclose(fq.to_bqm().energies((samples, fq.labels)), expected)
+
+def test_solver_returns_decodable_samples():
+    G, demands, cands = small_instance()
+    fq = build_factorized_qubo(G, demands, cands)
+    sample, energy, sampleset = solve_factorized(fq, num_reads=4, sweeps=50, seed=3, return_sampleset=True)
+    assert len(sampleset) == 4
+    assert np.isclose(energy, fq.energies([[sample[v] for v in fq.labels]])[0])
+    state, cost, _ = best_decoded(sampleset, G, cands, congestion_penalty_coef=10.0)
+    assert len(state) == len(demands)
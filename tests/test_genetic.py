@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from src.formulation import objective_cost
+from src.genetic import genetic_algorithm, population_costs
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.path_index import build_path_index
+
+
+def congested_instance():
+    G = build_large_graph(grid_size=4, seed=0)
+    for u, v in G.edges:
+        G.edges[u, v]["capacity"] = 2
+    demands = generate_demands(G, num_demands=30, seed=0)
+    return G, enumerate_candidate_paths(G, demands, k=3)
+
+def test_population_costs_match_objective():
+    G, cands = congested_instance()
+    index = build_path_index(G, cands)
+    rng = np.random.default_rng(0)
+    population = (rng.random((6, len(cands))) * index.num_choices).astype(int)
+    costs = population_costs(index, population, congestion_penalty_coef=7.0)
+    for state, cost in zip(population, costs):
+        assert np.isclose(cost, objective_cost(G, cands, list(state), congestion_penalty_coef=7.0))
+
+def test_genetic_algorithm_improves_on_seed_state():
+    G, cands = congested_instance()
+    seed_state = [0] * len(cands)
+    start = objective_cost(G, cands, seed_state, congestion_penalty_coef=10.0)
+    for crossover in ("edge", "uniform"):
+        state, cost, loads = genetic_algorithm(G, cands, population_size=24, generations=40, crossover=crossover,
+                                               initial_states=[seed_state], seed=1)
+        assert cost < start
+        assert cost == objective_cost(G, cands, state, congestion_penalty_coef=10.0)
+        assert sum(loads.values()) == sum(len(cands[i][s]) - 1 for i, s in enumerate(state))
+
+def test_demands_without_candidates_are_rejected():
+    G, cands = congested_instance()
+    with pytest.raises(ValueError, match=r"\[1\]"):
+        genetic_algorithm(G, [cands[0], [], cands[2]], generations=2)
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from src.ingestion import ingest_od_counts, to_commodities, to_demands
+
+
+def write_trips(path):
+    trips = pd.DataFrame({
+        "pu": ["A", "A", "B", "A", "C", "Z", "B", "A"],
+        "do": ["B", "B", "C", "B", "C", "A", "C", "B"],
+        "ts": pd.date_range("2024-05-01 07:00", periods=8, freq="h").astype(str),
+    })
+    trips.to_csv(path, index=False)
+
+def test_chunked_ingestion_counts_filters_and_maps(tmp_path):
+    path = tmp_path / "trips.csv"
+    write_trips(path)
+    node_map = {"A": 0, "B": 1, "C": 2}
+    counts, stats = ingest_od_counts(path, origin_col="pu", dest_col="do", time_col="ts",
+                                     start="2024-05-01 07:00", end="2024-05-01 14:00",
+                                     node_map=node_map, chunksize=3)
+    assert counts == {(0, 1): 3, (1, 2): 2}
+    assert all(type(s) is int for s, _ in counts)
+    assert stats["rows_read"] == 8
+    assert stats["rows_filtered"] == 1
+    assert stats["rows_unmapped"] == 1
+    assert stats["rows_self_loops"] == 1
+    assert stats["rows_kept"] == 5
+    assert to_commodities(counts) == [(0, 1, 3), (1, 2, 2)]
+    assert to_demands(counts, demand_size=25, top=1) == [(0, 1, 25)] * 3
+
+def test_sampling_is_reproducible(tmp_path):
+    path = tmp_path / "trips.csv"
+    write_trips(path)
+    first, _ = ingest_od_counts(path, origin_col="pu", dest_col="do", sample=0.5, seed=3, chunksize=2)
+    again, stats = ingest_od_counts(path, origin_col="pu", dest_col="do", sample=0.5, seed=3, chunksize=2)
+    assert first == again
+    assert stats["rows_kept"] + stats["rows_sampled_out"] + stats.get("rows_self_loops", 0) == 8
+
+def test_parquet_directory_is_read_as_one_dataset(tmp_path):
+    csv_path = tmp_path / "trips.csv"
+    write_trips(csv_path)
+    trips = pd.read_csv(csv_path)
+    parts = tmp_path / "trips"
+    parts.mkdir()
+    trips.iloc[:3].to_parquet(parts / "part-0.parquet", index=False)
+    trips.iloc[3:].to_parquet(parts / "part-1.parquet", index=False)
+    expected, _ = ingest_od_counts(csv_path, origin_col="pu", dest_col="do", time_col="ts",
+                                   start="2024-05-01 07:00", end="2024-05-01 14:00")
+    counts, stats = ingest_od_counts(parts, origin_col="pu", dest_col="do", time_col="ts",
+                                     start="2024-05-01 07:00", end="2024-05-01 14:00", chunksize=2)
+    assert counts == expected
+    assert stats["rows_read"] == 8
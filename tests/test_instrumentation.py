@@ -0,0 +1,46 @@
+from src import instrumentation
+from src.annealing import simulated_annealing
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+
+
+def run_pipeline(log_csv):
+    G = build_large_graph(grid_size=3, seed=0)
+    demands = generate_demands(G, num_demands=5, seed=0)
+    cands = enumerate_candidate_paths(G, demands, k=2)
+    return simulated_annealing(G, cands, episodes=5, log_csv=log_csv, seed=1)
+
+def test_disabled_records_nothing_and_results_unchanged(tmp_path):
+    instrumentation.reset()
+    instrumentation.disable()
+    plain = run_pipeline(str(tmp_path / "a.csv"))
+    assert instrumentation.snapshot() == {"spans": {}, "counters": {}, "gauges": {}}
+
+    instrumentation.enable()
+    try:
+        traced = run_pipeline(str(tmp_path / "b.csv"))
+    finally:
+        instrumentation.disable()
+    assert traced == plain
+
+    snap = instrumentation.snapshot()
+    assert snap["spans"]["solve"]["annealing.simulated_annealing"]["calls"] == 1
+    assert "graph_setup.enumerate_candidate_paths" in snap["spans"]["candidate_generation"]
+    assert snap["counters"]["sa_moves_evaluated"] > 0
+    assert snap["gauges"]["sa_moves_per_second"] > 0
+    instrumentation.reset()
+
+def test_prometheus_export():
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        with instrumentation.span("decode", "manual"):
+            pass
+        instrumentation.count("cache hits", 2)
+        instrumentation.gauge("qubo_nnz", 10)
+    finally:
+        instrumentation.disable()
+    text = instrumentation.export_prometheus()
+    assert 'qat_stage_calls_total{stage="decode",fn="manual"} 1' in text
+    assert "qat_cache_hits_total 2" in text
+    assert "# TYPE qat_qubo_nnz gauge" in text
+    instrumentation.reset()
@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.log_analysis import (acceptance_profile, convergence_curves, ingest_logs, parse_run_params,
+                              plot_runs, time_to_target)
+
+pytest.importorskip("pyarrow")
+
+
+def write_log(path, best, accept):
+    pd.DataFrame({"episode": range(len(best)), "temp": 1.0, "current_cost": best, "best_cost": best,
+                  "acceptance_rate": accept, "violations": 0}).to_csv(path, index=False)
+
+def test_parse_run_params_from_name_and_sidecar(tmp_path):
+    assert parse_run_params("results/logs/demo_sa_grid4_d10.csv") == {"grid_size": 4, "num_demands": 10,
+                                                                      "family": "demo_sa"}
+    path = tmp_path / "grid_dsize25_pen10.0.csv"
+    (tmp_path / "grid_dsize25_pen10.0.json").write_text('{"seed": 3}')
+    assert parse_run_params(str(path)) == {"demand_size": 25, "penalty": 10.0, "family": "grid", "seed": 3}
+
+def test_store_queries(tmp_path):
+    write_log(tmp_path / "grid_pen1.0_seed1.csv", [9, 7, 5, 5], [1.0, 0.5, 0.5, 0.0])
+    write_log(tmp_path / "grid_pen1.0_seed2.csv", [9, 8, 6, 4], [1.0, 1.0, 0.5, 0.5])
+    write_log(tmp_path / "grid_pen5.0_seed1.csv", [8, 8, 8, 8], [0.0, 0.0, 0.0, 0.0])
+    store = tmp_path / "runs.parquet"
+    table = ingest_logs(str(tmp_path), store=str(store))
+    assert len(table) == 12 and store.exists()
+    mtime = os.path.getmtime(store)
+    assert len(ingest_logs(str(tmp_path), store=str(store))) == 12
+    assert os.path.getmtime(store) == mtime  # nothing new: store not rewritten
+
+    curves = convergence_curves(table, by="penalty")
+    assert curves[(curves["penalty"] == 1.0) & (curves["episode"] == 3)]["median"].item() == 4.5
+    ttt = time_to_target(table, target=6, by="penalty").set_index("run")["episode"]
+    assert ttt["grid_pen1.0_seed1.csv"] == 2 and ttt["grid_pen1.0_seed2.csv"] == 2
+    assert pd.isna(ttt["grid_pen5.0_seed1.csv"])
+    rel = time_to_target(table, rel_gap=0.0, by="penalty").set_index("run")["episode"]
+    assert rel["grid_pen1.0_seed2.csv"] == 3 and pd.isna(rel["grid_pen1.0_seed1.csv"])
+    profile = acceptance_profile(table, by="penalty", bins=2)
+    assert profile.loc[1.0, 0] == 0.875 and profile.loc[5.0].max() == 0.0
+    assert os.path.exists(plot_runs(table, by="penalty", out_png=str(tmp_path / "cmp.png")))
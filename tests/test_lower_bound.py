@@ -0,0 +1,48 @@
+from itertools import product
+
+import networkx as nx
+
+from src.annealing import simulated_annealing
+from src.formulation import k_shortest_candidates, objective_cost
+from src.genetic import genetic_algorithm
+from src.lower_bound import lp_lower_bound, shortest_time_bound
+from src.path_index import build_path_index
+
+
+def congested_graph():
+    G = nx.Graph()
+    G.add_edge("A","B", time=1, capacity=1)
+    G.add_edge("B","C", time=1, capacity=1)
+    G.add_edge("A","C", time=3, capacity=1)
+    G.add_edge("C","D", time=1, capacity=2)
+    return G
+
+def test_bound_is_valid_and_tighter_than_trivial():
+    G = congested_graph()
+    demand = [("A","C"), ("A","C"), ("A","C"), ("A","D"), ("B","D")]
+    cands = k_shortest_candidates(G, demand, k=3)
+    optimum = min(objective_cost(G, cands, list(s), congestion_penalty_coef=10.0)
+                  for s in product(*(range(len(P)) for P in cands)))
+    bound, y = lp_lower_bound(G, cands, congestion_penalty_coef=10.0)
+    assert bound <= optimum + 1e-9
+    assert bound > shortest_time_bound(build_path_index(G, cands))
+    assert abs(y.sum() - len(demand)) < 1e-6
+
+def test_sa_stops_early_at_target_gap(tmp_path):
+    G = congested_graph()
+    demand = [("A","C"), ("A","D")]
+    cands = k_shortest_candidates(G, demand, k=3)
+    log = tmp_path / "sa.csv"
+    state, cost, _ = simulated_annealing(G, cands, episodes=50, log_csv=str(log), seed=1, target_gap=0.5)
+    assert len(log.read_text().splitlines()) - 1 < 50
+    assert cost == objective_cost(G, cands, state, congestion_penalty_coef=10.0)
+
+def test_genetic_stops_early_at_target_gap(tmp_path):
+    G = congested_graph()
+    demand = [("A","C"), ("A","D")]
+    cands = k_shortest_candidates(G, demand, k=3)
+    log = tmp_path / "ga.csv"
+    state, cost, _ = genetic_algorithm(G, cands, population_size=8, generations=50, log_csv=str(log), seed=1,
+                                       target_gap=0.5)
+    assert len(log.read_text().splitlines()) - 1 < 50
+    assert cost == objective_cost(G, cands, state, congestion_penalty_coef=10.0)
@@ -0,0 +1,31 @@
+from collections import Counter
+
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.partition import classify_demands, compare_with_monolithic, partition_graph, partitioned_solve
+
+
+def test_regions_balance_edges_and_classify_demands():
+    G = build_large_graph(grid_size=8, seed=0)
+    region_of = partition_graph(G, regions=4)
+    assert set(region_of.values()) == {0, 1, 2, 3}
+    # edges with both endpoints in the region
+    edges = Counter(region_of[u] for u, v in G.edges if region_of[u] == region_of[v])
+    assert len(edges) == 4
+    assert max(edges.values()) - min(edges.values()) <= 0.1 * sum(edges.values()) / 4
+    demands = generate_demands(G, num_demands=80, seed=0)
+    cands = enumerate_candidate_paths(G, demands, k=3)
+    for P, label in zip(cands, classify_demands(cands, region_of)):
+        regions = {region_of[n] for path in P for n in path}
+        assert (label == -1) == (len(regions) > 1)
+
+
+def test_partitioned_solve_is_close_to_monolithic():
+    G = build_large_graph(grid_size=6, seed=1)
+    demands = generate_demands(G, num_demands=120, seed=1)
+    cands = enumerate_candidate_paths(G, demands, k=3)
+    state, cost, _, info = partitioned_solve(G, cands, regions=4, workers=1, episodes=20)
+    assert len(state) == len(cands) and all(0 <= s < len(P) for s, P in zip(state, cands))
+    assert info["intra_demands"] + info["cross_demands"] == len(cands)
+    assert cost <= info["round_costs"][-1]
+    report = compare_with_monolithic(G, cands, regions=4, workers=2, episodes=20)
+    assert report["gap"] < 0.05
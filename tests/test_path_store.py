@@ -0,0 +1,44 @@
+import pickle
+
+import numpy as np
+
+from src.annealing import simulated_annealing
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.path_index import build_path_index
+from src.path_store import CandidateStore
+
+
+def test_store_round_trips_and_interns_shared_paths(tmp_path):
+    G = build_large_graph(grid_size=5, seed=0)
+    demands = generate_demands(G, num_demands=40, seed=0)
+    lists = enumerate_candidate_paths(G, demands + demands, k=3)
+    store = CandidateStore.from_lists(G, lists)
+    assert len(store) == len(lists) and store.to_lists() == lists
+    assert store[3][1] == lists[3][1] and len(store[3]) == len(lists[3]) and store[-1] == lists[-1]
+    assert len(store.paths) <= sum(len(P) for P in lists) // 2
+    assert store.path_ids.dtype == np.int32
+
+    copy = pickle.loads(pickle.dumps(store))
+    assert copy.to_lists() == lists
+    assert copy.paths.add(lists[0][0]) == store.path_ids[0]  # interning survives pickling
+
+    expected = build_path_index(G, lists)
+    index = build_path_index(G, store)
+    for key in ("demand_ptr", "path_ptr", "path_edges", "capacity", "time"):
+        assert np.array_equal(getattr(index, key), getattr(expected, key))
+    assert index.edges == expected.edges
+
+    state, cost, _ = simulated_annealing(G, store, episodes=5, log_csv=str(tmp_path / "sa.csv"))
+    assert cost == expected.cost(state, 10.0)
+
+
+def test_index_reads_attributes_of_a_modified_copy():
+    G = build_large_graph(grid_size=4, seed=1)
+    lists = enumerate_candidate_paths(G, generate_demands(G, num_demands=10, seed=1), k=2)
+    store = CandidateStore.from_lists(G, lists)
+    H = G.copy()
+    u, v = next(iter(H.edges))
+    H.edges[u, v]["capacity"] = 0
+    assert build_path_index(H, store).capacity[0] == 0
+    sub = G.subgraph(list(G.nodes)[:8])
+    assert store.path_index(sub) is None
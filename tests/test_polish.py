@@ -0,0 +1,41 @@
+import random
+
+import numpy as np
+
+from src.formulation import objective_cost
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.path_index import build_path_index
+from src.polish import move_delta_matrix, polish
+
+
+def congested_instance():
+    G = build_large_graph(grid_size=4, seed=0)
+    for u, v in G.edges:
+        G.edges[u, v]["capacity"] = 2
+    demands = generate_demands(G, num_demands=30, seed=0)
+    return G, enumerate_candidate_paths(G, demands, k=3)
+
+def test_delta_matrix_matches_objective_differences():
+    G, cands = congested_instance()
+    index = build_path_index(G, cands)
+    state = [random.Random(1).randrange(len(P)) for P in cands]
+    base = objective_cost(G, cands, state, congestion_penalty_coef=7.0)
+    matrix = move_delta_matrix(index, state, congestion_penalty_coef=7.0)
+    for i, P in enumerate(cands):
+        for p in range(matrix.shape[1]):
+            if p >= len(P):
+                assert matrix[i, p] == np.inf
+                continue
+            moved = state[:]
+            moved[i] = p
+            assert np.isclose(matrix[i, p], objective_cost(G, cands, moved, congestion_penalty_coef=7.0) - base)
+
+def test_polish_reaches_local_optimum():
+    G, cands = congested_instance()
+    state = [0] * len(cands)
+    start = objective_cost(G, cands, state, congestion_penalty_coef=10.0)
+    polished, cost, loads = polish(G, cands, state, congestion_penalty_coef=10.0)
+    assert cost < start
+    assert cost == objective_cost(G, cands, polished, congestion_penalty_coef=10.0)
+    index = build_path_index(G, cands)
+    assert move_delta_matrix(index, polished, congestion_penalty_coef=10.0).min() >= -1e-9
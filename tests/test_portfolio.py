@@ -0,0 +1,35 @@
+from src.formulation import objective_cost
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.portfolio import _genetic, _sa, _shortest_path, run_portfolio
+
+
+def test_portfolio_returns_best_answer_and_cancels_at_deadline():
+    G = build_large_graph(grid_size=4, seed=0)
+    demands = generate_demands(G, num_demands=20, seed=0)
+    cands = enumerate_candidate_paths(G, demands, k=3)
+    entries = [
+        ("shortest_path", _shortest_path, {}),
+        ("sa", _sa, {"episodes": 20}),
+        ("sa_endless", _sa, {"episodes": 10 ** 7}),
+    ]
+    winner, traces = run_portfolio(G, demands, cands, entries=entries, time_budget=5.0)
+    status = dict(zip(traces["solver"], traces["status"]))
+    assert status == {"shortest_path": "done", "sa": "done", "sa_endless": "cancelled"}
+    # the endless SA may contribute an incumbent before it is cancelled
+    assert winner["cost"] == traces["cost"].min()
+    assert winner["cost"] == objective_cost(G, cands, winner["state"], congestion_penalty_coef=10.0)
+
+
+def test_deadline_returns_incumbents_of_unfinished_solvers():
+    G = build_large_graph(grid_size=4, seed=0)
+    demands = generate_demands(G, num_demands=20, seed=0)
+    cands = enumerate_candidate_paths(G, demands, k=3)
+    entries = [
+        ("sa_endless", _sa, {"episodes": 10 ** 7}),
+        ("genetic_endless", _genetic, {"generations": 10 ** 7}),
+    ]
+    winner, traces = run_portfolio(G, demands, cands, entries=entries, time_budget=3.0)
+    assert set(traces["status"]) == {"cancelled"}
+    assert winner is not None and winner["solver"] in ("sa_endless", "genetic_endless")
+    assert winner["cost"] == traces["cost"].min()
+    assert winner["cost"] == objective_cost(G, cands, winner["state"], congestion_penalty_coef=10.0)
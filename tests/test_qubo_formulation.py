@@ -0,0 +1,27 @@
+import random
+
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.qubo_formulation import IncrementalQubo
+
+
+def test_incremental_updates_match_full_rebuild():
+    G = build_large_graph(grid_size=4, seed=2)
+    random.seed(2)
+    demands = [(s, t, random.randint(1, 9)) for s, t, _ in generate_demands(G, num_demands=30, seed=2)]
+    cands = enumerate_candidate_paths(G, demands, k=3)
+    q = IncrementalQubo(G)
+    ids = [q.add_demand(d, P) for d, P in zip(demands, cands)]
+    assert q.max_difference() < 1e-9
+
+    # removing the largest demand lowers alpha; adding a bigger one raises it again
+    largest = max(range(len(demands)), key=lambda i: demands[i][2])
+    q.remove_demand(ids[largest])
+    q.remove_demand(ids[(largest + 1) % len(ids)])
+    assert q.max_difference() < 1e-9
+    new_id = q.add_demand((demands[0][0], demands[0][1], 20), cands[0])
+    assert q.max_difference() < 1e-9
+    assert set(q.variables(new_id)) <= set(q.bqm.variables)
+
+    for demand_id in list(q.demands):
+        q.remove_demand(demand_id)
+    assert len(q.bqm.variables) == 0 and abs(q.bqm.offset) < 1e-9 and not q.edge_vars
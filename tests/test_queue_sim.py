@@ -0,0 +1,49 @@
+import networkx as nx
+import numpy as np
+
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.queue_sim import simulate_assignment, summarize
+
+
+def corridor(capacity):
+    G = nx.Graph()
+    G.add_edge("a", "b", time=2, capacity=capacity)
+    G.add_edge("b", "c", time=3, capacity=1)
+    return G
+
+def test_free_flow_travel_times():
+    G = corridor(capacity=100)
+    cands = [[["a", "b", "c"]], [["a", "b"]]]
+    result = simulate_assignment(G, cands, [0, 0], departures=[0, 4], outflow=10.0)
+    assert result["travel_time"].tolist() == [5.0, 2.0]
+    assert summarize(result)["total_delay"] == 0.0
+
+def test_bottleneck_queues_and_spills_back():
+    G = corridor(capacity=2)
+    cands = [[["a", "b", "c"]]] * 6
+    result = simulate_assignment(G, cands, [0] * 6)
+    summary = summarize(result)
+    assert summary["arrived"] == 6
+    # b-c releases 1/3 vehicle per tick, so arrivals are spaced 3 ticks apart
+    assert np.all(np.diff(np.sort(result["arrive"])) >= 3)
+    assert summary["total_delay"] > 0
+    assert summary["spillback_vehicle_ticks"] > 0
+    assert result["max_queue"].max() >= 2
+
+def test_departures_are_in_time_units():
+    G = corridor(capacity=100)
+    cands = [[["a", "b"]]] * 3
+    result = simulate_assignment(G, cands, [0, 0, 0], departures=[0.0, 1.5, 2.0], dt=0.5, outflow=10.0)
+    assert result["depart"].tolist() == [0.0, 1.5, 2.0]
+    assert result["arrive"].tolist() == [2.0, 3.5, 4.0]
+    rounded = simulate_assignment(G, cands, [0, 0, 0], departures=[0.2, 1.0, 1.1], outflow=10.0)
+    assert rounded["depart"].tolist() == [1.0, 1.0, 2.0]
+
+def test_gridlock_stops_early_and_reports_stuck_vehicles():
+    G = build_large_graph(grid_size=3, seed=0)
+    cands = enumerate_candidate_paths(G, generate_demands(G, num_demands=400, seed=0), k=1)
+    result = simulate_assignment(G, cands, [0] * len(cands))
+    assert result["gridlock"] and result["ticks"] < 100
+    assert np.array_equal(result["stuck"], np.flatnonzero(np.isnan(result["travel_time"])))
+    summary = summarize(result)
+    assert summary["stuck"] > 0 and summary["stuck"] + summary["arrived"] == len(cands)
@@ -0,0 +1,37 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.road_network import RoadNetwork, from_networkx, load_edge_csv, load_graphml
+
+
+def test_networkx_roundtrip_through_memory_mapped_files(tmp_path):
+    G = build_large_graph(grid_size=4, seed=0)
+    from_networkx(G).save(tmp_path / "net")
+    net = RoadNetwork.load(tmp_path / "net")
+    assert isinstance(net.src, np.memmap)
+    H = net.to_networkx()
+    assert set(map(frozenset, H.edges)) == set(map(frozenset, G.edges))
+    assert all(H.edges[u, v]["capacity"] == G.edges[u, v]["capacity"] for u, v in G.edges)
+    assert sorted(net.neighbors(0).tolist()) == sorted(G.neighbors(0))
+    demands = generate_demands(H, num_demands=5, seed=0)
+    assert all(enumerate_candidate_paths(H, demands, k=2))
+
+def test_edge_csv_merges_parallel_segments(tmp_path):
+    path = tmp_path / "roads.csv"
+    pd.DataFrame({"u": ["a", "b", "a", "c"], "v": ["b", "a", "c", "c"],
+                  "time": [3.0, 2.0, 5.0, 1.0], "capacity": [10, 5, 8, 1]}).to_csv(path, index=False)
+    net = load_edge_csv(path, source_col="u", target_col="v")
+    G = net.to_networkx()
+    assert G.number_of_edges() == 2
+    assert G.edges["a", "b"]["time"] == 2.0 and G.edges["a", "b"]["capacity"] == 15
+    dist = net.to_scipy()
+    assert dist.shape == (3, 3) and dist.nnz == 4
+
+def test_graphml_time_from_length_and_speed(tmp_path):
+    G = nx.Graph()
+    G.add_edge("x", "y", length=100.0, speed=10.0, capacity=4)
+    nx.write_graphml(G, tmp_path / "roads.graphml")
+    H = load_graphml(tmp_path / "roads.graphml", speed_key="speed").to_networkx()
+    assert H.edges["x", "y"]["time"] == 10.0 and H.edges["x", "y"]["capacity"] == 4.0
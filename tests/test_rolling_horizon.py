@@ -0,0 +1,39 @@
+import networkx as nx
+import numpy as np
+
+from src.graph_setup import build_large_graph, generate_demands
+from src.path_index import build_path_index
+from src.rolling_horizon import BackgroundLoads, rolling_horizon
+
+
+def test_windows_commit_every_demand_and_pipeline_matches_serial():
+    G = build_large_graph(grid_size=4, seed=0)
+    demands = generate_demands(G, num_demands=60, seed=0)
+    departures = np.random.default_rng(0).uniform(0, 20, len(demands))
+    state, cands, windows = rolling_horizon(G, demands, departures, window=6, step=3, episodes=10)
+    assert all(s is not None and 0 <= s < len(cands[i]) for i, s in enumerate(state))
+    assert windows["committed"].sum() == len(demands)
+    assert (windows["background"].iloc[1:] > 0).any()
+    serial = rolling_horizon(G, demands, departures, window=6, step=3, episodes=10, pipeline=False)
+    assert serial[0] == state
+
+def test_background_load_steers_later_vehicles():
+    # two parallel routes a-b-d and a-c-d with capacity 1; the first vehicle is still on the
+    # road when the second departs, so the second takes the other route
+    G = nx.Graph()
+    for u, v in [("a", "b"), ("b", "d"), ("a", "c"), ("c", "d")]:
+        G.add_edge(u, v, capacity=1, time=5)
+    demands = [("a", "d", 1), ("a", "d", 1)]
+    state, cands, _ = rolling_horizon(G, demands, [0.0, 2.0], window=2, step=2, episodes=20,
+                                      congestion_penalty_coef=100.0, pipeline=False)
+    assert cands[0][state[0]] != cands[1][state[1]]
+
+def test_background_loads_query_does_not_forget_earlier_load():
+    G = nx.path_graph(3)
+    index = build_path_index(G, [[[0, 1, 2]]])
+    bg = BackgroundLoads(index.num_edges)
+    bg.add(index, [0], [0.0])  # on edge (0, 1) until 1, on (1, 2) until 2
+    assert bg.loads_at(1.5).tolist() == [0, 1]
+    assert bg.loads_at(0.5).tolist() == [1, 1]  # an earlier query after a later one
+    bg.prune(1.5)
+    assert bg.loads_at(0.5).tolist() == [0, 1]
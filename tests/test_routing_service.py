@@ -0,0 +1,42 @@
+import asyncio
+
+import networkx as nx
+import pytest
+
+from src.graph_setup import build_large_graph, generate_demands
+from src.routing_service import RoutingService, route_many
+
+
+def test_requests_are_batched_and_answered_with_valid_paths():
+    G = build_large_graph(grid_size=4, seed=0)
+    demands = generate_demands(G, num_demands=25, seed=0)
+
+    async def run():
+        async with RoutingService(G, max_batch=10, max_wait=0.05, episodes=5) as service:
+            paths = await route_many(service, [(s, t, 0.0) for s, t, _ in demands])
+            return paths, service.stats()
+
+    paths, stats = asyncio.run(run())
+    for (s, t, _), path in zip(demands, paths):
+        assert path[0] == s and path[-1] == t and nx.is_path(G, path)
+    assert stats["served"] == 25 and stats["batch_size_max"] == 10 and stats["batches"] == 3
+    assert stats["latency_p50"] <= stats["latency_p99"]
+
+def test_later_batches_avoid_edges_loaded_by_earlier_ones():
+    G = nx.Graph()
+    for u, v in [("a", "b"), ("b", "d"), ("a", "c"), ("c", "d")]:
+        G.add_edge(u, v, capacity=1, time=5)
+
+    async def run():
+        async with RoutingService(G, max_batch=1, episodes=10, congestion_penalty_coef=100.0) as service:
+            first = await service.route("a", "d", 0.0)
+            second = await service.route("a", "d", 1.0)
+            return first, second
+
+    first, second = asyncio.run(run())
+    assert first != second
+
+def test_route_requires_running_service():
+    service = RoutingService(build_large_graph(grid_size=3, seed=0))
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.route(0, 1))
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from src.annealing import simulated_annealing
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.path_index import build_path_index
+from src.sa_kernel import HAVE_NUMBA, AnnealKernel, select_backend
+
+
+def _instance():
+    G = build_large_graph(grid_size=5, seed=0)
+    demands = generate_demands(G, num_demands=80, seed=0)
+    return G, enumerate_candidate_paths(G, demands, k=3)
+
+
+def _run(index, backend):
+    kernel = AnnealKernel(index, [0] * index.num_demands, 10.0, seed=7, backend=backend)
+    for temp in (50.0, 10.0, 2.0, 0.5):
+        kernel.episode(temp, 500)
+    return kernel
+
+
+def test_python_kernel_tracks_costs_and_best_state():
+    G, cands = _instance()
+    index = build_path_index(G, cands)
+    kernel = _run(index, "python")
+    assert kernel.current_cost == pytest.approx(index.cost(kernel.state, 10.0))
+    assert kernel.best_cost == pytest.approx(index.cost(kernel.best_state, 10.0))
+    assert kernel.best_cost <= kernel.current_cost
+    assert (kernel.loads == index.edge_loads(kernel.state)).all()
+
+
+@pytest.mark.skipif(not HAVE_NUMBA, reason="numba not installed")
+def test_numba_kernel_matches_python_trajectory():
+    G, cands = _instance()
+    index = build_path_index(G, cands)
+    fast, slow = _run(index, "numba"), _run(index, "python")
+    assert fast.state == slow.state and fast.best_state == slow.best_state
+    assert fast.best_cost == slow.best_cost
+
+
+def test_backend_selection_and_sa_integration(tmp_path, monkeypatch):
+    monkeypatch.setenv("SA_KERNEL", "python")
+    assert select_backend() == "python"
+    assert select_backend("auto") == ("numba" if HAVE_NUMBA else "python")
+    with pytest.raises(ValueError):
+        select_backend("cuda")
+    G, cands = _instance()
+    state, cost, _ = simulated_annealing(G, cands, episodes=10, kernel="auto", seed=3,
+                                         log_csv=os.fspath(tmp_path / "sa.csv"))
+    assert cost == pytest.approx(build_path_index(G, cands).cost(state, 10.0))
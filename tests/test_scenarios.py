@@ -0,0 +1,70 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.path_index import build_path_index
+from src.scenarios import (_splice_index, affected_demands, evaluate_scenarios, rescore, scenario_graph,
+                           scenario_matrices)
+
+
+def test_rescore_matches_rebuilt_graphs():
+    G = build_large_graph(grid_size=5, seed=0)
+    cands = enumerate_candidate_paths(G, generate_demands(G, num_demands=60, seed=0), k=3)
+    state = np.zeros(len(cands), dtype=np.int64)
+    edges = list(G.edges)
+    scenarios = [{"name": "half", "capacity_factor": {edges[0]: 0.5, edges[5]: 0.5}},
+                 {"name": "slow", "time": {edges[3]: 4}, "capacity": {edges[7][::-1]: 1}}]
+    index = build_path_index(G, cands)
+    capacity, times, _ = scenario_matrices(index, scenarios)
+    scores = rescore(index, state, capacity, times)
+    for s, scenario in enumerate(scenarios):
+        expected = build_path_index(scenario_graph(G, scenario), cands).cost(state, 10.0)
+        assert scores["cost"][s] == pytest.approx(expected)
+    with pytest.raises(ValueError):
+        scenario_matrices(index, [{"closes": [edges[0]]}])
+
+
+def test_closure_reroutes_only_affected_demands():
+    # a - b - d is the shortest route, a - c - e - d the detour
+    G = nx.Graph()
+    for u, v in [("a", "b"), ("b", "d"), ("a", "c"), ("c", "e"), ("e", "d"), ("c", "f")]:
+        G.add_edge(u, v, capacity=5, time=1)
+    cands = [[["a", "b", "d"]], [["c", "f"]]]
+    table = evaluate_scenarios(G, cands, [0, 0], [{"name": "b-d closed", "closed": [("d", "b")]}])
+    row = table.set_index("scenario").loc["b-d closed"]
+    assert row["affected"] == 1 and row["stranded"] == 1 and row["moved"] == 1
+    assert row["unroutable"] == 0
+    assert row["reoptimized_cost"] == pytest.approx(4.0)  # detour 3 + unchanged c-f 1
+    assert table.iloc[0]["scenario"] == "baseline"
+
+
+def test_stranded_demands_are_excluded_from_delta():
+    G = nx.Graph()
+    for u, v in [("a", "b"), ("c", "d")]:
+        G.add_edge(u, v, capacity=5, time=2)
+    cands = [[["a", "b"]], [["c", "d"]]]
+    table = evaluate_scenarios(G, cands, [0, 0], [{"name": "a-b closed", "closed": [("a", "b")]}])
+    row = table.set_index("scenario").loc["a-b closed"]
+    assert row["unroutable"] == 1
+    assert row["baseline_cost"] == pytest.approx(2.0) and row["reoptimized_cost"] == pytest.approx(2.0)
+    assert row["delta"] == pytest.approx(0.0)
+
+
+def test_spliced_index_matches_rebuilt_scenario_index():
+    G = build_large_graph(grid_size=5, seed=0)
+    cands = enumerate_candidate_paths(G, generate_demands(G, num_demands=60, seed=0), k=3)
+    edges = list(G.edges)
+    scenario = {"name": "slow", "time_factor": {edges[4]: 3}, "capacity": {edges[6]: 1}}
+    index = build_path_index(G, cands)
+    capacity, times, closed = scenario_matrices(index, [scenario])
+    hit = affected_demands(index, (capacity[0] != index.capacity) | (times[0] != index.time))
+    lists = list(cands)
+    for i in hit.tolist():
+        lists[i] = cands[i][::-1]
+    keep = np.array([i for i in range(len(cands)) if i != 5])
+    spliced = _splice_index(index, build_path_index(G, [lists[i] for i in hit.tolist()]), hit, keep,
+                            capacity[0], times[0])
+    rebuilt = build_path_index(scenario_graph(G, scenario), [lists[i] for i in keep])
+    for name in ("capacity", "time", "demand_ptr", "path_ptr", "path_edges", "path_time"):
+        assert np.array_equal(getattr(spliced, name), getattr(rebuilt, name))
@@ -0,0 +1,37 @@
+import pickle
+
+import numpy as np
+
+from src.genetic import genetic_algorithm
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.path_index import build_path_index
+from src.road_network import from_networkx
+from src.shared_instance import parallel_candidate_paths, share_path_index, share_road_network
+
+
+def instance():
+    G = build_large_graph(grid_size=4, seed=0)
+    demands = generate_demands(G, num_demands=20, seed=0)
+    return G, demands, enumerate_candidate_paths(G, demands, k=3)
+
+def test_shared_index_pickles_as_handle_and_matches():
+    G, _, cands = instance()
+    index = build_path_index(G, cands)
+    state = [i % len(P) for i, P in enumerate(cands)]
+    with share_path_index(index) as shared:
+        blob = pickle.dumps(shared)
+        assert len(blob) < 2000
+        attached = pickle.loads(blob)
+        assert not attached.owner
+        assert np.shares_memory(attached.index.path_edges, attached.arrays["path_edges"])
+        assert attached.index.cost(state, 10.0) == index.cost(state, 10.0)
+        assert attached.index.loads_dict(attached.index.edge_loads(state)) == index.loads_dict(index.edge_loads(state))
+        attached.close()
+
+def test_workers_use_shared_instances():
+    G, demands, cands = instance()
+    serial = genetic_algorithm(G, cands, population_size=16, generations=10, seed=2)
+    parallel = genetic_algorithm(G, cands, population_size=16, generations=10, seed=2, workers=2)
+    assert serial == parallel
+    with share_road_network(from_networkx(G)) as shared:
+        assert parallel_candidate_paths(shared, demands, k=3, workers=2, chunksize=7) == cands
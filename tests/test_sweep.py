@@ -0,0 +1,57 @@
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.sweep import expand_grid, run_sa_cell, run_sweep
+
+built = []
+
+
+def build_instance(params):
+    built.append(params["num_demands"])
+    G = build_large_graph(grid_size=3, seed=0)
+    demands = generate_demands(G, num_demands=params["num_demands"], seed=0)
+    return G, enumerate_candidate_paths(G, demands, k=2)
+
+def failing_cell(instance, params):
+    raise AssertionError("finished cells must not be rerun")
+
+def test_sweep_shares_instances_and_resumes(tmp_path):
+    cells = expand_grid({"num_demands": [4, 6], "penalty": [1.0, 10.0], "episodes": [3]})
+    for c in cells:
+        c["log_csv"] = str(tmp_path / f"log_{c['num_demands']}_{c['penalty']}.csv")
+    out_dir = str(tmp_path / "cells")
+
+    built.clear()
+    df = run_sweep(cells, build_instance, run_sa_cell, instance_params=("num_demands",),
+                   out_dir=out_dir, workers=2)
+    assert sorted(built) == [4, 6]
+    assert list(df.columns[:3]) == ["num_demands", "penalty", "episodes"]
+    assert len(df) == 4 and df["best_cost"].notna().all()
+
+    serial = run_sweep(cells[:1], build_instance, run_sa_cell, instance_params=("num_demands",),
+                       out_dir=str(tmp_path / "serial"), workers=0)
+    assert serial["best_cost"][0] == df["best_cost"][0]
+
+    shared = run_sweep(cells, build_instance, run_sa_cell, instance_params=("num_demands",),
+                       out_dir=str(tmp_path / "shared"), workers=2, share_index=True)
+    for col in ("best_cost", "violations"):
+        assert shared[col].tolist() == df[col].tolist()
+
+    built.clear()
+    again = run_sweep(cells, build_instance, failing_cell, instance_params=("num_demands",),
+                      out_dir=out_dir, workers=2)
+    assert sorted(built) == [4, 6]  # rebuilt for the fingerprint only
+    assert again.equals(df)
+
+
+def test_changed_instance_invalidates_cached_cells(tmp_path):
+    cells = expand_grid({"num_demands": [4], "episodes": [2], "log_csv": [str(tmp_path / "log.csv")]})
+    run_sweep(cells, build_instance, run_sa_cell, instance_params=("num_demands",),
+              out_dir=str(tmp_path), workers=0)
+
+    def other_demands(params):
+        G = build_large_graph(grid_size=3, seed=0)
+        return G, enumerate_candidate_paths(G, generate_demands(G, num_demands=4, seed=1), k=2)
+
+    ran = []
+    run_sweep(cells, other_demands, lambda instance, params: ran.append(params) or {"best_cost": 0.0},
+              instance_params=("num_demands",), out_dir=str(tmp_path), workers=0)
+    assert ran == cells
@@ -0,0 +1,31 @@
+from src.graph_setup import build_large_graph, enumerate_candidate_paths, generate_demands
+from src.tuning import SUMMARY_COLUMNS, hyperband, recommend_settings, sample_configs, successive_halving
+
+
+def instance(seed=0):
+    G = build_large_graph(grid_size=3, seed=seed)
+    demands = generate_demands(G, num_demands=6, seed=seed)
+    return G, enumerate_candidate_paths(G, demands, k=2)
+
+def test_successive_halving_prunes_and_extends():
+    G, cands = instance()
+    configs = sample_configs({"penalty": [1.0, 10.0], "temp_start": (5.0, 50.0), "moves_factor": [0.5, 1.0]}, 9, seed=1)
+    best, trials = successive_halving(G, cands, configs, min_episodes=2, max_episodes=18, eta=3, workers=0)
+    assert list(trials.columns[:5]) == SUMMARY_COLUMNS
+    per_rung = trials.groupby("rung").size().tolist()
+    assert per_rung == [9, 3, 1]
+    assert trials.groupby("rung")["episodes"].first().tolist() == [2, 6, 18]
+    assert best["episodes"] == 18 and isinstance(best["moves_per_episode"], int)
+
+def test_recommend_per_instance_class():
+    recommended, trials = recommend_settings([instance(0), instance(1)], n_configs=3, min_episodes=2,
+                                             max_episodes=6, workers=0)
+    assert len(recommended) == 1
+    assert set(trials["instance"]) == {0, 1}
+
+def test_hyperband_smallest_bracket_starts_at_min_episodes():
+    G, cands = instance()
+    space = {"penalty": [1.0, 10.0], "temp_start": (5.0, 50.0)}
+    _, trials = hyperband(G, cands, space, min_episodes=4, max_episodes=18, eta=3, workers=0)
+    first = trials[trials["rung"] == 0].groupby("bracket")["episodes"].first()
+    assert first.to_dict() == {1: 4, 0: 12}
@@ -0,0 +1,25 @@
+import networkx as nx
+from matplotlib.figure import Figure
+
+from src import visualize
+from src.graph_setup import build_large_graph
+
+
+def test_grid_coordinates_and_cached_layouts(tmp_path):
+    G = build_large_graph(grid_size=3, seed=0)
+    assert visualize.graph_layout(G).tolist()[4] == [1.0, 1.0]
+    H = nx.cycle_graph(12)
+    first = visualize.graph_layout(H, cache_dir=tmp_path)
+    assert list(tmp_path.iterdir())
+    visualize._layout_cache.clear()
+    assert (visualize.graph_layout(H, cache_dir=tmp_path) == first).all()
+
+def test_headless_render_decimates_labels(tmp_path):
+    G = build_large_graph(grid_size=20, seed=0)
+    loads = {tuple(sorted(e)): j % 7 for j, e in enumerate(G.edges)}
+    out = visualize.render_loads_png(G, loads, str(tmp_path / "loads.png"), label_threshold=50)
+    assert (tmp_path / "loads.png").stat().st_size > 0 and out.endswith("loads.png")
+    ax = Figure().add_subplot(111)
+    visualize.draw_loads(G, loads, ax=ax, label_threshold=50, colorbar=False)
+    assert len(ax.collections[0].get_segments()) == G.number_of_edges()
+    assert len(ax.texts) == 50